@@ -0,0 +1,170 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Battle Log Module
+
+Structured battle events and the sinks that receive them.
+
+SimpleBattle reports what happens as BattleEvent tuples instead of printing
+directly. Where the events go is up to the sink: the console, an in-memory
+ring buffer, a JSON-lines file, or nowhere at all.
+"""
+
+import json
+from collections import deque, namedtuple
+
+# One thing that happened in a battle.
+#   turn:          Turn number the event happened on
+#   actor:         Name of whoever acted
+#   action:        'start', 'status', 'enemy_turn', 'attack', 'ability',
+#                  'escape', 'invalid', 'victory', 'defeat' (plus the enemy
+#                  AI actions)
+#   target:        Name of whoever was acted on (or None)
+#   damage:        Damage dealt (0 if none)
+#   actor_health:  Actor's health after the action
+#   target_health: Target's health after the action (or None)
+#   message:       Free text for events that carry their own wording
+#   actor_max:     Actor's max_health (or None)
+#   target_max:    Target's max_health (or None)
+BattleEvent = namedtuple(
+    "BattleEvent",
+    ["turn", "actor", "action", "target", "damage",
+     "actor_health", "target_health", "message", "actor_max", "target_max"],
+    defaults=(None, None)
+)
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def format_health(health, max_health):
+    """Returns: 'health/max_health', or just health when the maximum isn't known"""
+    return f"{health}/{max_health}" if max_health is not None else f"{health}"
+
+def render_event(event):
+    """
+    Turn an event into the text shown on the console
+
+    Returns: String (may contain newlines)
+    """
+    if event.action == "status":
+        return (f"\n{event.actor}: HP={format_health(event.actor_health, event.actor_max)}\n"
+                f"{event.target}: HP={format_health(event.target_health, event.target_max)}")
+    if event.action == "enemy_turn":
+        return "\n--- ENEMY TURN ---"
+    if event.action == "attack":
+        return f">>> {event.actor} attacks {event.target} for {event.damage} damage!"
+    if event.message:
+        return f">>> {event.message}"
+    return f">>> {event.actor}: {event.action}"
+
+# ============================================================================
+# SINKS
+# ============================================================================
+
+class NullSink:
+    """Discards everything; battles skip building events for it entirely"""
+
+    enabled = False
+
+    def emit(self, event):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ConsoleSink:
+    """
+    Renders events to the console in batches
+
+    Events are buffered and printed with one print call when flushed, when
+    the buffer reaches batch_size, or when the battle needs player input.
+    """
+
+    enabled = True
+
+    def __init__(self, batch_size=32):
+        self.batch_size = batch_size
+        self.pending = []
+
+    def emit(self, event):
+        self.pending.append(event)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            print("\n".join(render_event(event) for event in self.pending))
+            self.pending = []
+
+    def close(self):
+        self.flush()
+
+
+class RingBufferSink:
+    """Keeps only the most recent events in memory"""
+
+    enabled = True
+
+    def __init__(self, capacity=256):
+        self.buffer = deque(maxlen=capacity)
+
+    def emit(self, event):
+        self.buffer.append(event)
+
+    def events(self):
+        """Returns: List of buffered events, oldest first"""
+        return list(self.buffer)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    """
+    Appends events to a file, one JSON object per line
+
+    Lines are collected in memory and written in one call per batch.
+    """
+
+    enabled = True
+
+    def __init__(self, filename, batch_size=256):
+        self.file = open(filename, "a")
+        self.batch_size = batch_size
+        self.pending = []
+
+    def emit(self, event):
+        self.pending.append(json.dumps(event._asdict()))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write("\n".join(self.pending) + "\n")
+            self.pending = []
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_json_lines(filename):
+    """
+    Read events back from a file written by JsonLinesSink
+
+    Returns: List of BattleEvent
+    """
+    events = []
+    with open(filename, "r") as f:
+        for line in f:
+            if line.strip():
+                events.append(BattleEvent(**json.loads(line)))
+    return events
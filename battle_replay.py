@@ -0,0 +1,120 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Battle Replay Tool
+
+Stores battle records and re-verifies them in bulk, e.g. after a balance
+change, to find every fight whose outcome would now be different.
+
+Usage: python battle_replay.py path/to/battles.jsonl
+"""
+
+import json
+import sys
+import time
+
+from combat_system import replay_battle
+from custom_exceptions import CombatError, MissingDataFileError, CorruptedDataError
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+def save_battle_records(records, filename):
+    """
+    Append battle records to a file, one JSON object per line
+
+    Returns: Number of records written
+    """
+    with open(filename, "a") as f:
+        f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+    return len(records)
+
+def load_battle_records(filename):
+    """
+    Load battle records written by save_battle_records
+
+    Returns: List of record dictionaries
+    Raises:
+        MissingDataFileError if the file doesn't exist
+        CorruptedDataError if a line isn't valid JSON
+    """
+    try:
+        with open(filename, "r") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        raise MissingDataFileError(f"Missing file: {filename}")
+
+    records = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            raise CorruptedDataError(f"Bad battle record on line {number}")
+    return records
+
+# ============================================================================
+# VERIFICATION
+# ============================================================================
+
+def verify_battle_record(record):
+    """
+    Replay one record and compare it with what was stored
+
+    Returns: None if the replay matches, otherwise a string describing the difference
+    """
+    try:
+        result = replay_battle(record)
+    except CombatError as e:
+        return str(e)
+
+    if result["winner"] != record["winner"]:
+        return f"winner {record['winner']} -> {result['winner']}"
+    if result["turns"] != record["turns"]:
+        return f"turns {record['turns']} -> {result['turns']}"
+    if result["final_health"] != record["final_health"]:
+        return f"final health {record['final_health']} -> {result['final_health']}"
+    return None
+
+def verify_battle_records(records):
+    """
+    Replay every record
+
+    Returns: List of (index, difference) tuples for records that no longer match
+    """
+    mismatches = []
+    for index, record in enumerate(records):
+        difference = verify_battle_record(record)
+        if difference is not None:
+            mismatches.append((index, difference))
+    return mismatches
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def main(argv):
+    if len(argv) != 2:
+        print("Usage: python battle_replay.py path/to/battles.jsonl")
+        return 2
+
+    try:
+        records = load_battle_records(argv[1])
+    except (MissingDataFileError, CorruptedDataError) as e:
+        print(f"Could not load records: {e}")
+        return 2
+
+    start = time.perf_counter()
+    mismatches = verify_battle_records(records)
+    elapsed = time.perf_counter() - start
+
+    rate = len(records) / elapsed if elapsed > 0 else 0
+    print(f"Replayed {len(records)} battles in {elapsed:.2f}s ({rate:.0f}/s)")
+    for index, difference in mismatches:
+        print(f"  record {index}: {difference}")
+    print(f"{len(mismatches)} mismatched")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
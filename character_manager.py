@@ -12,6 +12,8 @@ This module handles character creation, loading, and saving.
 import os
 from os import linesep
 
+from inventory_system import Inventory
+from quest_handler import QuestList
 from custom_exceptions import (
     InvalidCharacterClassError,
     CharacterNotFoundError,
@@ -20,6 +22,15 @@ from custom_exceptions import (
     CharacterDeadError
 )
 
+# Character fields saved as comma-separated lists
+LIST_FIELDS = ["inventory", "active_quests", "completed_quests"]
+
+# Character fields saved as comma-separated stat:value pairs
+MODIFIER_FIELDS = ["gear_bonus"]
+
+# Fields rebuilt at runtime and never written to save files
+RUNTIME_FIELDS = ["item_data", "equipment_modifiers", "stat_modifiers", "journal", "quest_tracker"]
+
 # ============================================================================
 # CHARACTER MANAGEMENT FUNCTIONS
 # ============================================================================
@@ -88,7 +99,14 @@ def save_character(character, save_directory="data/save_games"):
     try:
         with open(filename, "w") as f:
             for key, value in character.items():
+                if key in RUNTIME_FIELDS:
+                    continue
                 key_str = key.upper()
+                if key in LIST_FIELDS:
+                    # Lists (and Inventory / QuestList objects) are stored comma-separated
+                    value = ",".join(value)
+                elif key in MODIFIER_FIELDS:
+                    value = ",".join(f"{stat}:{amount}" for stat, amount in value.items())
                 f.write(f"{key_str}: {value}\n")
             return True
     except Exception as e:
@@ -149,9 +167,13 @@ def load_character(character_name, save_directory="data/save_games"):
             value = value.strip()
 
             # Convert lists
-            if key in ["inventory", "active_quests", "completed_quests"]:
+            if key in LIST_FIELDS:
                 character[key] = value.split(",") if value else []
 
+            # Convert stat:value pairs
+            elif key in MODIFIER_FIELDS:
+                character[key] = parse_modifier_field(key, value)
+
             # Convert integers
             elif key in ["level", "health", "max_health", "strength", "magic",
                          "experience", "gold"]:
@@ -159,6 +181,10 @@ def load_character(character_name, save_directory="data/save_games"):
                     raise InvalidSaveDataError(f"Invalid number for {key}: {value}")
                 character[key] = int(value)
 
+            # Empty equipment slots are saved as "None"
+            elif key.startswith("equipped_"):
+                character[key] = None if value in ("", "None") else value
+
             # Everything else
             else:
                 character[key] = value
@@ -264,6 +290,10 @@ def gain_experience(character, xp_amount):
         character["health"] = character["max_health"]
         leveled_up = True
 
+    tracker = character.get("quest_tracker")
+    if leveled_up and tracker is not None:
+        tracker.level_changed(character["level"])
+
     return leveled_up
     """
     Add experience to character and handle level ups
@@ -276,6 +306,9 @@ def gain_experience(character, xp_amount):
     - Increase magic by 2
     - Restore health to max_health
     
+    A character's quest tracker (see quest_handler.QuestTracker) is told
+    about the new level.
+    
     Raises: CharacterDeadError if character health is 0
     """
     # TODO: Implement experience gain and leveling
@@ -352,6 +385,21 @@ def revive_character(character):
 # VALIDATION
 # ============================================================================
 
+def parse_modifier_field(key, value):
+    modifiers = {}
+    for pair in value.split(",") if value else []:
+        stat, _, amount = pair.partition(":")
+        if not stat or not amount.lstrip("-").isdigit():
+            raise InvalidSaveDataError(f"Invalid modifier for {key}: {pair}")
+        modifiers[stat] = int(amount)
+    return modifiers
+    """
+    Parse a saved "stat:value,stat:value" field
+
+    Returns: Dictionary of stat_name -> integer value
+    Raises: InvalidSaveDataError if a pair is malformed
+    """
+
 def validate_character_data(character):
     required = [
         "name", "class", "level", "health", "max_health",
@@ -367,8 +415,8 @@ def validate_character_data(character):
         if not isinstance(character[field], int):
             raise InvalidSaveDataError(f"Field {field} must be an integer.")
 
-    for field in ["inventory", "active_quests", "completed_quests"]:
-        if not isinstance(character[field], list):
+    for field in LIST_FIELDS:
+        if not isinstance(character[field], (list, Inventory, QuestList)):
             raise InvalidSaveDataError(f"Field {field} must be a list.")
 
     return True
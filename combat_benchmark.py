@@ -0,0 +1,228 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Combat Benchmark Module
+
+Times the hot paths of combat_system at several scales, records ops/sec
+and peak traced memory per operation to a JSON baseline, and fails when a later run regresses
+past a threshold compared with that baseline.
+
+Usage:
+    python combat_benchmark.py --update                 # record a baseline
+    python combat_benchmark.py                          # compare against it
+    python combat_benchmark.py --scales 1,1000 --threshold 0.3   # quick run
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import combat_system
+from battle_log import NullSink
+
+DEFAULT_SCALES = (1, 1000, 100000, 1000000)
+DEFAULT_SEED = 163
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_BASELINE = "combat_baseline.json"
+
+# Runs with fewer operations than this are too noisy to compare speeds
+MIN_COMPARED_OPS = 1000
+
+# Memory is sampled over at most this many operations; tracemalloc slows
+# everything down, so it never runs during the timed pass. tracemalloc only
+# sees live blocks, so what gets recorded is the peak traced size above the
+# starting point, not a count of allocations.
+MEMORY_SAMPLE = 1000
+
+BENCH_CHARACTERS = {
+    "Warrior": {"health": 120, "strength": 15, "magic": 5},
+    "Mage": {"health": 80, "strength": 8, "magic": 20},
+    "Rogue": {"health": 90, "strength": 12, "magic": 10},
+    "Cleric": {"health": 100, "strength": 10, "magic": 15}
+}
+
+def make_bench_character(char_class):
+    """Build a level 1 character without touching save files"""
+    stats = BENCH_CHARACTERS[char_class]
+    return {
+        "name": "Bench", "class": char_class, "level": 1,
+        "health": stats["health"], "max_health": stats["health"],
+        "strength": stats["strength"], "magic": stats["magic"]
+    }
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+# Each benchmark runs `count` operations using a generator seeded with `seed`.
+
+def bench_create_enemy(count, seed):
+    rng = random.Random(seed)
+    types = list(combat_system.ENEMY_TYPES)
+    for _ in range(count):
+        combat_system.create_enemy(types[int(rng.random() * len(types))])
+
+def bench_calculate_damage(count, seed):
+    attacker = make_bench_character("Warrior")
+    defender = combat_system.create_enemy("orc")
+    calculate = combat_system.SimpleBattle.calculate_damage
+    for _ in range(count):
+        calculate(attacker, defender)
+
+def bench_battle(count, seed):
+    sink = NullSink()
+    types = list(combat_system.ENEMY_TYPES)
+    for i in range(count):
+        battle = combat_system.SimpleBattle(
+            make_bench_character("Warrior"),
+            combat_system.create_enemy(types[i % len(types)]),
+            log=sink,
+            seed=seed + i,
+            actions=combat_system.always_attack
+        )
+        battle.start_battle()
+
+def make_ability_bench(char_class):
+    def bench_ability(count, seed):
+        rng = random.Random(seed)
+        character = make_bench_character(char_class)
+        enemy = combat_system.create_enemy("dragon")
+        for _ in range(count):
+            enemy["health"] = enemy["max_health"]
+            character["health"] = 1
+            combat_system.use_special_ability(character, enemy, rng)
+    return bench_ability
+
+BENCHMARKS = {
+    "create_enemy": bench_create_enemy,
+    "calculate_damage": bench_calculate_damage,
+    "battle": bench_battle
+}
+for _char_class in BENCH_CHARACTERS:
+    BENCHMARKS[f"ability_{_char_class.lower()}"] = make_ability_bench(_char_class)
+
+# ============================================================================
+# RUNNING AND COMPARING
+# ============================================================================
+
+def run_benchmark(name, count, seed=DEFAULT_SEED):
+    """
+    Time one benchmark and sample its peak memory
+
+    Returns: Dictionary with ops, seconds, ops_per_sec and peak_bytes_per_op
+    """
+    bench = BENCHMARKS[name]
+
+    start = time.perf_counter()
+    bench(count, seed)
+    seconds = time.perf_counter() - start
+
+    sample = min(count, MEMORY_SAMPLE)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bench(sample, seed)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "ops": count,
+        "seconds": seconds,
+        "ops_per_sec": count / seconds if seconds > 0 else float("inf"),
+        "peak_bytes_per_op": max(0, peak - before) / sample
+    }
+
+def run_suite(scales=DEFAULT_SCALES, seed=DEFAULT_SEED, names=None):
+    """
+    Run every benchmark (or just `names`) at every scale
+
+    Returns: Dictionary keyed by 'name@scale'
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        for count in scales:
+            results[f"{name}@{count}"] = run_benchmark(name, count, seed)
+    return results
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Find results that got slower or hungrier than the baseline
+
+    A result regresses when its ops/sec falls below (1 - threshold) times
+    the baseline, or its peak memory per op rises above (1 + threshold) times
+    the baseline. Results missing from the baseline are ignored.
+
+    Returns: List of human-readable regression descriptions
+    """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if result["ops"] >= MIN_COMPARED_OPS:
+            floor = old["ops_per_sec"] * (1 - threshold)
+            if result["ops_per_sec"] < floor:
+                regressions.append(f"{key}: {result['ops_per_sec']:.0f} ops/sec, "
+                                   f"baseline {old['ops_per_sec']:.0f}")
+        ceiling = old["peak_bytes_per_op"] * (1 + threshold)
+        # A few bytes of jitter on tiny numbers isn't a regression
+        if result["peak_bytes_per_op"] > max(ceiling, old["peak_bytes_per_op"] + 64):
+            regressions.append(f"{key}: {result['peak_bytes_per_op']:.0f} peak bytes/op, "
+                               f"baseline {old['peak_bytes_per_op']:.0f}")
+    return regressions
+
+def save_baseline(results, filename):
+    with open(filename, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load_baseline(filename):
+    """Returns: Baseline dictionary, or {} if the file doesn't exist"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, "r") as f:
+        return json.load(f)
+
+def format_results(results):
+    lines = [f"{'benchmark':<28}{'ops/sec':>14}{'peak B/op':>12}"]
+    for key, result in results.items():
+        lines.append(f"{key:<28}{result['ops_per_sec']:>14,.0f}{result['peak_bytes_per_op']:>12.1f}")
+    return "\n".join(lines)
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark combat_system")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="comma-separated operation counts")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional slowdown before failing")
+    parser.add_argument("--update", action="store_true",
+                        help="write this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    results = run_suite(scales, args.seed)
+    print(format_results(results))
+
+    if args.update:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update to create one.")
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
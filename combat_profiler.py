@@ -0,0 +1,134 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Combat Profiler Module
+
+Optional per-phase timing for SimpleBattle.
+
+A BattleProfiler wraps a battle's phase methods on that one battle object,
+so battles created without a profiler run exactly the same code as before
+and pay nothing for it.
+
+Usage:
+    profiler = BattleProfiler()
+    for enemy in enemies:
+        SimpleBattle(hero, enemy, profiler=profiler, ...).start_battle()
+    print(format_profile_report(profiler.summary()))
+"""
+
+from time import perf_counter_ns
+
+# Battle phases and the SimpleBattle methods that make them up
+PHASE_METHODS = (
+    ("render", "render_status"),
+    ("input", "choose_action"),
+    ("damage", "perform_action"),
+    ("damage", "enemy_turn"),
+    ("end_check", "check_battle_end")
+)
+
+PHASES = ("render", "input", "damage", "end_check")
+
+class BattleStats:
+    """Timings and counters collected for one battle"""
+
+    def __init__(self):
+        self.ns = {phase: 0 for phase in PHASES}
+        self.calls = {phase: 0 for phase in PHASES}
+
+    def total_ns(self):
+        return sum(self.ns.values())
+
+
+class BattleProfiler:
+    """
+    Collects BattleStats for every battle it instruments
+
+    Args:
+        before: Optional hook called as before(phase, battle)
+        after:  Optional hook called as after(phase, battle, elapsed_ns)
+    """
+
+    def __init__(self, before=None, after=None):
+        self.before = before
+        self.after = after
+        self.battles = []
+
+    def instrument(self, battle):
+        """
+        Start timing a battle's phases
+
+        Returns: The BattleStats that will be filled in as the battle runs
+        """
+        stats = BattleStats()
+        for phase, method_name in PHASE_METHODS:
+            method = getattr(battle, method_name)
+            setattr(battle, method_name, self._timed(stats, phase, method, battle))
+        self.battles.append(stats)
+        return stats
+
+    def _timed(self, stats, phase, method, battle):
+        ns = stats.ns
+        calls = stats.calls
+        before = self.before
+        after = self.after
+
+        def timed(*args):
+            if before is not None:
+                before(phase, battle)
+            start = perf_counter_ns()
+            try:
+                return method(*args)
+            finally:
+                elapsed = perf_counter_ns() - start
+                ns[phase] += elapsed
+                calls[phase] += 1
+                if after is not None:
+                    after(phase, battle, elapsed)
+
+        return timed
+
+    def summary(self):
+        """Returns: summarize_battle_stats() over every instrumented battle"""
+        return summarize_battle_stats(self.battles)
+
+
+def summarize_battle_stats(stats_list):
+    """
+    Combine per-battle stats into one report
+
+    Returns: Dictionary with 'battles', 'total_ns' and 'phases', where
+             phases maps each phase to its calls, total_ns, mean_ns and
+             share (fraction of all measured time)
+    """
+    totals = {phase: 0 for phase in PHASES}
+    calls = {phase: 0 for phase in PHASES}
+    for stats in stats_list:
+        for phase in PHASES:
+            totals[phase] += stats.ns[phase]
+            calls[phase] += stats.calls[phase]
+
+    grand_total = sum(totals.values())
+    phases = {}
+    for phase in PHASES:
+        phases[phase] = {
+            "calls": calls[phase],
+            "total_ns": totals[phase],
+            "mean_ns": totals[phase] / calls[phase] if calls[phase] else 0.0,
+            "share": totals[phase] / grand_total if grand_total else 0.0
+        }
+    return {"battles": len(stats_list), "total_ns": grand_total, "phases": phases}
+
+
+def format_profile_report(summary):
+    """
+    Render a summary from summarize_battle_stats as a text table
+
+    Returns: String
+    """
+    lines = [f"Profiled {summary['battles']} battles, "
+             f"{summary['total_ns'] / 1e6:.2f} ms measured",
+             f"{'phase':<12}{'calls':>10}{'total ms':>12}{'mean us':>10}{'share':>8}"]
+    for phase, data in summary["phases"].items():
+        lines.append(f"{phase:<12}{data['calls']:>10}{data['total_ns'] / 1e6:>12.2f}"
+                     f"{data['mean_ns'] / 1e3:>10.2f}{data['share']:>8.1%}")
+    return "\n".join(lines)
@@ -9,7 +9,10 @@ AI Usage: [Document any AI assistance used]
 Handles combat mechanics
 """
 import random
+from bisect import bisect_right
+from battle_log import BattleEvent, ConsoleSink, NullSink
 from custom_exceptions import (
+    CombatError,
     InvalidTargetError,
     CombatNotActiveError,
     CharacterDeadError,
@@ -20,37 +23,50 @@ from custom_exceptions import (
 # ENEMY DEFINITIONS
 # ============================================================================
 
+# Base stats for every enemy type. Built once at import so create_enemy only
+# has to copy a template instead of rebuilding the whole table per call.
+ENEMY_TYPES = {
+    'goblin': {
+        'name': 'Goblin',
+        'type': 'goblin',
+        'ai': 'aggressive',
+        'health': 50,
+        'max_health': 50,
+        'strength': 8,
+        'magic': 2,
+        'speed': 12,
+        'xp_reward': 25,
+        'gold_reward': 10
+    },
+    'orc': {
+        'name': 'orc',
+        'type': 'orc',
+        'ai': 'defensive',
+        'health': 80,
+        'max_health': 80,
+        'strength': 12,
+        'magic': 5,
+        'speed': 8,
+        'xp_reward': 50,
+        'gold_reward': 25
+    },
+    'dragon': {
+        'name': 'Dragon',
+        'type': 'dragon',
+        'ai': 'caster',
+        'health': 200,
+        'max_health': 200,
+        'strength': 25,
+        'magic': 15,
+        'speed': 7,
+        'xp_reward': 200,
+        'gold_reward': 100
+    }
+}
+
 def create_enemy(enemy_type):
     enemy_type = enemy_type.lower()
-    enemies = {
-        'goblin': {
-            'name': 'Goblin',
-            'health': 50,
-            'max_health': 50,
-            'strength': 8,
-            'magic': 2,
-            'xp_reward': 25,
-            'gold_reward': 10
-        },
-        'orc': {
-            'name': 'orc',
-            'health': 80,
-            'max_health': 80,
-            'strength': 12,
-            'magic': 5,
-            'xp_reward': 50,
-            'gold_reward': 25
-        },
-        'dragon': {
-            'name': 'Dragon',
-            'health': 200,
-            'max_health': 200,
-            'strength': 25,
-            'magic': 15,
-            'xp_reward': 200,
-            'gold_reward': 100
-        }
-    }
+    enemies = ENEMY_TYPES
     if enemy_type not in enemies:
         raise InvalidTargetError(f'Unknown enemy type: {enemy_type}')
 
@@ -69,25 +85,350 @@ def create_enemy(enemy_type):
     # TODO: Implement enemy creation
     # Return dictionary with: name, health, max_health, strength, magic, xp_reward, gold_reward
 
-def get_random_enemy_for_level(character_level):
-    if character_level <= 2:
-        return create_enemy("goblin")
-    elif character_level <= 5:
-        return create_enemy("orc")
-    else:
-        return create_enemy("dragon")
+# ============================================================================
+# ENCOUNTER TABLES
+# ============================================================================
+
+# Weighted encounters per level range: (min_level, [(enemy_type, weight), ...])
+# A range runs from its min_level up to the next range's min_level - 1.
+ENCOUNTER_TABLES = [
+    (1, [("goblin", 85), ("orc", 15)]),
+    (3, [("goblin", 25), ("orc", 65), ("dragon", 10)]),
+    (6, [("orc", 35), ("dragon", 65)]),
+]
+
+def build_alias_table(weights):
+    """
+    Build a Walker alias table for O(1) weighted sampling
+
+    Args:
+        weights: List of positive numbers
+
+    Returns: Tuple of (probabilities, aliases), one entry per weight
+    Raises: ValueError if weights is empty or sums to zero
+    """
+    count = len(weights)
+    total = sum(weights)
+    if count == 0 or total <= 0:
+        raise ValueError("Alias table needs at least one positive weight.")
+
+    scaled = [w * count / total for w in weights]
+    probabilities = [0.0] * count
+    aliases = list(range(count))
+
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+    while small and large:
+        low = small.pop()
+        high = large.pop()
+        probabilities[low] = scaled[low]
+        aliases[low] = high
+        scaled[high] = scaled[high] + scaled[low] - 1.0
+        if scaled[high] < 1.0:
+            small.append(high)
+        else:
+            large.append(high)
+
+    # Whatever is left over is (up to rounding error) exactly 1
+    for i in small + large:
+        probabilities[i] = 1.0
+
+    return probabilities, aliases
+
+def sample_alias(table, rng=random):
+    """
+    Draw one index from an alias table built by build_alias_table
+
+    Returns: Integer index into the original weights list
+    """
+    probabilities, aliases = table
+    i = int(rng.random() * len(probabilities))
+    if rng.random() < probabilities[i]:
+        return i
+    return aliases[i]
+
+def build_encounter_tables(tables):
+    """
+    Precompute alias tables for every level range
+
+    Returns: List of (min_level, enemy_types, alias_table), sorted by min_level
+    """
+    built = []
+    for min_level, entries in sorted(tables):
+        for enemy_type, weight in entries:
+            if enemy_type not in ENEMY_TYPES:
+                raise InvalidTargetError(f'Unknown enemy type: {enemy_type}')
+        enemy_types = [enemy_type for enemy_type, weight in entries]
+        alias = build_alias_table([weight for enemy_type, weight in entries])
+        built.append((min_level, enemy_types, alias))
+    return built
+
+# Built once at load time so drawing an encounter never re-normalizes weights
+_ENCOUNTERS = build_encounter_tables(ENCOUNTER_TABLES)
+
+def _encounter_for_level(character_level):
+    """Find the precomputed encounter table covering a level"""
+    # Only a handful of ranges, so a reverse scan beats bisect here
+    for entry in reversed(_ENCOUNTERS):
+        if character_level >= entry[0]:
+            return entry
+    return _ENCOUNTERS[0]
+
+def roll_enemy_type(character_level, rng=random):
+    """
+    Pick an enemy type for a level from the weighted encounter tables
+
+    Returns: Enemy type string (e.g. 'goblin')
+    """
+    min_level, enemy_types, alias = _encounter_for_level(character_level)
+    return enemy_types[sample_alias(alias, rng)]
+
+def roll_enemy_types(character_level, count, rng=random):
+    """
+    Draw many encounters at once for headless simulations
+
+    Skips building enemy dictionaries entirely; pass the results to
+    create_enemy only for the encounters that are actually fought.
+
+    Returns: List of enemy type strings
+    """
+    min_level, enemy_types, (probabilities, aliases) = _encounter_for_level(character_level)
+    size = len(probabilities)
+    draw = rng.random
+    rolls = []
+    for _ in range(count):
+        i = int(draw() * size)
+        rolls.append(enemy_types[i] if draw() < probabilities[i] else enemy_types[aliases[i]])
+    return rolls
+
+def get_random_enemy_for_level(character_level, rng=random):
     """
     Get an appropriate enemy for character's level
-    
-    Level 1-2: Goblins
-    Level 3-5: Orcs
-    Level 6+: Dragons
-    
+
+    Enemies are drawn from ENCOUNTER_TABLES, so lower levels mostly meet
+    goblins, mid levels mostly orcs and high levels mostly dragons.
+
     Returns: Enemy dictionary
     """
-    # TODO: Implement level-appropriate enemy selection
-    # Use if/elif/else to select enemy type
-    # Call create_enemy with appropriate type
+    return create_enemy(roll_enemy_type(character_level, rng))
+
+# ============================================================================
+# LOOT TABLES
+# ============================================================================
+
+# Drops per enemy type: (item_id, weight, min_quantity, max_quantity).
+# Each kill rolls once; an item_id of None means nothing drops.
+LOOT_TABLES = {
+    'goblin': [
+        (None, 60, 0, 0),
+        ('health_potion', 35, 1, 2),
+        ('leather_armor', 5, 1, 1)
+    ],
+    'orc': [
+        (None, 40, 0, 0),
+        ('health_potion', 35, 1, 3),
+        ('iron_sword', 10, 1, 1),
+        ('iron_helm', 8, 1, 1),
+        ('iron_gauntlets', 7, 1, 1)
+    ],
+    'dragon': [
+        ('super_health_potion', 45, 1, 3),
+        ('steel_sword', 20, 1, 1),
+        ('fire_staff', 15, 1, 1),
+        ('steel_armor', 10, 1, 1),
+        ('sapphire_ring', 10, 1, 1)
+    ]
+}
+
+def build_loot_tables(tables):
+    """
+    Precompute cumulative weights for every loot table
+
+    Returns: Dictionary of enemy_type -> (entries, cumulative_weights)
+    Raises: ValueError if a table has no positive weight or a bad quantity range
+    """
+    built = {}
+    for enemy_type, entries in tables.items():
+        cumulative = []
+        total = 0
+        for item_id, weight, low, high in entries:
+            if weight < 0 or low > high or (item_id is not None and low < 1):
+                raise ValueError(f"Bad loot entry for {enemy_type}: {item_id}")
+            total += weight
+            cumulative.append(total)
+        if total <= 0:
+            raise ValueError(f"Loot table for {enemy_type} needs a positive weight.")
+        built[enemy_type] = (entries, cumulative)
+    return built
+
+# Built once at load time so a drop roll is one random number and a bisect
+_LOOT = build_loot_tables(LOOT_TABLES)
+
+def roll_loot(enemy_type, rng=random):
+    """
+    Roll one enemy's drop
+
+    Returns: Tuple of (item_id, quantity), or None if nothing drops (or the
+             enemy type has no loot table)
+    """
+    table = _LOOT.get(enemy_type)
+    if table is None:
+        return None
+    entries, cumulative = table
+    item_id, weight, low, high = entries[bisect_right(cumulative, rng.random() * cumulative[-1])]
+    if item_id is None:
+        return None
+    return item_id, low if low == high else rng.randint(low, high)
+
+def roll_loot_batch(enemy_type, count, rng=random):
+    """
+    Roll the drops for many kills of one enemy type at once
+
+    For mass simulations: all entries are drawn in one rng.choices call
+    and only the totals are kept.
+
+    Returns: Dictionary of item_id -> total quantity dropped
+    """
+    table = _LOOT.get(enemy_type)
+    if table is None or count <= 0:
+        return {}
+    entries, cumulative = table
+    hits = [0] * len(entries)
+    for index in rng.choices(range(len(entries)), cum_weights=cumulative, k=count):
+        hits[index] += 1
+
+    totals = {}
+    for (item_id, weight, low, high), times in zip(entries, hits):
+        if item_id is None or not times:
+            continue
+        if low == high:
+            quantity = low * times
+        else:
+            quantity = sum(rng.randint(low, high) for _ in range(times))
+        totals[item_id] = totals.get(item_id, 0) + quantity
+    return totals
+
+# ============================================================================
+# ENEMY AI
+# ============================================================================
+
+# Health ratios are rounded down into this many buckets for decisions
+HP_BUCKETS = 10
+
+ENEMY_HEAL_CHARGES = 2
+ENEMY_HEAL_PERCENT = 20
+
+# Each policy maps (own health ratio, target health ratio) -> action.
+# The rules only run while building decision tables at import time.
+def _basic_policy(own, target):
+    return "attack"
+
+def _aggressive_policy(own, target):
+    return "frenzy" if own < 0.3 else "attack"
+
+def _defensive_policy(own, target):
+    return "defend" if own < 0.4 and target > 0.5 else "attack"
+
+def _caster_policy(own, target):
+    if own < 0.3:
+        return "heal"
+    return "magic" if own >= 0.5 else "attack"
+
+ENEMY_POLICIES = {}
+_ATTACK_ONLY_POLICIES = set()
+
+def register_enemy_policy(name, rule):
+    """
+    Precompute a decision table for an enemy AI policy
+
+    Args:
+        name: Value enemies use in their 'ai' field
+        rule: Function (own_ratio, target_ratio) -> action, called once per
+              pair of HP buckets (at the bucket's midpoint)
+    """
+    table = []
+    for own in range(HP_BUCKETS):
+        for target in range(HP_BUCKETS):
+            table.append(rule((own + 0.5) / HP_BUCKETS, (target + 0.5) / HP_BUCKETS))
+    ENEMY_POLICIES[name] = table
+    if all(action == "attack" for action in table):
+        _ATTACK_ONLY_POLICIES.add(name)
+    else:
+        _ATTACK_ONLY_POLICIES.discard(name)
+
+register_enemy_policy("basic", _basic_policy)
+register_enemy_policy("aggressive", _aggressive_policy)
+register_enemy_policy("defensive", _defensive_policy)
+register_enemy_policy("caster", _caster_policy)
+
+def _health_bucket(health, max_health):
+    bucket = health * HP_BUCKETS // max(1, max_health)
+    return min(max(bucket, 0), HP_BUCKETS - 1)
+
+def _hp_bucket(combatant):
+    return _health_bucket(combatant["health"], combatant["max_health"])
+
+def choose_enemy_action(enemy, target):
+    """
+    Look up what an enemy does this turn
+
+    Enemies without an 'ai' field use the 'basic' policy.
+
+    Returns: 'attack', 'frenzy', 'magic', 'defend' or 'heal'
+    Raises: InvalidTargetError if the enemy's AI policy is unknown
+    """
+    table = ENEMY_POLICIES.get(enemy.get("ai", "basic"))
+    if table is None:
+        raise InvalidTargetError(f"Unknown enemy AI: {enemy.get('ai')}")
+    return table[_hp_bucket(enemy) * HP_BUCKETS + _hp_bucket(target)]
+
+def is_attack_only_policy(enemy):
+    """Returns: True if the enemy's policy never does anything but attack"""
+    return enemy.get("ai", "basic") in _ATTACK_ONLY_POLICIES
+
+def _next_bucket_change(health, step, bucket, max_health):
+    # Number of further hits of `step` damage until health drops below
+    # the current bucket (None if it's already in the lowest one)
+    if bucket == 0:
+        return None
+    threshold = (bucket * max_health + HP_BUCKETS - 1) // HP_BUCKETS - 1
+    return -(-(health - threshold) // step)
+
+def attacks_all_the_way(enemy, character, enemy_turns, player_damage, enemy_damage):
+    """
+    Check that an enemy's policy picks 'attack' on every turn of a plain
+    exchange of basic attacks
+
+    On enemy turn j the enemy has taken j player hits and the character
+    j - 1 enemy hits, so both HP buckets are known without simulating.
+    Buckets only ever go down, so the walk jumps from one bucket change
+    to the next: at most 2 * HP_BUCKETS table lookups, however long the
+    battle.
+
+    Returns: True if the enemy would only attack (False for unknown policies)
+    """
+    table = ENEMY_POLICIES.get(enemy.get("ai", "basic"))
+    if table is None:
+        return False
+    enemy_max = max(1, enemy["max_health"])
+    character_max = max(1, character["max_health"])
+    turn = 1
+    while turn <= enemy_turns:
+        enemy_health = enemy["health"] - turn * player_damage
+        character_health = character["health"] - (turn - 1) * enemy_damage
+        enemy_bucket = _health_bucket(enemy_health, enemy_max)
+        character_bucket = _health_bucket(character_health, character_max)
+        if table[enemy_bucket * HP_BUCKETS + character_bucket] != "attack":
+            return False
+        jumps = [jump for jump in (
+            _next_bucket_change(enemy_health, player_damage, enemy_bucket, enemy_max),
+            _next_bucket_change(character_health, enemy_damage, character_bucket, character_max)
+        ) if jump is not None]
+        if not jumps:
+            return True
+        turn += max(1, min(jumps))
+    return True
 
 # ============================================================================
 # COMBAT SYSTEM
@@ -100,11 +441,27 @@ class SimpleBattle:
     Manages combat between character and enemy
     """
     
-    def __init__(self, character, enemy):
+    def __init__(self, character, enemy, log=None, seed=None, actions=None, profiler=None):
         self.character = character
         self.enemy = enemy
         self.combat_active = True
         self.turn_counter = 1
+        # Where battle events go; see battle_log for the available sinks
+        self.log = ConsoleSink() if log is None else log
+        # Every random roll in the battle comes from this seeded generator,
+        # so the seed plus the chosen actions reproduce the whole fight
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        # actions(battle) -> '1'|'2'|'3'; None means ask the player
+        self.actions = actions
+        self.actions_taken = []
+        self.record = None
+        self.abilities = AbilityState()
+        self.enemy_guarding = False
+        self.enemy_heals_left = ENEMY_HEAL_CHARGES
+        # Timing is opt-in: the profiler wraps this battle's phase methods,
+        # so an unprofiled battle runs exactly the same code as before
+        self.stats = profiler.instrument(self) if profiler is not None else None
         """Initialize battle with character and enemy"""
         # TODO: Implement initialization
         # Store character and enemy
@@ -115,44 +472,70 @@ class SimpleBattle:
         if self.character["health"] <= 0:
             raise CharacterDeadError("Character is dead before battle starts.")
 
-        display_battle_log("Battle begins!")
+        log = self.log
+        character_start = battle_snapshot(self.character)
+        enemy_start = battle_snapshot(self.enemy)
+        if log.enabled:
+            self._emit(self.character, "start", message="Battle begins!")
 
-        while self.combat_active:
-            display_combat_stats(self.character, self.enemy)
+        try:
+            while self.combat_active:
+                self.render_status()
 
-            self.player_turn()
-            result = self.check_battle_end()
-            if result:
-                break
+                self.player_turn()
+                result = self.check_battle_end()
+                if result:
+                    break
+                if not self.combat_active:
+                    result = "escaped"
+                    break
 
-            self.enemy_turn()
-            result = self.check_battle_end()
-            if result:
-                break
+                self.enemy_turn()
+                result = self.check_battle_end()
+                if result:
+                    break
 
-            self.turn_counter += 1
+                self.abilities.tick()
+                self.turn_counter += 1
+        finally:
+            # Buffs and debuffs never outlive the battle, even one that fails
+            self.abilities.clear()
 
+        outcome = {
+            "winner": result,
+            "xp_gained": 0,
+            "gold_gained": 0,
+            "turns": self.turn_counter
+        }
         if result == "player":
             rewards = get_victory_rewards(self.enemy)
-            display_battle_log("You won the battle!")
-            return {
-                "winner": "player",
-                "xp_gained": rewards["xp"],
-                "gold_gained": rewards["gold"]
-            }
-
-        display_battle_log("You were defeated...")
-        return {
-            "winner": "enemy",
-            "xp_gained": 0,
-            "gold_gained": 0
+            outcome["xp_gained"] = rewards["xp"]
+            outcome["gold_gained"] = rewards["gold"]
+            if log.enabled:
+                self._emit(self.character, "victory", self.enemy, message="You won the battle!")
+        elif result == "enemy" and log.enabled:
+            self._emit(self.enemy, "defeat", self.character, message="You were defeated...")
+        log.flush()
+
+        self.record = {
+            "seed": self.seed,
+            "character": character_start,
+            "enemy": enemy_start,
+            "actions": "".join(self.actions_taken),
+            "winner": result,
+            "turns": self.turn_counter,
+            "final_health": [self.character["health"], self.enemy["health"]]
         }
+        return outcome
 
         """
         Start the combat loop
         
         Returns: Dictionary with battle results:
-                {'winner': 'player'|'enemy', 'xp_gained': int, 'gold_gained': int}
+                {'winner': 'player'|'enemy'|'escaped', 'xp_gained': int,
+                 'gold_gained': int, 'turns': int}
+
+        Afterwards self.record holds a compact replay record (see replay_battle)
         
         Raises: CharacterDeadError if character is already dead
         """
@@ -165,64 +548,123 @@ class SimpleBattle:
         if not self.combat_active:
             raise CombatNotActiveError("Battle is not active.")
 
-        print("\n--- PLAYER TURN ---")
-        print("1. Basic Attack")
-        print("2. Special Ability")
-        print("3. Run")
+        self.perform_action(self.choose_action())
+        """
+        Handle player's turn
+        
+        Displays options:
+        1. Basic Attack
+        2. Special Ability (if available)
+        3. Try to Run
+        
+        Raises: CombatNotActiveError if called outside of battle
+        """
+
+    def render_status(self):
+        """Report both sides' health at the start of a turn"""
+        if self.log.enabled:
+            self._emit(self.character, "status", self.enemy)
 
-        choice = input("Choose action: ").strip()
+    def choose_action(self):
+        """
+        Get the player's choice for this turn
+
+        Asks the player unless the battle was given an action source.
+
+        Returns: '1', '2', '3', or whatever invalid text was entered
+        """
+        if self.actions is None:
+            # Make sure the player sees everything that happened so far
+            self.log.flush()
+            print("\n--- PLAYER TURN ---")
+            print("1. Basic Attack")
+            print("2. Special Ability")
+            print("3. Run")
 
+            choice = input("Choose action: ").strip()
+        else:
+            choice = self.actions(self)
+        # Anything that isn't a real option is recorded as '0' (turn lost)
+        self.actions_taken.append(choice if choice in ("1", "2", "3") else "0")
+        return choice
+
+    def perform_action(self, choice):
+        """Carry out the player's chosen action"""
+        log = self.log
         if choice == "1":
             damage = self.calculate_damage(self.character, self.enemy)
+            if self.enemy_guarding:
+                damage = max(1, damage // 2)
             self.apply_damage(self.enemy, damage)
-            display_battle_log(f"You deal {damage} damage!")
+            if log.enabled:
+                self._emit(self.character, "attack", self.enemy, damage)
 
         elif choice == "2":
             try:
-                message = use_special_ability(self.character, self.enemy)
-                display_battle_log(message)
+                message = use_special_ability(self.character, self.enemy, self.rng,
+                                              self.abilities)
             except AbilityOnCooldownError:
-                display_battle_log("Ability on cooldown!")
+                message = "Ability on cooldown!"
+            if log.enabled:
+                self._emit(self.character, "ability", self.enemy, message=message)
 
         elif choice == "3":
             escaped = self.attempt_escape()
             if escaped:
-                display_battle_log("You escaped successfully!")
+                if log.enabled:
+                    self._emit(self.character, "escape", self.enemy,
+                               message="You escaped successfully!")
                 return
-            else:
-                display_battle_log("Your escape failed!")
+            elif log.enabled:
+                self._emit(self.character, "escape", self.enemy,
+                           message="Your escape failed!")
 
-        else:
-            display_battle_log("Invalid choice. Your turn is lost!")
-
-        """
-        Handle player's turn
-        
-        Displays options:
-        1. Basic Attack
-        2. Special Ability (if available)
-        3. Try to Run
-        
-        Raises: CombatNotActiveError if called outside of battle
-        """
-        # TODO: Implement player turn
-        # Check combat is active
-        # Display options
-        # Get player choice
-        # Execute chosen action
+        elif log.enabled:
+            self._emit(self.character, "invalid", message="Invalid choice. Your turn is lost!")
     
     def enemy_turn(self):
         if not self.combat_active:
             raise CombatNotActiveError("Battle is not active.")
 
-        print("\n--- ENEMY TURN ---")
-        damage = self.calculate_damage(self.enemy, self.character)
-        self.apply_damage(self.character, damage)
-        display_battle_log(f"{self.enemy['name']} attacks for {damage} damage!")
+        enemy = self.enemy
+        character = self.character
+        if self.log.enabled:
+            self._emit(enemy, "enemy_turn")
+        self.enemy_guarding = False
+        action = choose_enemy_action(enemy, character)
+        if action == "heal" and self.enemy_heals_left <= 0:
+            action = "attack"
+
+        message = None
+        damage = 0
+        if action == "attack":
+            damage = self.calculate_damage(enemy, character)
+        elif action == "frenzy":
+            damage = self.calculate_damage(enemy, character) * 3 // 2
+            message = f"{enemy['name']} attacks in a frenzy for {damage} damage!"
+        elif action == "magic":
+            damage = max(1, enemy["magic"] * 2 - character["magic"] // 4)
+            message = f"{enemy['name']} casts a spell for {damage} damage!"
+        elif action == "defend":
+            self.enemy_guarding = True
+            message = f"{enemy['name']} raises its guard."
+        else:
+            self.enemy_heals_left -= 1
+            amount = enemy["max_health"] * ENEMY_HEAL_PERCENT // 100
+            enemy["health"] = min(enemy["health"] + amount, enemy["max_health"])
+            message = f"{enemy['name']} recovers {amount} HP."
+
+        if damage:
+            self.apply_damage(character, damage)
+        if self.log.enabled:
+            self._emit(enemy, action, character, damage, message)
         """
-        Handle enemy's turn - simple AI
-        
-        Enemy always attacks
+        Handle enemy's turn
+
+        The enemy's AI policy (enemy['ai'], see ENEMY_POLICIES) picks an
+        action from a precomputed decision table:
+        attack, frenzy (1.5x attack), magic, defend (halves the player's
+        next basic attack) or heal (limited to ENEMY_HEAL_CHARGES per battle)
         
         Raises: CombatNotActiveError if called outside of battle
         """
@@ -231,7 +673,23 @@ class SimpleBattle:
         # Calculate damage
         # Apply to character
     
-    def calculate_damage(self, attacker, defender):
+    def _emit(self, actor, action, target=None, damage=0, message=None):
+        """Send one structured event to the battle log sink"""
+        self.log.emit(BattleEvent(
+            self.turn_counter,
+            actor.get("name"),
+            action,
+            target.get("name") if target is not None else None,
+            damage,
+            actor.get("health"),
+            target.get("health") if target is not None else None,
+            message,
+            actor.get("max_health"),
+            target.get("max_health") if target is not None else None
+        ))
+
+    @staticmethod
+    def calculate_damage(attacker, defender):
         damage = attacker["strength"] - (defender["strength"] // 4)
         return max(1, damage)
         """
@@ -239,12 +697,17 @@ class SimpleBattle:
         
         Damage formula: attacker['strength'] - (defender['strength'] // 4)
         Minimum damage: 1
+
+        'strength' is the effective value with equipment bonuses already
+        included (see inventory_system EQUIPMENT MODIFIERS), so gear costs
+        nothing here.
         
         Returns: Integer damage amount
         """
         # TODO: Implement damage calculation
     
-    def apply_damage(self, target, damage):
+    @staticmethod
+    def apply_damage(target, damage):
         target["health"] -= damage
         if target["health"] < 0:
             target["health"] = 0
@@ -271,7 +734,7 @@ class SimpleBattle:
         # TODO: Implement battle end check
     
     def attempt_escape(self):
-        success = random.random() < 0.5
+        success = self.rng.random() < 0.5
         if success:
             self.combat_active = False
         return success
@@ -290,73 +753,278 @@ class SimpleBattle:
 # SPECIAL ABILITIES
 # ============================================================================
 
-def use_special_ability(character, enemy):
-    char_class = character["class"].lower()
+# Class abilities as data. Every entry has:
+#   name, cooldown (rounds before it can be used again), kind ('damage'|'heal')
+#   damage: stat, multiplier, chance (to land), message, miss_message
+#   heal:   amount, message
+#   effect: optional timed effect (target 'self'|'enemy', stat, amount, rounds)
+CLASS_ABILITIES = {
+    "warrior": {
+        "name": "Power Strike", "cooldown": 2, "kind": "damage",
+        "stat": "strength", "multiplier": 2, "chance": 1.0,
+        "message": "Power Strike! You deal {damage} damage.",
+        "effect": None
+    },
+    "mage": {
+        "name": "Fireball", "cooldown": 3, "kind": "damage",
+        "stat": "magic", "multiplier": 2, "chance": 1.0,
+        "message": "Fireball hits for {damage} damage!",
+        # Scorched enemies hit softer for a couple of rounds
+        "effect": ("enemy", "strength", -3, 2)
+    },
+    "rogue": {
+        "name": "Critical Strike", "cooldown": 2, "kind": "damage",
+        "stat": "strength", "multiplier": 3, "chance": 0.5,
+        "message": "Critical Strike! Massive {damage} damage!",
+        "miss_message": "Critical Strike missed!",
+        "effect": None
+    },
+    "cleric": {
+        "name": "Heal", "cooldown": 3, "kind": "heal", "amount": 30,
+        "message": "You heal {amount} HP.",
+        # Blessing: a short strength buff after healing
+        "effect": ("self", "strength", 2, 2)
+    }
+}
+
+class AbilityState:
+    """
+    Per-battle ability cooldowns and timed stat effects
+
+    Cooldowns are stored as the round an ability becomes ready again, so
+    ticking a round never touches them. Active effects are kept in a flat
+    list of [combatant, stat, amount, expires_round] entries that are
+    updated in place; tick() costs O(active effects) and allocates nothing.
+    """
+
+    def __init__(self):
+        self.round = 1
+        self.ready_round = {}
+        self.effects = []
+
+    def is_ready(self, combatant):
+        """Returns: True if combatant's ability can be used this round"""
+        return self.ready_round.get(id(combatant), 0) <= self.round
 
-    if char_class == "warrior":
-        return warrior_power_strike(character, enemy)
+    def start_cooldown(self, combatant, rounds):
+        self.ready_round[id(combatant)] = self.round + rounds
 
-    elif char_class == "mage":
-        return mage_fireball(character, enemy)
+    def add_effect(self, combatant, stat, amount, rounds):
+        """Apply amount to combatant[stat] until `rounds` rounds have passed"""
+        combatant[stat] += amount
+        self.effects.append([combatant, stat, amount, self.round + rounds])
 
-    elif char_class == "rogue":
-        return rogue_critical_strike(character, enemy)
+    def tick(self):
+        """Advance one round and undo effects that have run out"""
+        self.round += 1
+        effects = self.effects
+        i = len(effects) - 1
+        while i >= 0:
+            effect = effects[i]
+            if effect[3] <= self.round:
+                effect[0][effect[1]] -= effect[2]
+                effects[i] = effects[-1]
+                effects.pop()
+            i -= 1
 
-    elif char_class == "cleric":
-        return cleric_heal(character)
+    def clear(self):
+        """Undo every active effect (call when the battle ends)"""
+        for combatant, stat, amount, expires in self.effects:
+            combatant[stat] -= amount
+        self.effects.clear()
 
+def perform_ability(ability, character, enemy, rng=random, state=None):
+    """
+    Carry out one ability entry from CLASS_ABILITIES
+
+    Timed effects are only applied when a battle's AbilityState is given.
+
+    Returns: String describing what happened
+    """
+    if ability["kind"] == "heal":
+        amount = ability["amount"]
+        character["health"] = min(character["health"] + amount, character["max_health"])
+        message = ability["message"].format(amount=amount)
     else:
-        return "No special ability available."
+        if ability["chance"] < 1.0 and rng.random() >= ability["chance"]:
+            return ability["miss_message"]
+        damage = character[ability["stat"]] * ability["multiplier"]
+        enemy["health"] = max(0, enemy["health"] - damage)
+        message = ability["message"].format(damage=damage)
+
+    effect = ability["effect"]
+    if effect is not None and state is not None:
+        target, stat, amount, rounds = effect
+        state.add_effect(character if target == "self" else enemy, stat, amount, rounds)
+    return message
+
+def use_special_ability(character, enemy, rng=random, state=None):
     """
     Use character's class-specific special ability
-    
-    Example abilities by class:
+
+    Abilities by class (see CLASS_ABILITIES):
     - Warrior: Power Strike (2x strength damage)
-    - Mage: Fireball (2x magic damage)
+    - Mage: Fireball (2x magic damage, weakens the enemy)
     - Rogue: Critical Strike (3x strength damage, 50% chance)
-    - Cleric: Heal (restore 30 health)
-    
+    - Cleric: Heal (restore 30 health, brief strength blessing)
+
+    Cooldowns are only tracked when a battle's AbilityState is passed in.
+
     Returns: String describing what happened
     Raises: AbilityOnCooldownError if ability was used recently
     """
-    # TODO: Implement special abilities
-    # Check character class
-    # Execute appropriate ability
-    # Track cooldowns (optional advanced feature)
+    ability = CLASS_ABILITIES.get(character["class"].lower())
+    if ability is None:
+        return "No special ability available."
+
+    if state is not None:
+        if not state.is_ready(character):
+            raise AbilityOnCooldownError(f"{ability['name']} is on cooldown.")
+        state.start_cooldown(character, ability["cooldown"])
+
+    return perform_ability(ability, character, enemy, rng, state)
 
 def warrior_power_strike(character, enemy):
-    damage = character["strength"] * 2
-    enemy["health"] -= damage
-    return f"Power Strike! You deal {damage} damage."
     """Warrior special ability"""
-    # TODO: Implement power strike
-    # Double strength damage
+    return perform_ability(CLASS_ABILITIES["warrior"], character, enemy)
 
 def mage_fireball(character, enemy):
-    damage = character["magic"] * 2
-    enemy["health"] -= damage
-    return f"Fireball hits for {damage} damage!"
     """Mage special ability"""
-    # TODO: Implement fireball
-    # Double magic damage
-
-def rogue_critical_strike(character, enemy):
-    if random.random() < 0.5:
-        dmg = character["strength"] * 3
-        enemy["health"] -= dmg
-        return f"Critical Strike! Massive {dmg} damage!"
-    else:
-        return "Critical Strike missed!"
+    return perform_ability(CLASS_ABILITIES["mage"], character, enemy)
+
+def rogue_critical_strike(character, enemy, rng=random):
     """Rogue special ability"""
-    # TODO: Implement critical strike
-    # 50% chance for triple damage
+    return perform_ability(CLASS_ABILITIES["rogue"], character, enemy, rng)
 
 def cleric_heal(character):
-    character["health"] = min(character["health"] + 30, character["max_health"])
-    return "You heal 30 HP."
     """Cleric special ability"""
-    # TODO: Implement healing
-    # Restore 30 HP (not exceeding max_health)
+    return perform_ability(CLASS_ABILITIES["cleric"], character, None)
+
+# ============================================================================
+# AUTO-RESOLVE
+# ============================================================================
+
+def always_attack(battle):
+    """Action source that only ever uses Basic Attack"""
+    return "1"
+
+def auto_resolve_battle(character, enemy, actions=None, seed=None):
+    """
+    Resolve a battle with no player input and no output
+
+    When the player only basic-attacks (actions is None or always_attack),
+    damage per hit is constant, so the winner, turn count and final health
+    follow directly from the two damage values. The enemy's AI policy is
+    then checked along that exchange with attacks_all_the_way (a few
+    decision-table lookups); if it would only ever attack, the result is
+    computed without stepping. Otherwise (frenzy, magic, defend or heal
+    on some turn, or other action sources, which may use abilities or
+    random rolls) the battle is simulated turn by turn.
+
+    Updates character and enemy health like a real battle would.
+
+    Returns: Battle result dictionary (same keys as SimpleBattle.start_battle)
+    Raises: CharacterDeadError if character is already dead
+    """
+    if character["health"] <= 0:
+        raise CharacterDeadError("Character is dead before battle starts.")
+
+    player_damage = SimpleBattle.calculate_damage(character, enemy)
+    enemy_damage = SimpleBattle.calculate_damage(enemy, character)
+
+    # Hits each side needs to land (the player always swings at least once)
+    player_hits = max(1, -(-enemy["health"] // player_damage))
+    enemy_hits = -(-character["health"] // enemy_damage)
+    enemy_turns = player_hits - 1 if player_hits <= enemy_hits else enemy_hits
+
+    if (actions is not None and actions is not always_attack) or not (
+            is_attack_only_policy(enemy)
+            or attacks_all_the_way(enemy, character, enemy_turns, player_damage, enemy_damage)):
+        battle = SimpleBattle(character, enemy, log=NullSink(), seed=seed,
+                              actions=actions or always_attack)
+        return battle.start_battle()
+
+    if player_hits <= enemy_hits:
+        # The enemy only gets to swing between the player's hits
+        character["health"] -= (player_hits - 1) * enemy_damage
+        enemy["health"] = 0
+        rewards = get_victory_rewards(enemy)
+        return {
+            "winner": "player",
+            "xp_gained": rewards["xp"],
+            "gold_gained": rewards["gold"],
+            "turns": player_hits
+        }
+
+    enemy["health"] -= enemy_hits * player_damage
+    character["health"] = 0
+    return {
+        "winner": "enemy",
+        "xp_gained": 0,
+        "gold_gained": 0,
+        "turns": enemy_hits
+    }
+
+# ============================================================================
+# BATTLE REPLAY
+# ============================================================================
+
+# Fields copied into a replay record; everything else is irrelevant to combat
+CHARACTER_BATTLE_FIELDS = ("name", "class", "level", "health", "max_health",
+                           "strength", "magic")
+
+def battle_snapshot(combatant):
+    """
+    Copy the combat-relevant stats of a character or enemy
+
+    Characters keep only CHARACTER_BATTLE_FIELDS; enemies are small flat
+    dictionaries and are copied whole.
+
+    Returns: New dictionary
+    """
+    if "class" in combatant:
+        return {key: combatant[key] for key in CHARACTER_BATTLE_FIELDS if key in combatant}
+    return dict(combatant)
+
+def scripted_actions(choices):
+    """
+    Build an action source that plays back a fixed sequence of choices
+
+    Args:
+        choices: Iterable of '1'/'2'/'3' strings (a string like '1121' works)
+
+    Returns: Callable usable as SimpleBattle(actions=...)
+    """
+    remaining = iter(choices)
+
+    def next_action(battle):
+        for choice in remaining:
+            return choice
+        raise CombatError("Recorded actions ran out before the battle ended.")
+
+    return next_action
+
+def replay_battle(record):
+    """
+    Re-run a recorded battle deterministically without any I/O
+
+    Args:
+        record: Dictionary produced in SimpleBattle.record after start_battle
+
+    Returns: Battle result dictionary, plus 'final_health' as
+             [character_health, enemy_health]
+    Raises: CombatError if the record's actions run out mid-battle
+    """
+    battle = SimpleBattle(
+        dict(record["character"]),
+        dict(record["enemy"]),
+        log=NullSink(),
+        seed=record["seed"],
+        actions=scripted_actions(record["actions"])
+    )
+    result = battle.start_battle()
+    result["final_health"] = [battle.character["health"], battle.enemy["health"]]
+    return result
 
 # ============================================================================
 # COMBAT UTILITIES
@@ -377,27 +1045,11 @@ def get_victory_rewards(enemy):
     Calculate rewards for defeating enemy
     
     Returns: Dictionary with 'xp' and 'gold'
-    """
-    # TODO: Implement reward calculation
-
-def display_combat_stats(character, enemy):
-    print(f"\n{character['name']}: HP={character['health']}/{character['max_health']}")
-    print(f"{enemy['name']}: HP={enemy['health']}/{enemy['max_health']}")
-    """
-    Display current combat status
     
-    Shows both character and enemy health/stats
-    """
-    # TODO: Implement status display
-    print(f"\n{character['name']}: HP={character['health']}/{character['max_health']}")
-    print(f"{enemy['name']}: HP={enemy['health']}/{enemy['max_health']}")
-
-def display_battle_log(message):
-    """
-    Display a formatted battle message
+    Item drops are rolled separately with roll_loot, so the battle result
+    stays the same however the fight was resolved.
     """
-    # TODO: Implement battle log display
-    print(f">>> {message}")
+    # TODO: Implement reward calculation
 
 # ============================================================================
 # TESTING
@@ -16,6 +16,9 @@ from custom_exceptions import (
     CorruptedDataError
 )
 
+# Values allowed in an item's SLOT field ("ring" fits either ring slot)
+VALID_ITEM_SLOTS = ["weapon", "off_hand", "head", "chest", "hands", "ring"]
+
 # ============================================================================
 # DATA LOADING FUNCTIONS
 # ============================================================================
@@ -43,6 +46,11 @@ def load_quests(filename="data/quests.txt"):
         validate_quest_data(quest)
         quests[quest["quest_id"]] = quest
 
+    cycles = find_prerequisite_cycles(quests)
+    if cycles:
+        described = "; ".join(" -> ".join(cycle + [cycle[0]]) for cycle in cycles)
+        raise InvalidDataFormatError(f"Quest prerequisites loop: {described}")
+
     return quests
     """
     Load quest data from file
@@ -58,6 +66,7 @@ def load_quests(filename="data/quests.txt"):
     
     Returns: Dictionary of quests {quest_id: quest_data_dict}
     Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+            (InvalidDataFormatError also lists any prerequisite cycles)
     """
     # TODO: Implement this function
     # Must handle:
@@ -105,6 +114,43 @@ def load_items(filename="data/items.txt"):
     # TODO: Implement this function
     # Must handle same exceptions as load_quests
 
+def load_item_sets(filename="data/item_sets.txt"):
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Missing file: {filename}")
+
+    try:
+        with open(filename, "r") as f:
+            content = f.read().strip()
+    except Exception:
+        raise CorruptedDataError("Error reading item sets file")
+
+    item_sets = {}
+    if not content:
+        return item_sets
+
+    for block in content.split("\n\n"):
+        lines = [line.strip() for line in block.split("\n") if line.strip()]
+        item_set = parse_item_set_block(lines)
+        validate_item_set_data(item_set)
+        item_sets[item_set["set_id"]] = item_set
+
+    return item_sets
+    """
+    Load item set data from file
+
+    Expected format per set (separated by blank lines):
+    SET_ID: unique_set_name
+    NAME: Set Display Name
+    BONUS_2: stat_name:value (bonus with 2 pieces equipped)
+    BONUS_3: stat_name:value,stat_name:value
+
+    Items join a set with a SET: set_id line in items.txt. An empty file
+    means there are no sets.
+
+    Returns: Dictionary of sets {set_id: {'set_id', 'name', 'bonuses': {pieces: effect}}}
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+
 def validate_quest_data(quest_dict):
     required = [
         "quest_id", "title", "description",
@@ -152,11 +198,23 @@ def validate_item_data(item_dict):
     except ValueError:
         raise InvalidDataFormatError("Item cost must be an integer")
 
+    if "slot" in item_dict and item_dict["slot"] not in VALID_ITEM_SLOTS:
+        raise InvalidDataFormatError(f"Invalid item slot: {item_dict['slot']}")
+
+    if "max_stack" in item_dict:
+        try:
+            max_stack = int(item_dict["max_stack"])
+        except ValueError:
+            raise InvalidDataFormatError("Item max_stack must be an integer")
+        if max_stack < 1:
+            raise InvalidDataFormatError("Item max_stack must be at least 1")
+
     return True
     """
     Validate that item dictionary has all required fields
     
     Required fields: item_id, name, type, effect, cost, description
+    Optional fields: max_stack (positive integer), slot, set
     Valid types: weapon, armor, consumable
     
     Returns: True if valid
@@ -164,6 +222,63 @@ def validate_item_data(item_dict):
     """
     # TODO: Implement validation
 
+def validate_item_set_data(set_dict):
+    for key in ["set_id", "name"]:
+        if key not in set_dict:
+            raise InvalidDataFormatError(f"Missing item set field: {key}")
+
+    if not set_dict["bonuses"]:
+        raise InvalidDataFormatError(f"Item set {set_dict['set_id']} has no bonuses")
+
+    for pieces, effect in set_dict["bonuses"].items():
+        if pieces < 1:
+            raise InvalidDataFormatError("Set bonus piece counts must be at least 1")
+        for modifier in effect.split(","):
+            stat, _, value = modifier.strip().partition(":")
+            if not stat or not value.lstrip("-").isdigit():
+                raise InvalidDataFormatError(f"Invalid set bonus: {effect}")
+
+    return True
+    """
+    Validate that an item set has a name and well-formed bonuses
+
+    Returns: True if valid
+    Raises: InvalidDataFormatError if fields are missing or bonuses are malformed
+    """
+
+def find_prerequisite_cycles(quests):
+    # 0 = not seen, 1 = on the walk in progress, 2 = finished
+    state = dict.fromkeys(quests, 0)
+    cycles = []
+    for start in quests:
+        if state[start]:
+            continue
+        path = []
+        position = {}
+        current = start
+        while current in state and state[current] == 0:
+            state[current] = 1
+            position[current] = len(path)
+            path.append(current)
+            prereq = quests[current]["prerequisite"]
+            current = None if prereq == "NONE" else prereq
+        if state.get(current) == 1:
+            cycles.append(path[position[current]:])
+        for qid in path:
+            state[qid] = 2
+    return cycles
+    """
+    Find every loop in the quest prerequisite links
+
+    Each quest has at most one prerequisite, so every quest is walked
+    once: a walk stops at a quest that was already checked, and running
+    into the walk's own path is a cycle. Linear in the number of quests.
+    Prerequisites that don't exist end a walk without error.
+
+    Returns: List of cycles, each a list of quest IDs in prerequisite order
+             (empty if there are none)
+    """
+
 def create_default_data_files():
     os.makedirs("data", exist_ok=True)
 
@@ -203,6 +318,7 @@ def create_default_data_files():
                 "TYPE: consumable\n"
                 "EFFECT: health:20\n"
                 "COST: 25\n"
+                "MAX_STACK: 99\n"
                 "DESCRIPTION: Restores 20 HP.\n\n"
 
                 "ITEM_ID: iron_sword\n"
@@ -210,6 +326,7 @@ def create_default_data_files():
                 "TYPE: weapon\n"
                 "EFFECT: strength:5\n"
                 "COST: 100\n"
+                "SET: wanderer\n"
                 "DESCRIPTION: A sturdy iron blade.\n\n"
 
                 "ITEM_ID: leather_armor\n"
@@ -217,8 +334,17 @@ def create_default_data_files():
                 "TYPE: armor\n"
                 "EFFECT: max_health:10\n"
                 "COST: 80\n"
+                "SET: wanderer\n"
                 "DESCRIPTION: Light protective armor.\n"
             )
+
+    if not os.path.exists("data/item_sets.txt"):
+        with open("data/item_sets.txt", "w") as f:
+            f.write(
+                "SET_ID: wanderer\n"
+                "NAME: Wanderer's Kit\n"
+                "BONUS_2: strength:2\n"
+            )
     """
     Create default data files if they don't exist
     This helps with initial setup and testing
@@ -276,12 +402,17 @@ def parse_item_block(lines):
         key, value = line.split(": ", 1)
         key = key.lower().strip()
         value = value.strip()
-
-        if key == "cost":
-            value = int(value)
-
         item[key] = value
 
+    for key in ("cost", "max_stack"):
+        if key in item:
+            try:
+                item[key] = int(item[key])
+            except ValueError:
+                raise InvalidDataFormatError(
+                    f"Item {item.get('item_id', '(no ITEM_ID)')}: "
+                    f"{key} must be an integer, got {item[key]!r}")
+
     return item
     """
     Parse a block of lines into an item dictionary
@@ -294,6 +425,33 @@ def parse_item_block(lines):
     """
     # TODO: Implement parsing logic
 
+def parse_item_set_block(lines):
+    item_set = {"bonuses": {}}
+
+    for line in lines:
+        if ": " not in line:
+            raise InvalidDataFormatError(f"Invalid item set line: {line}")
+
+        key, value = line.split(": ", 1)
+        key = key.lower().strip()
+        value = value.strip()
+
+        if key.startswith("bonus_"):
+            pieces = key[len("bonus_"):]
+            if not pieces.isdigit():
+                raise InvalidDataFormatError(f"Invalid item set line: {line}")
+            item_set["bonuses"][int(pieces)] = value
+        else:
+            item_set[key] = value
+
+    return item_set
+    """
+    Parse a block of lines into an item set dictionary
+
+    Returns: Dictionary with set_id, name and bonuses {pieces: effect}
+    Raises: InvalidDataFormatError if parsing fails
+    """
+
 # ============================================================================
 # TESTING
 # ============================================================================
@@ -0,0 +1,312 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Group Battle Module
+
+Parties of characters against packs of enemies.
+
+Turn order comes from an initiative queue: every combatant acts again
+INITIATIVE_SCALE // speed time units after its last action, so faster
+combatants act more often. The queue is a heap, so picking the next actor
+costs O(log n) no matter how many combatants are in the fight. Each side's
+living combatants are also kept in heaps by health and by strength, so the
+weakest and strongest targets are found in O(log n) too.
+"""
+
+import heapq
+import random
+
+from battle_log import BattleEvent, NullSink
+from combat_system import SimpleBattle, AbilityState, use_special_ability, get_victory_rewards, roll_loot
+from custom_exceptions import CharacterDeadError, InvalidTargetError
+
+# Time units between actions for a combatant with speed 1
+INITIATIVE_SCALE = 1000
+
+# Speed used when a combatant doesn't define one
+DEFAULT_SPEED = 10
+CLASS_SPEED = {
+    "Warrior": 10,
+    "Mage": 9,
+    "Rogue": 14,
+    "Cleric": 9
+}
+
+# One ability round passes every time a default-speed combatant could act
+ROUND_TIME = INITIATIVE_SCALE // DEFAULT_SPEED
+
+# ============================================================================
+# SIDES
+# ============================================================================
+
+class Side:
+    """
+    The living combatants of one side, indexed for targeting
+
+    Indexing, len() and iteration work like the plain list of living
+    combatants (in no particular order); a death is removed with a swap.
+    by_health and by_strength are lazy heaps: update() pushes a fresh
+    entry whenever a combatant's health or strength may have changed, and
+    entries that no longer match, or whose combatant has fallen, are
+    dropped when they reach the top. weakest() and strongest() are
+    O(log n) amortized.
+    """
+
+    def __init__(self):
+        self.members = []
+        self.slot = {}
+        self.rank = {}
+        self.by_health = []
+        self.by_strength = []
+        self.pushes = 0
+
+    def __len__(self):
+        return len(self.members)
+
+    def __getitem__(self, index):
+        return self.members[index]
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def add(self, combatant):
+        key = id(combatant)
+        self.slot[key] = len(self.members)
+        # Ties go to whoever joined the side first
+        self.rank[key] = len(self.rank)
+        self.members.append(combatant)
+        self.update(combatant)
+
+    def remove(self, combatant):
+        """Drop a dead combatant in O(1); its heap entries go stale"""
+        members = self.members
+        index = self.slot.pop(id(combatant))
+        last = members.pop()
+        if last is not combatant:
+            members[index] = last
+            self.slot[id(last)] = index
+        self._check_size()
+
+    def update(self, combatant):
+        """Re-index a living combatant whose health or strength may have changed"""
+        key = id(combatant)
+        if key not in self.slot:
+            return
+        self.pushes += 1
+        rank = self.rank[key]
+        heapq.heappush(self.by_health, (combatant["health"], rank, self.pushes, combatant))
+        heapq.heappush(self.by_strength, (-combatant["strength"], rank, self.pushes, combatant))
+        self._check_size()
+
+    def weakest(self):
+        """Returns: The living combatant with the least health"""
+        return self._top(self.by_health, lambda c: c["health"])
+
+    def strongest(self):
+        """Returns: The living combatant with the highest strength"""
+        return self._top(self.by_strength, lambda c: -c["strength"])
+
+    def _top(self, heap, key):
+        while True:
+            value, _, _, combatant = heap[0]
+            if id(combatant) in self.slot and key(combatant) == value:
+                return combatant
+            heapq.heappop(heap)
+
+    def _check_size(self):
+        # Stale entries pile up as health changes and combatants fall;
+        # rebuilding once they outnumber the living keeps the heaps O(n)
+        if len(self.by_health) > 4 * len(self.members) + 16:
+            self.by_health.clear()
+            self.by_strength.clear()
+            for combatant in self.members:
+                self.update(combatant)
+
+# ============================================================================
+# TARGETING STRATEGIES
+# ============================================================================
+# Each strategy gets the opposing Side and the battle's rng and returns the
+# one to attack.
+
+def target_first(targets, rng):
+    """Always attack the first living opponent"""
+    return targets[0]
+
+def target_random(targets, rng):
+    """Attack a random living opponent"""
+    return targets[int(rng.random() * len(targets))]
+
+def target_weakest(targets, rng):
+    """Attack the opponent with the least health left"""
+    return targets.weakest()
+
+def target_strongest(targets, rng):
+    """Attack the opponent with the highest strength"""
+    return targets.strongest()
+
+TARGETING_STRATEGIES = {
+    "first": target_first,
+    "random": target_random,
+    "weakest": target_weakest,
+    "strongest": target_strongest
+}
+
+def get_speed(combatant):
+    """
+    Get a combatant's speed
+
+    Returns: combatant['speed'] if set, otherwise a class or default speed
+    """
+    speed = combatant.get("speed")
+    if speed is None:
+        speed = CLASS_SPEED.get(combatant.get("class"), DEFAULT_SPEED)
+    return max(1, speed)
+
+# ============================================================================
+# GROUP BATTLE
+# ============================================================================
+
+class GroupBattle:
+    """
+    Party vs. enemy pack combat driven by an initiative queue
+
+    Party members use their class ability whenever it is off cooldown and
+    basic-attack otherwise; enemies always basic-attack. Damage uses the
+    same calculate_damage and apply_damage as SimpleBattle.
+    """
+
+    def __init__(self, party, enemies, party_targeting="first",
+                 enemy_targeting="random", log=None, seed=None):
+        if not party or not enemies:
+            raise InvalidTargetError("Both sides need at least one combatant.")
+        for strategy in (party_targeting, enemy_targeting):
+            if strategy not in TARGETING_STRATEGIES:
+                raise InvalidTargetError(f"Unknown targeting strategy: {strategy}")
+
+        self.party = party
+        self.enemies = enemies
+        self.targeting = {
+            "party": TARGETING_STRATEGIES[party_targeting],
+            "enemies": TARGETING_STRATEGIES[enemy_targeting]
+        }
+        # Group battles are usually simulated, so nothing is shown by default
+        self.log = NullSink() if log is None else log
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.abilities = AbilityState()
+        self.combat_active = True
+        self.actions_taken = 0
+        self.next_round = ROUND_TIME
+
+        # Living combatants per side
+        self.alive = {"party": Side(), "enemies": Side()}
+        self.queue = []
+        for side, members in (("party", party), ("enemies", enemies)):
+            for combatant in members:
+                if combatant["health"] > 0:
+                    self.alive[side].add(combatant)
+                    delay = INITIATIVE_SCALE // get_speed(combatant)
+                    # len(queue) breaks ties in a fixed order
+                    self.queue.append((delay, len(self.queue), side, combatant))
+        heapq.heapify(self.queue)
+
+        if not self.alive["party"]:
+            raise CharacterDeadError("Every party member is dead before battle starts.")
+
+    def start_battle(self):
+        """
+        Run the battle until one side is wiped out
+
+        Returns: Dictionary with battle results:
+                {'winner': 'party'|'enemies', 'actions': int,
+                 'survivors': [names], 'xp_gained': int, 'gold_gained': int,
+                 'loot': {item_id: quantity}}
+        """
+        try:
+            while self.alive["party"] and self.alive["enemies"]:
+                self.step()
+        finally:
+            self.combat_active = False
+            # Buffs and debuffs never outlive the battle, even one that fails
+            self.abilities.clear()
+
+        winner = "party" if self.alive["party"] else "enemies"
+        result = {
+            "winner": winner,
+            "actions": self.actions_taken,
+            "survivors": [c["name"] for c in self.alive[winner]],
+            "xp_gained": 0,
+            "gold_gained": 0,
+            "loot": {}
+        }
+        if winner == "party":
+            loot = result["loot"]
+            for enemy in self.enemies:
+                rewards = get_victory_rewards(enemy)
+                result["xp_gained"] += rewards["xp"]
+                result["gold_gained"] += rewards["gold"]
+                drop = roll_loot(enemy.get("type"), self.rng)
+                if drop is not None:
+                    item_id, quantity = drop
+                    loot[item_id] = loot.get(item_id, 0) + quantity
+        self.log.flush()
+        return result
+
+    def step(self):
+        """
+        Let the next combatant in the initiative queue act
+
+        Returns: True if someone acted, False if the popped entry was stale
+        """
+        time, order, side, combatant = heapq.heappop(self.queue)
+        if combatant["health"] <= 0:
+            # Fell since it was scheduled; dropping it here keeps deaths O(1)
+            return False
+
+        while time >= self.next_round:
+            self.tick_round()
+            self.next_round += ROUND_TIME
+
+        self.take_action(side, combatant)
+        self.actions_taken += 1
+        heapq.heappush(self.queue, (time + INITIATIVE_SCALE // get_speed(combatant),
+                                    order, side, combatant))
+        return True
+
+    def take_action(self, side, combatant):
+        """Let one combatant act against a target picked by its side's strategy"""
+        opposing = "enemies" if side == "party" else "party"
+        target = self.targeting[side](self.alive[opposing], self.rng)
+        health_before = target["health"]
+
+        message = None
+        if side == "party" and "class" in combatant and self.abilities.is_ready(combatant):
+            message = use_special_ability(combatant, target, self.rng, self.abilities)
+
+        if message is None:
+            damage = SimpleBattle.calculate_damage(combatant, target)
+            SimpleBattle.apply_damage(target, damage)
+            action = "attack"
+        else:
+            damage = max(0, health_before - target["health"])
+            action = "ability"
+
+        if self.log.enabled:
+            self.log.emit(BattleEvent(self.actions_taken + 1, combatant.get("name"), action,
+                                      target.get("name"), damage, combatant["health"],
+                                      target["health"], message, combatant.get("max_health"),
+                                      target.get("max_health")))
+
+        # Abilities can heal or buff the actor and weaken the target
+        self.alive[side].update(combatant)
+        if target["health"] <= 0:
+            self.alive[opposing].remove(target)
+        else:
+            self.alive[opposing].update(target)
+
+    def tick_round(self):
+        """Advance the ability round, re-indexing anyone whose effects ran out"""
+        affected = [effect[0] for effect in self.abilities.effects]
+        self.abilities.tick()
+        for combatant in affected:
+            for side in self.alive.values():
+                side.update(combatant)
@@ -9,34 +9,455 @@ AI Usage: [Document any AI assistance used]
 This module handles inventory management, item usage, and equipment.
 """
 
+from bisect import bisect_right
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
 from custom_exceptions import (
     InventoryFullError,
     ItemNotFoundError,
     InsufficientResourcesError,
     InvalidItemTypeError
 )
+from shop_pricing import get_engine
 
-# Maximum inventory size
+# Maximum inventory size (in slots; a stack of items fills one slot)
 MAX_INVENTORY_SIZE = 20
 
+# Stack size for item types whose data doesn't set MAX_STACK
+DEFAULT_MAX_STACK = {
+    "consumable": 20,
+    "weapon": 1,
+    "armor": 1
+}
+
+# Most slots each item type may fill, on top of MAX_INVENTORY_SIZE overall
+SLOT_CAPACITY = {
+    "consumable": 12,
+    "weapon": 10,
+    "armor": 10
+}
+
 # ============================================================================
-# INVENTORY MANAGEMENT
+# INVENTORY STORAGE
 # ============================================================================
 
-def add_item_to_inventory(character, item_id):
-    inventory = character.get("inventory", [])
+def stack_slots(quantity, max_stack):
+    """Returns: Number of slots `quantity` items fill with stacks of max_stack"""
+    return -(-quantity // max_stack)
+
+class Inventory:
+    """
+    Item storage that keeps an item_id -> quantity map in insertion order
+
+    Behaves like the plain list it replaces (len, in, iteration, count,
+    append, remove) but membership, counting, adding and removing are all
+    O(1). Iterating yields each item_id once per copy held, so list(inv)
+    is the same list form that save files use.
 
-    if len(inventory) >= MAX_INVENTORY_SIZE:
+    Each item also remembers its stack size and slot type, so the number
+    of slots in use (overall and per type) is kept up to date as items
+    come and go. Items added without stack information take one slot each.
+
+    When an InventoryJournal is attached, every add and discard is recorded.
+    version goes up on every add and discard, whoever makes it.
+    """
+
+    def __init__(self, items=()):
+        self.journal = None
+        self.version = 0
+        self.counts = {}
+        self.size = 0
+        self.stack = {}
+        self.kind = {}
+        self.slots_used = 0
+        self.type_slots = {}
+        for item_id in items:
+            self.add(item_id)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, item_id):
+        return item_id in self.counts
+
+    def __iter__(self):
+        for item_id, quantity in self.counts.items():
+            for _ in range(quantity):
+                yield item_id
+
+    def __eq__(self, other):
+        if isinstance(other, Inventory):
+            return self.counts == other.counts
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Inventory({list(self)!r})"
+
+    def count(self, item_id):
+        return self.counts.get(item_id, 0)
+
+    def slots_needed(self, item_id, quantity, max_stack=1):
+        """Returns: Extra slots that adding `quantity` of an item would fill"""
+        held = self.counts.get(item_id, 0)
+        max_stack = self.stack.get(item_id, max_stack)
+        return stack_slots(held + quantity, max_stack) - stack_slots(held, max_stack)
+
+    def _change_slots(self, item_id, delta):
+        if delta:
+            self.slots_used += delta
+            slot_type = self.kind.get(item_id)
+            if slot_type is not None:
+                self.type_slots[slot_type] = self.type_slots.get(slot_type, 0) + delta
+
+    def add(self, item_id, quantity=1, max_stack=1, slot_type=None):
+        """Add `quantity` copies of an item as one update (no capacity checks)"""
+        if item_id not in self.counts:
+            self.stack[item_id] = max_stack
+            self.kind[item_id] = slot_type
+        self._change_slots(item_id, self.slots_needed(item_id, quantity))
+        self.counts[item_id] = self.counts.get(item_id, 0) + quantity
+        self.size += quantity
+        self.version += 1
+        if self.journal is not None:
+            self.journal.record("item", item_id, quantity)
+
+    def append(self, item_id):
+        self.add(item_id)
+
+    def discard(self, item_id, quantity=1):
+        """
+        Remove up to `quantity` copies of an item
+
+        Returns: Number of copies actually removed
+        """
+        held = self.counts.get(item_id, 0)
+        removed = min(held, quantity)
+        if not removed:
+            return 0
+        max_stack = self.stack[item_id]
+        if self.journal is not None:
+            self.journal.record("item", item_id, -removed, max_stack, self.kind[item_id])
+        self._change_slots(item_id, stack_slots(held - removed, max_stack)
+                           - stack_slots(held, max_stack))
+        if removed == held:
+            del self.counts[item_id]
+            del self.stack[item_id]
+            del self.kind[item_id]
+        else:
+            self.counts[item_id] = held - removed
+        self.size -= removed
+        self.version += 1
+        return removed
+
+    def remove(self, item_id):
+        """Remove one copy of an item (ValueError if missing, like list.remove)"""
+        if item_id not in self.counts:
+            raise ValueError(f"{item_id} not in inventory")
+        self.discard(item_id)
+
+    def to_list(self):
+        """Returns: Plain list of item ids, the form save files use"""
+        return list(self)
+
+def lookup_item(character, item_id, item_data=None):
+    """
+    Find the data for an item
+
+    Returns: item_data if given, else the entry from character['item_data'], else None
+    """
+    if item_data is not None:
+        return item_data
+    catalog = character.get("item_data")
+    if isinstance(catalog, dict):
+        return catalog.get(item_id)
+    return None
+
+def get_stack_rules(item_data):
+    """
+    Get how an item stacks
+
+    Returns: Tuple of (max_stack, slot_type); unknown items are (1, None)
+    """
+    if not item_data:
+        return 1, None
+    slot_type = item_data.get("type")
+    max_stack = item_data.get("max_stack", DEFAULT_MAX_STACK.get(slot_type, 1))
+    return max(1, int(max_stack)), slot_type
+
+def get_inventory(character):
+    """
+    Get a character's Inventory, upgrading a plain list in place
+
+    Characters created or loaded with a list inventory are converted the
+    first time they are used here (one O(n) pass), after which every
+    operation on them is O(1). Stack rules come from character['item_data']
+    when it is available.
+
+    Returns: Inventory object stored in character['inventory']
+    """
+    inventory = character.get("inventory")
+    if not isinstance(inventory, Inventory):
+        items = inventory or []
+        inventory = Inventory()
+        for item_id in items:
+            max_stack, slot_type = get_stack_rules(lookup_item(character, item_id))
+            inventory.add(item_id, 1, max_stack, slot_type)
+        inventory.journal = character.get("journal")
+        character["inventory"] = inventory
+    return inventory
+
+def plan_inventory_additions(character, additions):
+    """
+    Make sure a group of additions fits, counting stacks and slot types
+
+    Any dictionary with an 'inventory' works as the holder. A holder can
+    set its own 'capacity' (total slots) and 'slot_capacity' (per-type
+    limits); characters use MAX_INVENTORY_SIZE and SLOT_CAPACITY.
+
+    Args:
+        character: Character (or stash) dictionary
+        additions: List of (item_id, quantity, item_data) with each item_id
+                   listed once; item_data may be None to use character['item_data']
+
+    Returns: List of (item_id, quantity, max_stack, slot_type) ready for Inventory.add
+    Raises: InventoryFullError if the items don't all fit together
+    """
+    inventory = get_inventory(character)
+    plan = []
+    total_needed = 0
+    type_needed = {}
+    for item_id, quantity, item_data in additions:
+        max_stack, slot_type = get_stack_rules(lookup_item(character, item_id, item_data))
+        slot_type = inventory.kind.get(item_id, slot_type)
+        needed = inventory.slots_needed(item_id, quantity, max_stack)
+        total_needed += needed
+        type_needed[slot_type] = type_needed.get(slot_type, 0) + needed
+        plan.append((item_id, quantity, max_stack, slot_type))
+
+    if inventory.slots_used + total_needed > character.get("capacity", MAX_INVENTORY_SIZE):
         raise InventoryFullError("Inventory is full.")
+    slot_capacity = character.get("slot_capacity", SLOT_CAPACITY)
+    for slot_type, needed in type_needed.items():
+        limit = slot_capacity.get(slot_type)
+        if limit is not None and inventory.type_slots.get(slot_type, 0) + needed > limit:
+            raise InventoryFullError(f"No room for more {slot_type} items.")
+    return plan
+
+def check_inventory_space(character, item_id, quantity=1, item_data=None):
+    """
+    Make sure `quantity` of an item fits, counting stacks and slot types
+
+    Returns: Tuple of (max_stack, slot_type) to pass on to Inventory.add
+    Raises: InventoryFullError if the items don't fit
+    """
+    plan = plan_inventory_additions(character, [(item_id, quantity, item_data)])
+    return plan[0][2], plan[0][3]
+
+# ============================================================================
+# INVENTORY JOURNAL
+# ============================================================================
+# Records are small tuples of ids and deltas:
+#   ("item", item_id, quantity_delta[, max_stack, slot_type])
+#   ("gold", delta)
+#   ("stat", stat_name, delta)
+#   ("equip", slot, previous_item_id)
+#   ("trade", engine_id, engine_tick, item_id, bought, sold)
+
+# Completed operations kept for undo
+UNDO_LIMIT = 20
+
+# Character fields journal records change. With the inventory version and
+# the equipment slots they make up the state stamp of each undo entry.
+STAMPED_FIELDS = ("gold", "health", "max_health", "strength", "magic")
+
+class InventoryJournal:
+    """
+    Transaction log for one character's items, gold, stats and equipment
+
+    Creating a journal attaches it to the character (character['journal']
+    and the Inventory). Changes made inside transaction() are recorded; if
+    the transaction raises, they are rolled back, otherwise they become one
+    entry on a bounded undo stack. Nested transactions join the outer one.
+
+    Each entry is stamped with the holder's state before and after it. A
+    battle, quest reward, level-up or transfer changes that state without
+    going through the journal, so undo() sees the stamp no longer matches
+    and refuses instead of replaying deltas that no longer add up.
+    """
 
-    inventory.append(item_id)
+    def __init__(self, character, undo_limit=UNDO_LIMIT):
+        self.character = character
+        self.records = []
+        self.undo_stack = deque(maxlen=undo_limit)
+        self.depth = 0
+        self.recording = False
+        self.start_stamp = None
+        character["journal"] = self
+        get_inventory(character).journal = self
+
+    def record(self, *entry):
+        if self.recording:
+            self.records.append(entry)
+
+    def state_stamp(self):
+        """
+        Returns: Tuple that changes whenever the holder's items, gold, stats
+                 or equipment change, journaled or not
+        """
+        character = self.character
+        return ((get_inventory(character).version,)
+                + tuple(character.get(field) for field in STAMPED_FIELDS)
+                + tuple(character.get(key) for key in EQUIPMENT_SLOTS.values()))
+
+    @contextmanager
+    def transaction(self, label):
+        """Group the changes made inside a with-block into one undoable entry"""
+        if self.depth == 0:
+            self.start_stamp = self.state_stamp()
+        self.depth += 1
+        self.recording = True
+        try:
+            yield self
+        except BaseException:
+            self.depth -= 1
+            if self.depth == 0:
+                self._revert(self.records)
+                self.records = []
+                self._carry_stamp(self.start_stamp)
+            raise
+        else:
+            self.depth -= 1
+            if self.depth == 0 and self.records:
+                if self.undo_stack and self.undo_stack[-1][3] != self.start_stamp:
+                    # The holder changed between the two operations
+                    self.clear_history()
+                self.undo_stack.append((label, tuple(self.records),
+                                        self.start_stamp, self.state_stamp()))
+                self.records = []
+        finally:
+            self.recording = self.depth > 0
+
+    def undo(self):
+        """
+        Reverse the most recent completed transaction
+
+        Returns: Its label, or None if there is nothing to undo or the
+                 holder has changed since it (which also clears the history)
+        """
+        if self.depth or not self.undo_stack:
+            return None
+        label, records, before, after = self.undo_stack.pop()
+        if after != self.state_stamp():
+            self.clear_history()
+            return None
+        self._revert(records)
+        self._carry_stamp(before)
+        return label
+
+    def clear_history(self):
+        """Forget every completed transaction, so undo() has nothing to reverse"""
+        self.undo_stack.clear()
+
+    def _carry_stamp(self, expected):
+        # Reverting adds and discards items, which moves the inventory version
+        # on even though the holder is back in the state the top entry ended in
+        if self.undo_stack and self.undo_stack[-1][3] == expected:
+            label, records, before, _ = self.undo_stack[-1]
+            self.undo_stack[-1] = (label, records, before, self.state_stamp())
+
+    def _revert(self, records):
+        recording = self.recording
+        self.recording = False
+        character = self.character
+        inventory = get_inventory(character)
+        try:
+            for entry in reversed(records):
+                kind = entry[0]
+                if kind == "item":
+                    if entry[2] > 0:
+                        inventory.discard(entry[1], entry[2])
+                    else:
+                        inventory.add(entry[1], -entry[2], entry[3], entry[4])
+                elif kind == "gold":
+                    character["gold"] -= entry[1]
+                elif kind == "stat":
+                    character[entry[1]] -= entry[2]
+                elif kind == "trade":
+                    # Only trades the engine hasn't folded into demand yet
+                    engine_id, tick, item_id, bought, sold = entry[1:]
+                    pricing = get_engine(engine_id)
+                    if pricing is not None and pricing.ticks == tick:
+                        pricing.record_purchase(item_id, -bought)
+                        pricing.record_sale(item_id, -sold)
+                elif kind == "equip":
+                    character[EQUIPMENT_SLOTS[entry[1]]] = entry[2]
+                    # Stats are restored by their own records, so they again
+                    # hold the restored slots' totals; the cache is rebuilt
+                    # from those slots the next time it's needed
+                    character.pop("equipment_modifiers", None)
+                    character.pop("stat_modifiers", None)
+                    character.pop("gear_bonus", None)
+        finally:
+            self.recording = recording
+
+def journal_transaction(character, label):
+    """Returns: The character's journal transaction, or a no-op context without a journal"""
+    journal = character.get("journal")
+    if journal is None:
+        return nullcontext()
+    return journal.transaction(label)
+
+def record_trade(character, pricing, item_id, bought=0, sold=0):
+    """
+    Tell a shop's pricing engine about a trade, in a way undo can reverse
+    """
+    if bought:
+        pricing.record_purchase(item_id, bought)
+    if sold:
+        pricing.record_sale(item_id, sold)
+    journal = character.get("journal")
+    if journal is not None:
+        journal.record("trade", pricing.engine_id, pricing.ticks, item_id, bought, sold)
+
+def journaled(action):
+    """
+    Run an inventory operation as one journal transaction
+
+    The label is the action plus the item id when the operation takes one.
+    """
+    def decorate(operation):
+        @wraps(operation)
+        def run(character, *args, **kwargs):
+            if character.get("journal") is None:
+                return operation(character, *args, **kwargs)
+            label = f"{action} {args[0]}" if args and isinstance(args[0], str) else action
+            with journal_transaction(character, label):
+                return operation(character, *args, **kwargs)
+        return run
+    return decorate
+
+# ============================================================================
+# INVENTORY MANAGEMENT
+# ============================================================================
+
+@journaled("add")
+def add_item_to_inventory(character, item_id, quantity=1, item_data=None):
+    max_stack, slot_type = check_inventory_space(character, item_id, quantity, item_data)
+    get_inventory(character).add(item_id, quantity, max_stack, slot_type)
     return True
     """
-    Add an item to character's inventory
+    Add an item (or a whole stack of it) to character's inventory
     
     Args:
         character: Character dictionary
         item_id: Unique item identifier
+        quantity: How many to add, in one update
+        item_data: Item information (defaults to character['item_data'][item_id]);
+                   decides how the item stacks
     
     Returns: True if added successfully
     Raises: InventoryFullError if inventory is at max capacity
@@ -45,30 +466,60 @@ def add_item_to_inventory(character, item_id):
     # Check if inventory is full (>= MAX_INVENTORY_SIZE)
     # Add item_id to character['inventory'] list
 
-def remove_item_from_inventory(character, item_id):
-    inventory = character.get("inventory", [])
+@journaled("loot")
+def grant_loot(character, loot, item_data=None):
+    if isinstance(loot, dict):
+        loot = loot.items()
+    granted = []
+    left_behind = []
+    inventory = get_inventory(character)
+    for item_id, quantity in loot:
+        data = item_data.get(item_id) if item_data else None
+        try:
+            max_stack, slot_type = check_inventory_space(character, item_id, quantity, data)
+        except InventoryFullError:
+            left_behind.append((item_id, quantity))
+            continue
+        inventory.add(item_id, quantity, max_stack, slot_type)
+        granted.append((item_id, quantity))
+    return granted, left_behind
+    """
+    Add dropped items to a character, skipping whatever doesn't fit
+
+    Args:
+        character: Character dictionary
+        loot: List of (item_id, quantity), or a dictionary of item_id -> quantity
+        item_data: Optional dictionary of all items (defaults to character['item_data'])
+
+    Returns: Tuple of (granted, left_behind), each a list of (item_id, quantity)
+    """
+
+@journaled("remove")
+def remove_item_from_inventory(character, item_id, quantity=1):
+    inventory = get_inventory(character)
 
-    if item_id not in inventory:
+    if inventory.count(item_id) < quantity or quantity < 1:
         raise ItemNotFoundError(f"Item '{item_id}' not in inventory.")
 
-    inventory.remove(item_id)
+    inventory.discard(item_id, quantity)
     return True
     """
-    Remove an item from character's inventory
+    Remove an item (or several copies of it) from character's inventory
     
     Args:
         character: Character dictionary
         item_id: Item to remove
+        quantity: How many to remove
     
     Returns: True if removed successfully
-    Raises: ItemNotFoundError if item not in inventory
+    Raises: ItemNotFoundError if fewer than quantity are in inventory
     """
     # TODO: Implement item removal
     # Check if item exists in inventory
     # Remove item from list
 
 def has_item(character, item_id):
-    return item_id in character.get("inventory", [])
+    return item_id in get_inventory(character)
     """
     Check if character has a specific item
     
@@ -77,27 +528,29 @@ def has_item(character, item_id):
     # TODO: Implement item check
 
 def count_item(character, item_id):
-    return character.get("inventory", []).count(item_id)
+    return get_inventory(character).count(item_id)
     """
     Count how many of a specific item the character has
     
     Returns: Integer count of item
     """
     # TODO: Implement item counting
-    # Use list.count() method
 
 def get_inventory_space_remaining(character):
-    return MAX_INVENTORY_SIZE - len(character.get("inventory", []))
+    return character.get("capacity", MAX_INVENTORY_SIZE) - get_inventory(character).slots_used
     """
-    Calculate how many more items can fit in inventory
+    Calculate how many more slots are free in inventory
     
     Returns: Integer representing available slots
     """
     # TODO: Implement space calculation
 
+@journaled("clear")
 def clear_inventory(character):
-    removed_items = character.get("inventory", []).copy()
-    character["inventory"] = []
+    inventory = get_inventory(character)
+    removed_items = inventory.to_list()
+    for item_id in list(inventory.counts):
+        inventory.discard(item_id, inventory.count(item_id))
     return removed_items
     """
     Remove all items from inventory
@@ -108,25 +561,131 @@ def clear_inventory(character):
     # Save current inventory before clearing
     # Clear character's inventory list
 
+# ============================================================================
+# ITEM EFFECTS
+# ============================================================================
+# Consumable effects are compiled once, at load time, into a tuple of
+# (run, args, needs_state) ops, so using an item only runs those ops.
+#
+# Effect strings are comma-separated parts, each either "stat:value"
+# (health heals, anything else adds to the stat) or "opcode:args...":
+#   heal:20               heal 20, never above max_health
+#   add:strength:3        add 3 to strength
+#   buff:strength:5:3     +5 strength for 3 battle rounds (needs an AbilityState)
+
+# opcode -> (parse, run, needs_state); see register_effect_opcode
+EFFECT_OPCODES = {}
+
+def register_effect_opcode(name, parse, run, needs_state=False):
+    """
+    Add an effect opcode usable in item EFFECT strings
+
+    Args:
+        name: Opcode keyword
+        parse: Called with the strings after the keyword; returns the args tuple
+        run: Called as run(character, args, state); applies the effect and
+             returns a short description such as "gained 20 health"
+        needs_state: True if run needs a battle AbilityState
+    """
+    EFFECT_OPCODES[name] = (parse, run, needs_state)
+
+def _record_stat(character, stat, delta):
+    journal = character.get("journal")
+    if journal is not None and delta:
+        journal.record("stat", stat, delta)
+
+def _run_heal(character, args, state):
+    amount = args[0]
+    # Same defaults as apply_stat_effect for partial character dicts
+    before = character.get("health", 0)
+    character["health"] = min(before + amount, character.get("max_health", 9999))
+    _record_stat(character, "health", character["health"] - before)
+    return f"gained {amount} health"
+
+def _run_add(character, args, state):
+    stat, amount = args
+    character[stat] = character.get(stat, 0) + amount
+    _record_stat(character, stat, amount)
+    return f"gained {amount} {stat}"
+
+def _run_buff(character, args, state):
+    stat, amount, rounds = args
+    state.add_effect(character, stat, amount, rounds)
+    return f"gained {amount} {stat} for {rounds} rounds"
+
+register_effect_opcode("heal", lambda args: (int(args[0]),), _run_heal)
+register_effect_opcode("add", lambda args: (args[0], int(args[1])), _run_add)
+register_effect_opcode("buff", lambda args: (args[0], int(args[1]), int(args[2])),
+                       _run_buff, needs_state=True)
+
+def compile_item_effect(effect_string):
+    """
+    Compile an effect string into ops
+
+    Returns: Tuple of (run, args, needs_state)
+    Raises: InvalidItemTypeError if the effect string is malformed
+    """
+    ops = []
+    for part in effect_string.split(","):
+        fields = [field.strip() for field in part.split(":")]
+        if fields[0] in EFFECT_OPCODES:
+            opcode, fields = fields[0], fields[1:]
+        elif len(fields) == 2:
+            # Plain "stat:value"
+            opcode = "heal" if fields[0] == "health" else "add"
+            if opcode == "heal":
+                fields = fields[1:]
+        else:
+            raise InvalidItemTypeError(f"Invalid effect format: {effect_string}")
+
+        parse, run, needs_state = EFFECT_OPCODES[opcode]
+        try:
+            ops.append((run, parse(fields), needs_state))
+        except (ValueError, IndexError):
+            raise InvalidItemTypeError(f"Invalid effect format: {effect_string}")
+    return tuple(ops)
+
+def compile_item_effects(item_data):
+    """
+    Compile every consumable's effect and store it as item['compiled_effect']
+
+    Returns: Number of items compiled
+    Raises: InvalidItemTypeError if an effect string is malformed
+    """
+    compiled = 0
+    for item in item_data.values():
+        if item.get("type") == "consumable":
+            item["compiled_effect"] = compile_item_effect(item["effect"])
+            compiled += 1
+    return compiled
+
 # ============================================================================
 # ITEM USAGE
 # ============================================================================
 
-def use_item(character, item_id, item_data):
+@journaled("use")
+def use_item(character, item_id, item_data, state=None):
     if not has_item(character, item_id):
         raise ItemNotFoundError(f"{item_id} not found in inventory.")
 
     if item_data["type"] != "consumable":
         raise InvalidItemTypeError(f"{item_id} is not a consumable.")
 
-    stat, value = parse_item_effect(item_data["effect"])
+    effect = item_data.get("compiled_effect")
+    if effect is None:
+        effect = item_data["compiled_effect"] = compile_item_effect(item_data["effect"])
+
+    if state is None:
+        for run, args, needs_state in effect:
+            if needs_state:
+                raise InvalidItemTypeError(f"{item_id} can only be used in battle.")
 
-    apply_stat_effect(character, stat, value)
+    results = [run(character, args, state) for run, args, needs_state in effect]
 
     remove_item_from_inventory(character, item_id)
 
     item_name = item_data.get("name", item_id)
-    return f"Used {item_name} and gained {value} {stat}."
+    return f"Used {item_name} and {' and '.join(results)}."
     """
     Use a consumable item from inventory
     
@@ -134,15 +693,17 @@ def use_item(character, item_id, item_data):
         character: Character dictionary
         item_id: Item to use
         item_data: Item information dictionary from game_data
+        state: The battle's combat_system.AbilityState, needed by timed buffs
     
     Item types and effects:
-    - consumable: Apply effect and remove from inventory
+    - consumable: Run its compiled effect and remove from inventory
     - weapon/armor: Cannot be "used", only equipped
     
     Returns: String describing what happened
     Raises: 
         ItemNotFoundError if item not in inventory
-        InvalidItemTypeError if item type is not 'consumable'
+        InvalidItemTypeError if item type is not 'consumable', or it has a
+            timed buff and no battle state was given
     """
     # TODO: Implement item usage
     # Check if character has the item
@@ -151,27 +712,50 @@ def use_item(character, item_id, item_data):
     # Apply effect to character
     # Remove item from inventory
 
-def equip_weapon(character, item_id, item_data):
+@journaled("equip")
+def equip_item(character, item_id, item_data, slot=None):
     if not has_item(character, item_id):
         raise ItemNotFoundError(f"{item_id} not found.")
 
-    if item_data["type"] != "weapon":
-        raise InvalidItemTypeError(f"{item_id} is not a weapon.")
+    slot = choose_equipment_slot(character, item_data, slot)
+    key = EQUIPMENT_SLOTS[slot]
+    modifiers = parse_item_modifiers(item_data["effect"])
+    get_equipment_modifiers(character)
 
-    if character.get("equipped_weapon"):
-        old_weapon_id = character["equipped_weapon"]
-        old_weapon_data = character["item_data"][old_weapon_id]
+    # Take the new item out first so the old one always has room
+    old_item_id = character.get(key)
+    remove_item_from_inventory(character, item_id)
+    if old_item_id:
+        add_item_to_inventory(character, old_item_id)
 
-        stat, value = parse_item_effect(old_weapon_data["effect"])
-        apply_stat_effect(character, stat, -value)
+    set_slot_item(character, slot, item_id, modifiers)
+    return slot
+    """
+    Equip any wearable item into one of its slots
 
-        add_item_to_inventory(character, old_weapon_id)
+    Args:
+        character: Character dictionary
+        item_id: Item to equip
+        item_data: Item information dictionary
+        slot: Slot to use (defaults to the item's first empty slot, or the
+              first one if they're all taken)
 
-    stat, value = parse_item_effect(item_data["effect"])
-    apply_stat_effect(character, stat, value)
+    The item previously in that slot goes back to inventory.
 
-    character["equipped_weapon"] = item_id
-    remove_item_from_inventory(character, item_id)
+    Returns: Name of the slot the item was equipped in
+    Raises:
+        ItemNotFoundError if item not in inventory
+        InvalidItemTypeError if the item can't go in that slot
+    """
+
+def equip_weapon(character, item_id, item_data):
+    if not has_item(character, item_id):
+        raise ItemNotFoundError(f"{item_id} not found.")
+
+    if item_data["type"] != "weapon":
+        raise InvalidItemTypeError(f"{item_id} is not a weapon.")
+
+    equip_item(character, item_id, item_data)
 
     weapon_name = item_data.get("name", item_id)
     return f"Equipped weapon: {weapon_name}"
@@ -183,7 +767,8 @@ def equip_weapon(character, item_id, item_data):
         item_id: Weapon to equip
         item_data: Item information dictionary
     
-    Weapon effect format: "strength:5" (adds 5 to strength)
+    Weapon effect format: "strength:5" (adds 5 to strength); several
+    modifiers can be listed as "strength:5,magic:2"
     
     If character already has weapon equipped:
     - Unequip current weapon (remove bonus)
@@ -208,25 +793,10 @@ def equip_armor(character, item_id, item_data):
     if item_data["type"] != "armor":
         raise InvalidItemTypeError(f"{item_id} is not armor.")
 
-        # Unequip current armor
-    if character.get("equipped_armor"):
-        old_armor_id = character["equipped_armor"]
-        old_armor_data = character["item_data"][old_armor_id]
-
-        stat, value = parse_item_effect(old_armor_data["effect"])
-        apply_stat_effect(character, stat, -value)
-
-        add_item_to_inventory(character, old_armor_id)
-
-        # Equip new armor
-    stat, value = parse_item_effect(item_data["effect"])
-    apply_stat_effect(character, stat, value)
-
-    character["equipped_armor"] = item_id
-    remove_item_from_inventory(character, item_id)
+    slot = equip_item(character, item_id, item_data)
 
     armor_name = item_data.get("name", item_id)
-    return f"Equipped armor: {armor_name}"
+    return f"Equipped armor ({slot}): {armor_name}"
     """
     Equip armor
     
@@ -235,9 +805,13 @@ def equip_armor(character, item_id, item_data):
         item_id: Armor to equip
         item_data: Item information dictionary
     
-    Armor effect format: "max_health:10" (adds 10 to max_health)
+    Armor effect format: "max_health:10" (adds 10 to max_health); several
+    modifiers can be listed as "max_health:10,strength:1"
+
+    Armor goes in its SLOT (head, chest, hands, ring, off_hand), or the
+    chest slot if it doesn't name one.
     
-    If character already has armor equipped:
+    If character already has armor in that slot:
     - Unequip current armor (remove bonus)
     - Add old armor back to inventory
     
@@ -249,23 +823,36 @@ def equip_armor(character, item_id, item_data):
     # TODO: Implement armor equipping
     # Similar to equip_weapon but for armor
 
-def unequip_weapon(character):
-    if not character.get("equipped_weapon"):
+@journaled("unequip")
+def unequip_slot(character, slot):
+    if slot not in EQUIPMENT_SLOTS:
+        raise InvalidItemTypeError(f"Unknown equipment slot: {slot}")
+
+    item_id = character.get(EQUIPMENT_SLOTS[slot])
+    if not item_id:
         return None
 
-    weapon_id = character["equipped_weapon"]
-    weapon_data = character["item_data"][weapon_id]
+    get_equipment_modifiers(character)
 
-    stat, value = parse_item_effect(weapon_data["effect"])
-    apply_stat_effect(character, stat, -value)
+    try:
+        add_item_to_inventory(character, item_id)
+    except InventoryFullError:
+        raise InventoryFullError(f"No space to unequip {slot}.")
 
-    if get_inventory_space_remaining(character) == 0:
-        raise InventoryFullError("No space to unequip weapon.")
+    set_slot_item(character, slot, None, [])
 
-    add_item_to_inventory(character, weapon_id)
-    character["equipped_weapon"] = None
+    return item_id
+    """
+    Remove the item in an equipment slot and return it to inventory
 
-    return weapon_id
+    Returns: Item ID that was unequipped, or None if the slot was empty
+    Raises:
+        InvalidItemTypeError if slot isn't an equipment slot
+        InventoryFullError if inventory is full
+    """
+
+def unequip_weapon(character):
+    return unequip_slot(character, "weapon")
     """
     Remove equipped weapon and return it to inventory
     
@@ -279,57 +866,286 @@ def unequip_weapon(character):
     # Clear equipped_weapon from character
 
 def unequip_armor(character):
-    if not character.get("equipped_armor"):
-        return None
+    return unequip_slot(character, "chest")
+    """
+    Remove equipped body armor and return it to inventory
+    
+    Returns: Item ID that was unequipped, or None if no armor equipped
+    Raises: InventoryFullError if inventory is full
+    """
+    # TODO: Implement armor unequipping
 
-    armor_id = character["equipped_armor"]
-    armor_data = character["item_data"][armor_id]
+# ============================================================================
+# EQUIPMENT SLOTS AND SETS
+# ============================================================================
 
-    stat, value = parse_item_effect(armor_data["effect"])
-    apply_stat_effect(character, stat, -value)
+# Equipment slot -> character key holding the equipped item id.
+# Body armor keeps its original 'equipped_armor' key.
+EQUIPMENT_SLOTS = {
+    "weapon": "equipped_weapon",
+    "off_hand": "equipped_off_hand",
+    "head": "equipped_head",
+    "chest": "equipped_armor",
+    "hands": "equipped_hands",
+    "ring1": "equipped_ring1",
+    "ring2": "equipped_ring2"
+}
+
+# Item SLOT value -> the equipment slots it can go in
+SLOT_GROUPS = {
+    "ring": ("ring1", "ring2")
+}
+
+# Slot for items whose data doesn't set SLOT
+DEFAULT_ITEM_SLOT = {
+    "weapon": "weapon",
+    "armor": "chest"
+}
+
+# item_id -> set_id, filled in by index_item_sets
+ITEM_SET_OF = {}
+
+# set_id -> list whose entry n holds every bonus earned with n pieces on
+SET_BONUS_TABLE = {}
+
+def get_item_slots(item_data):
+    """
+    Get the equipment slots an item fits in
 
-    if get_inventory_space_remaining(character) == 0:
-        raise InventoryFullError("No space to unequip armor.")
+    Returns: Tuple of slot names
+    Raises: InvalidItemTypeError if the item can't be equipped
+    """
+    slot = item_data.get("slot") or DEFAULT_ITEM_SLOT.get(item_data.get("type"))
+    slots = SLOT_GROUPS.get(slot, (slot,))
+    if slot is None or slots[0] not in EQUIPMENT_SLOTS:
+        raise InvalidItemTypeError(f"{item_data.get('name', 'Item')} can't be equipped.")
+    return slots
 
-    add_item_to_inventory(character, armor_id)
-    character["equipped_armor"] = None
+def choose_equipment_slot(character, item_data, slot=None):
+    """
+    Pick the slot an item will be equipped in
 
-    return armor_id
+    Returns: Slot name; the requested slot, else the first empty one that
+             fits, else the first one that fits
+    Raises: InvalidItemTypeError if the item can't go in the requested slot
     """
-    Remove equipped armor and return it to inventory
-    
-    Returns: Item ID that was unequipped, or None if no armor equipped
-    Raises: InventoryFullError if inventory is full
+    slots = get_item_slots(item_data)
+    if slot is not None:
+        if slot not in slots:
+            raise InvalidItemTypeError(f"{item_data.get('name', 'Item')} can't go in {slot}.")
+        return slot
+    for candidate in slots:
+        if not character.get(EQUIPMENT_SLOTS[candidate]):
+            return candidate
+    return slots[0]
+
+def get_equipped_items(character):
+    """Returns: Dictionary of slot -> item_id for every filled slot"""
+    equipped = {}
+    for slot, key in EQUIPMENT_SLOTS.items():
+        if character.get(key):
+            equipped[slot] = character[key]
+    return equipped
+
+def index_item_sets(item_data, item_sets):
     """
-    # TODO: Implement armor unequipping
+    Precompute set membership and bonuses so equipping never searches item data
+
+    Bonuses are cumulative: with 3 pieces on, both the 2-piece and the
+    3-piece bonus apply. Items naming a set that isn't defined get no bonus.
+
+    Args:
+        item_data: Dictionary of item_id -> item data with optional 'set'
+        item_sets: Dictionary from game_data.load_item_sets
+
+    Returns: Number of items that belong to a set
+    """
+    ITEM_SET_OF.clear()
+    SET_BONUS_TABLE.clear()
+
+    for item_id, item in item_data.items():
+        if item.get("set") in item_sets:
+            ITEM_SET_OF[item_id] = item["set"]
+
+    for set_id, item_set in item_sets.items():
+        bonuses = item_set.get("bonuses", {})
+        largest = max(bonuses, default=0)
+        table = [[]]
+        for pieces in range(1, largest + 1):
+            table.append(table[-1] + parse_item_modifiers(bonuses[pieces])
+                         if pieces in bonuses else table[-1])
+        SET_BONUS_TABLE[set_id] = table
+
+    return len(ITEM_SET_OF)
+
+def get_set_bonus_modifiers(equipped):
+    """
+    Get the set bonuses earned by a group of equipped items
+
+    Args:
+        equipped: Dictionary of slot -> item_id
+
+    Returns: List of (stat_name, value)
+    """
+    pieces = {}
+    for item_id in equipped.values():
+        set_id = ITEM_SET_OF.get(item_id)
+        if set_id is not None:
+            pieces[set_id] = pieces.get(set_id, 0) + 1
+
+    modifiers = []
+    for set_id, count in pieces.items():
+        table = SET_BONUS_TABLE[set_id]
+        modifiers.extend(table[min(count, len(table) - 1)])
+    return modifiers
+
+# ============================================================================
+# EQUIPMENT MODIFIERS
+# ============================================================================
+# Stats such as character['strength'] always hold effective values (base
+# stat plus gear), so combat reads them directly with no per-attack work.
+# character['equipment_modifiers'] caches the modifiers of each equipped
+# slot and character['stat_modifiers'] their totals (set bonuses included).
+# character['gear_bonus'] is saved with the character and records exactly
+# how much gear has been added to each stat, so the base stat is always
+# stat - gear_bonus, however the item data changes between sessions.
+# Whenever the totals are rebuilt, each stat is set to base + new total.
+
+def parse_item_modifiers(effect_string):
+    """
+    Parse an effect string with one or more comma-separated modifiers
+
+    Returns: List of (stat_name, value) tuples
+    Example: "strength:5,magic:2" → [("strength", 5), ("magic", 2)]
+    """
+    return [parse_item_effect(part.strip()) for part in effect_string.split(",")]
+
+def total_modifiers(character, slot_modifiers):
+    """Returns: Dictionary of stat_name -> summed value over every slot and set bonus"""
+    totals = {}
+    for modifiers in slot_modifiers.values():
+        for stat, value in modifiers:
+            totals[stat] = totals.get(stat, 0) + value
+    for stat, value in get_set_bonus_modifiers(get_equipped_items(character)):
+        totals[stat] = totals.get(stat, 0) + value
+    return totals
+
+def get_equipment_modifiers(character):
+    """
+    Get the cached modifiers of every equipped slot
+
+    Characters loaded from a save have their gear_bonus included in their
+    stats. The cache is rebuilt from the current item data and the stats
+    are moved from base + gear_bonus to base + the rebuilt totals, so an
+    item whose effect changed since the save is applied correctly. (Saves
+    without a gear_bonus are assumed to include the current totals.)
+
+    Returns: Dictionary of slot -> list of (stat_name, value)
+    Raises: ItemNotFoundError if an equipped item has no item data
+    """
+    slot_modifiers = character.get("equipment_modifiers")
+    if slot_modifiers is None:
+        slot_modifiers = {}
+        for slot, item_id in get_equipped_items(character).items():
+            item_data = lookup_item(character, item_id)
+            if item_data is None:
+                raise ItemNotFoundError(f"No item data for equipped {item_id}.")
+            slot_modifiers[slot] = parse_item_modifiers(item_data["effect"])
+        character["equipment_modifiers"] = slot_modifiers
+        totals = total_modifiers(character, slot_modifiers)
+        character.setdefault("gear_bonus", dict(totals))
+        apply_gear_totals(character, totals)
+    return slot_modifiers
+
+def get_stat_modifiers(character):
+    """Returns: Dictionary of stat_name -> total bonus from equipped gear"""
+    get_equipment_modifiers(character)
+    return character["stat_modifiers"]
+
+def get_base_stat(character, stat_name):
+    """Returns: The stat without any equipment bonuses"""
+    get_equipment_modifiers(character)
+    return character.get(stat_name, 0) - character["gear_bonus"].get(stat_name, 0)
+
+def apply_gear_totals(character, totals):
+    """
+    Set every stat to its base value plus new gear totals
+
+    The base is stat - character['gear_bonus'] (what was actually added
+    before), never a value re-derived from item data.
+    """
+    applied = character.get("gear_bonus", {})
+    for stat in set(applied) | set(totals):
+        delta = totals.get(stat, 0) - applied.get(stat, 0)
+        if delta:
+            apply_stat_effect(character, stat, delta)
+    # Losing max_health can leave current health above the new maximum
+    if character.get("health", 0) > character.get("max_health", 9999):
+        apply_stat_effect(character, "health", 0)
+    character["gear_bonus"] = dict(totals)
+    character["stat_modifiers"] = totals
+
+def set_slot_item(character, slot, item_id, modifiers):
+    """
+    Put an item in (or clear) one equipment slot and update the stats
+
+    Args:
+        character: Character dictionary
+        slot: Equipment slot name
+        item_id: Item now in the slot, or None to empty it
+        modifiers: List of (stat_name, value) for the new item, [] when emptied
+    """
+    slot_modifiers = get_equipment_modifiers(character)
+    key = EQUIPMENT_SLOTS[slot]
+    journal = character.get("journal")
+    if journal is not None:
+        journal.record("equip", slot, character.get(key))
+    character[key] = item_id
+    if item_id:
+        slot_modifiers[slot] = modifiers
+    else:
+        slot_modifiers.pop(slot, None)
+    apply_gear_totals(character, total_modifiers(character, slot_modifiers))
 
 # ============================================================================
 # SHOP SYSTEM
 # ============================================================================
 
-def purchase_item(character, item_id, item_data):
-    cost = item_data["cost"]
+@journaled("buy")
+def purchase_item(character, item_id, item_data, quantity=1, pricing=None):
+    if not isinstance(quantity, int) or quantity < 1:
+        raise InvalidItemTypeError(f"Invalid quantity for {item_id}: {quantity}")
+
+    if pricing is None:
+        cost = item_data["cost"] * quantity
+    else:
+        cost = pricing.buy_price(item_id, character) * quantity
 
     if character["gold"] < cost:
         raise InsufficientResourcesError("Not enough gold.")
 
-    if get_inventory_space_remaining(character) == 0:
-        raise InventoryFullError("Inventory full.")
+    max_stack, slot_type = check_inventory_space(character, item_id, quantity, item_data)
 
-    character["gold"] -= cost
-    add_item_to_inventory(character, item_id)
+    change_gold(character, -cost)
+    get_inventory(character).add(item_id, quantity, max_stack, slot_type)
+    if pricing is not None:
+        record_trade(character, pricing, item_id, bought=quantity)
 
     return True
     """
-    Purchase an item from a shop
+    Purchase an item (or a whole stack of it) from a shop
     
     Args:
         character: Character dictionary
         item_id: Item to purchase
         item_data: Item information with 'cost' field
+        quantity: How many to buy, as one gold check, one space check and one update
+        pricing: Optional shop_pricing.PricingEngine; charges its current
+                 price instead of the static cost and records the trade
     
     Returns: True if purchased successfully
     Raises:
+        InvalidItemTypeError if quantity isn't a positive integer
         InsufficientResourcesError if not enough gold
         InventoryFullError if inventory is full
     """
@@ -339,26 +1155,35 @@ def purchase_item(character, item_id, item_data):
     # Subtract gold from character
     # Add item to inventory
 
-def sell_item(character, item_id, item_data):
-    if not has_item(character, item_id):
+@journaled("sell")
+def sell_item(character, item_id, item_data, quantity=1, pricing=None):
+    if count_item(character, item_id) < quantity or quantity < 1:
         raise ItemNotFoundError(f"{item_id} not found.")
 
-    price = item_data["cost"] // 2
+    if pricing is None:
+        price = item_data["cost"] // 2 * quantity
+    else:
+        price = pricing.sell_price(item_id) * quantity
 
-    remove_item_from_inventory(character, item_id)
-    character["gold"] += price
+    remove_item_from_inventory(character, item_id, quantity)
+    change_gold(character, price)
+    if pricing is not None:
+        record_trade(character, pricing, item_id, sold=quantity)
 
     return price
     """
-    Sell an item for half its purchase cost
+    Sell an item (or a whole stack of it) for half its purchase cost each
     
     Args:
         character: Character dictionary
         item_id: Item to sell
         item_data: Item information with 'cost' field
+        quantity: How many to sell
+        pricing: Optional shop_pricing.PricingEngine; pays its current sell
+                 price instead of half the cost and records the trade
     
     Returns: Amount of gold received
-    Raises: ItemNotFoundError if item not in inventory
+    Raises: ItemNotFoundError if fewer than quantity are in inventory
     """
     # TODO: Implement selling
     # Check if character has item
@@ -366,6 +1191,208 @@ def sell_item(character, item_id, item_data):
     # Remove item from inventory
     # Add gold to character
 
+def merge_basket(basket):
+    """
+    Combine repeated item ids in a basket
+
+    Args:
+        basket: List of (item_id, quantity) pairs
+
+    Returns: Dictionary of item_id -> total quantity, in first-seen order
+    Raises: InvalidItemTypeError if a quantity isn't a positive integer
+    """
+    merged = {}
+    for item_id, quantity in basket:
+        if not isinstance(quantity, int) or quantity < 1:
+            raise InvalidItemTypeError(f"Invalid quantity for {item_id}: {quantity}")
+        merged[item_id] = merged.get(item_id, 0) + quantity
+    return merged
+
+@journaled("buy")
+def purchase_items(character, basket, catalog, pricing=None):
+    merged = merge_basket(basket)
+    for item_id in merged:
+        if item_id not in catalog:
+            raise ItemNotFoundError(f"{item_id} is not for sale.")
+
+    if pricing is None:
+        cost = sum(catalog[item_id]["cost"] * quantity for item_id, quantity in merged.items())
+    else:
+        cost = sum(pricing.buy_price(item_id, character) * quantity
+                   for item_id, quantity in merged.items())
+    if character["gold"] < cost:
+        raise InsufficientResourcesError("Not enough gold.")
+
+    plan = plan_inventory_additions(
+        character, [(item_id, quantity, catalog[item_id]) for item_id, quantity in merged.items()])
+
+    # Everything has been checked; nothing below can fail
+    change_gold(character, -cost)
+    inventory = get_inventory(character)
+    for item_id, quantity, max_stack, slot_type in plan:
+        inventory.add(item_id, quantity, max_stack, slot_type)
+        if pricing is not None:
+            record_trade(character, pricing, item_id, bought=quantity)
+
+    return cost
+    """
+    Purchase a whole basket of items at once
+
+    The basket is checked as a whole (total cost, total slots, slots per
+    item type) before anything changes, so it is either bought in full or
+    not at all.
+
+    Args:
+        character: Character dictionary
+        basket: List of (item_id, quantity) pairs; repeated ids are combined
+        catalog: Dictionary of item_id -> item data with 'cost' field
+        pricing: Optional shop_pricing.PricingEngine to price the basket with
+
+    Returns: Total gold spent
+    Raises:
+        ItemNotFoundError if an item isn't in the catalog
+        InvalidItemTypeError if a quantity isn't a positive integer
+        InsufficientResourcesError if the basket costs more than the character has
+        InventoryFullError if the basket doesn't fit
+    """
+
+@journaled("sell")
+def sell_items(character, basket, catalog, pricing=None):
+    merged = merge_basket(basket)
+    inventory = get_inventory(character)
+    for item_id, quantity in merged.items():
+        if item_id not in catalog:
+            raise ItemNotFoundError(f"{item_id} can't be sold here.")
+        if inventory.count(item_id) < quantity:
+            raise ItemNotFoundError(f"Not enough {item_id} to sell.")
+
+    if pricing is None:
+        price = sum(catalog[item_id]["cost"] // 2 * quantity
+                    for item_id, quantity in merged.items())
+    else:
+        price = sum(pricing.sell_price(item_id) * quantity
+                    for item_id, quantity in merged.items())
+
+    for item_id, quantity in merged.items():
+        inventory.discard(item_id, quantity)
+        if pricing is not None:
+            record_trade(character, pricing, item_id, sold=quantity)
+    change_gold(character, price)
+
+    return price
+    """
+    Sell a whole basket of items at once, for half their cost each
+
+    Every line is checked before anything is removed, so the basket is
+    either sold in full or not at all.
+
+    Args:
+        character: Character dictionary
+        basket: List of (item_id, quantity) pairs; repeated ids are combined
+        catalog: Dictionary of item_id -> item data with 'cost' field
+        pricing: Optional shop_pricing.PricingEngine to price the basket with
+
+    Returns: Total gold received
+    Raises:
+        ItemNotFoundError if an item isn't in the catalog (or has no price),
+                          or the character holds fewer of it than listed
+        InvalidItemTypeError if a quantity isn't a positive integer
+    """
+
+# Items shown per shop page
+SHOP_PAGE_SIZE = 8
+
+def build_shop_catalog(item_data, prices=None):
+    """
+    Precompute every filtered view of the shop, each sorted by cost
+
+    A view exists for each (type, stat) pair, with None meaning "any", so
+    every combination of the type and stat filters is a ready-made list.
+    Each view keeps a parallel list of costs, so the affordable part of
+    a view is found with a binary search instead of a scan.
+
+    Args:
+        item_data: Dictionary of item_id -> item data with 'type', 'effect', 'cost'
+        prices: Optional item_id -> current price (e.g. PricingEngine.price_table),
+                used instead of each item's static cost
+
+    Returns: Dictionary with 'views' {(type, stat): (item_ids, costs)},
+             'types' and 'stats' (sorted lists of filter values)
+    """
+    if prices is None:
+        prices = {item_id: item["cost"] for item_id, item in item_data.items()}
+
+    views = {}
+    for item_id in sorted(item_data, key=lambda i: (prices[i], i)):
+        item = item_data[item_id]
+        try:
+            stats = {stat for stat, _ in parse_item_modifiers(item["effect"])}
+        except InvalidItemTypeError:
+            stats = set()
+        keys = {(None, None), (item["type"], None)}
+        for stat in stats:
+            keys.add((None, stat))
+            keys.add((item["type"], stat))
+        for key in keys:
+            item_ids, costs = views.setdefault(key, ([], []))
+            item_ids.append(item_id)
+            costs.append(prices[item_id])
+
+    return {
+        "views": views,
+        "prices": prices,
+        "types": sorted({t for t, _ in views if t is not None}),
+        "stats": sorted({s for _, s in views if s is not None})
+    }
+
+def reprice_shop_catalog(catalog, prices):
+    """
+    Update a catalog's prices in place, e.g. after a PricingEngine tick
+
+    Which items are in which view never changes, so only the cost column
+    is refreshed and each view re-sorted. Views are already close to
+    sorted, which Python's sort handles in near-linear time; nothing is
+    re-parsed or re-filtered.
+
+    Returns: The same catalog
+    """
+    for item_ids, costs in catalog["views"].values():
+        item_ids.sort(key=lambda i: (prices[i], i))
+        costs[:] = [prices[item_id] for item_id in item_ids]
+    catalog["prices"] = prices
+    return catalog
+
+def get_shop_page(catalog, page=0, page_size=SHOP_PAGE_SIZE,
+                  item_type=None, stat=None, max_cost=None):
+    """
+    Get one page of a filtered shop view
+
+    Costs O(log n + page_size) whatever the size of the catalog.
+
+    Args:
+        catalog: Dictionary from build_shop_catalog
+        page: Zero-based page number (clamped to the pages that exist)
+        page_size: Items per page
+        item_type: Only show this item type (None for any)
+        stat: Only show items that modify this stat (None for any)
+        max_cost: Only show items costing at most this much (e.g. the
+                  character's gold), or None for no limit
+
+    Returns: Dictionary with 'items' (item ids on this page), 'page',
+             'pages' and 'total' (items matching the filters)
+    """
+    item_ids, costs = catalog["views"].get((item_type, stat), ((), ()))
+    total = len(item_ids) if max_cost is None else bisect_right(costs, max_cost)
+    pages = max(1, -(-total // page_size))
+    page = min(max(0, page), pages - 1)
+    start = page * page_size
+    return {
+        "items": item_ids[start:min(start + page_size, total)],
+        "page": page,
+        "pages": pages,
+        "total": total
+    }
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -392,12 +1419,17 @@ def parse_item_effect(effect_string):
 def apply_stat_effect(character, stat_name, value):
     if stat_name not in character:
         character[stat_name] = 0
+    before = character[stat_name]
 
     character[stat_name] += value
 
     # Cap health at max_health
     if stat_name == "health":
         character["health"] = min(character["health"], character.get("max_health", 9999))
+
+    journal = character.get("journal")
+    if journal is not None and character[stat_name] != before:
+        journal.record("stat", stat_name, character[stat_name] - before)
     """
     Apply a stat modification to character
     
@@ -409,19 +1441,23 @@ def apply_stat_effect(character, stat_name, value):
     # Add value to character[stat_name]
     # If stat is health, ensure it doesn't exceed max_health
 
+def change_gold(character, amount):
+    """Add (or with a negative amount, take) gold, recording it in any journal"""
+    character["gold"] += amount
+    journal = character.get("journal")
+    if journal is not None and amount:
+        journal.record("gold", amount)
+
 def display_inventory(character, item_data_dict):
-    inventory = character.get("inventory", [])
+    inventory = get_inventory(character)
 
     print("\n=== INVENTORY ===")
     if not inventory:
         print("Inventory is empty.")
         return
 
-    counted = {}
-    for item in inventory:
-        counted[item] = counted.get(item, 0) + 1
-
-    for item_id, qty in counted.items():
+    # Quantities are already tracked, so nothing needs recounting here
+    for item_id, qty in inventory.counts.items():
         item_name = item_data_dict[item_id]["name"]
         item_type = item_data_dict[item_id]["type"]
         print(f"{item_name} ({item_type}) x{qty}")
@@ -16,6 +16,8 @@ import inventory_system
 import quest_handler
 import combat_system
 import game_data
+import shop_pricing
+import stash_store
 from custom_exceptions import *
 
 # ============================================================================
@@ -25,7 +27,15 @@ from custom_exceptions import *
 # Global variables for game data
 current_character = None
 all_quests = {}
+quest_index = None
 all_items = {}
+all_item_sets = {}
+shop_catalog = None
+pricing_engine = None
+stashes = None
+
+# Every character on this install shares one account stash
+ACCOUNT_OWNER = "player"
 game_running = False
 
 # ============================================================================
@@ -90,6 +100,8 @@ def new_game():
     char.setdefault("equipped_weapon", None)
     char.setdefault("equipped_armor", None)
     char["item_data"] = all_items
+    inventory_system.InventoryJournal(char)
+    quest_handler.QuestTracker(char, all_quests, quest_index)
 
     current_character = char
 
@@ -160,6 +172,8 @@ def load_game():
     loaded.setdefault("equipped_weapon", None)
     loaded.setdefault("equipped_armor", None)
     loaded["item_data"] = all_items
+    inventory_system.InventoryJournal(loaded)
+    quest_handler.QuestTracker(loaded, all_quests, quest_index)
 
     current_character = loaded
     print(f"Loaded character: {current_character['name']} (Level {current_character.get('level', 1)})")
@@ -205,6 +219,8 @@ def game_loop():
             elif choice == 5:
                 shop()
             elif choice == 6:
+                stash_menu()
+            elif choice == 7:
                 save_game()
                 print("Game saved. Returning to main menu.")
                 game_running = False
@@ -240,9 +256,10 @@ def game_menu():
     3. Quest Menu
     4. Explore (Find Battles)
     5. Shop
-    6. Save and Quit
+    6. Shared Stash
+    7. Save and Quit
 
-    Returns: Integer choice (1-6)
+    Returns: Integer choice (1-7)
     """
     while True:
         print("\n=== GAME MENU ===")
@@ -251,11 +268,12 @@ def game_menu():
         print("3) Quest Menu")
         print("4) Explore (Find Battles)")
         print("5) Shop")
-        print("6) Save and Quit")
-        choice = input("Choose an option (1-6): ").strip()
-        if choice in ("1", "2", "3", "4", "5", "6"):
+        print("6) Shared Stash")
+        print("7) Save and Quit")
+        choice = input("Choose an option (1-7): ").strip()
+        if choice in ("1", "2", "3", "4", "5", "6", "7"):
             return int(choice)
-        print("Enter a number between 1 and 6.")
+        print("Enter a number between 1 and 7.")
     # TODO: Implement game menu
 
 
@@ -280,8 +298,8 @@ def view_character_stats():
     print(f"Magic: {c.get('magic')}")
     print(f"Experience: {c.get('experience')}")
     print(f"Gold: {c.get('gold')}")
-    print(f"Equipped Weapon: {c.get('equipped_weapon')}")
-    print(f"Equipped Armor: {c.get('equipped_armor')}")
+    for slot, item_id in inventory_system.get_equipped_items(c).items():
+        print(f"Equipped {slot.replace('_', ' ').title()}: {item_id}")
     try:
         quest_handler.display_character_quest_progress(c, all_quests)
     except Exception:
@@ -309,8 +327,10 @@ def view_inventory():
         print("2) Equip weapon")
         print("3) Equip armor")
         print("4) Drop item")
-        print("5) Back")
-        choice = input("Choose an option (1-5): ").strip()
+        print("5) Unequip slot")
+        print("6) Undo last action")
+        print("7) Back")
+        choice = input("Choose an option (1-7): ").strip()
 
         if choice == "1":
             item_id = input("Enter item ID to use: ").strip()
@@ -372,9 +392,24 @@ def view_inventory():
                 print(f"Error dropping item: {e}")
 
         elif choice == "5":
+            slot = input(f"Slot to unequip ({', '.join(inventory_system.EQUIPMENT_SLOTS)}): ").strip()
+            try:
+                item_id = inventory_system.unequip_slot(current_character, slot)
+                print(f"Unequipped {item_id}." if item_id else "Nothing equipped there.")
+            except (InvalidItemTypeError, InventoryFullError) as e:
+                print(e)
+            except Exception as e:
+                print(f"Error unequipping: {e}")
+
+        elif choice == "6":
+            journal = current_character.get("journal")
+            label = journal.undo() if journal else None
+            print(f"Undid: {label}" if label else "Nothing to undo.")
+
+        elif choice == "7":
             break
         else:
-            print("Invalid input. Choose 1-5.")
+            print("Invalid input. Choose 1-7.")
 
 
     # TODO: Implement inventory menu
@@ -385,7 +420,7 @@ def view_inventory():
 
 def quest_menu():
     """Quest management menu"""
-    global current_character, all_quests
+    global current_character, all_quests, quest_index
 
     if not current_character:
         print("No character loaded.")
@@ -399,8 +434,9 @@ def quest_menu():
         print("4) Accept Quest")
         print("5) Abandon Quest")
         print("6) Complete Quest (testing)")
-        print("7) Back")
-        choice = input("Choose an option (1-7): ").strip()
+        print("7) Quest Board (by level)")
+        print("8) Back")
+        choice = input("Choose an option (1-8): ").strip()
 
         if choice == "1":
             active = quest_handler.get_active_quests(current_character, all_quests)
@@ -410,7 +446,7 @@ def quest_menu():
                 quest_handler.display_quest_list(active)
 
         elif choice == "2":
-            available = quest_handler.get_available_quests(current_character, all_quests)
+            available = quest_handler.get_available_quests(current_character, all_quests, quest_index)
             if not available:
                 print("No available quests at this time.")
             else:
@@ -462,9 +498,23 @@ def quest_menu():
                 print(f"Error completing quest: {e}")
 
         elif choice == "7":
+            raw = input("Level to browse (blank for your level): ").strip()
+            if raw and not raw.isdigit():
+                print("Invalid level.")
+                continue
+            level = int(raw) if raw else current_character["level"]
+            board = quest_handler.find_quests(all_quests, quest_index, min_level=level,
+                                              max_level=level, character=current_character,
+                                              not_completed=True)
+            if not board:
+                print(f"No open quests at level {level}.")
+            else:
+                quest_handler.display_quest_list(board)
+
+        elif choice == "8":
             break
         else:
-            print("Invalid input. Choose 1-7.")
+            print("Invalid input. Choose 1-8.")
 
 
     # TODO: Implement quest menu
@@ -503,6 +553,13 @@ def explore():
 
     if result["winner"] == "player":
         print(f"You defeated the {enemy['name']} and gained {result['xp_gained']} XP and {result['gold_gained']} gold.")
+        drop = combat_system.roll_loot(enemy.get("type"))
+        if drop:
+            granted, left_behind = inventory_system.grant_loot(current_character, [drop], all_items)
+            for item_id, quantity in granted:
+                print(f"Loot: {all_items.get(item_id, {}).get('name', item_id)} x{quantity}")
+            for item_id, quantity in left_behind:
+                print(f"No room for {all_items.get(item_id, {}).get('name', item_id)} x{quantity}; left behind.")
     elif result["winner"] == "escaped":
         print("You escaped from battle.")
     else:
@@ -519,56 +576,110 @@ def explore():
 
 def shop():
     """Shop menu for buying/selling items"""
-    global current_character, all_items
+    global current_character, all_items, shop_catalog, pricing_engine
 
     if not current_character:
         print("No character loaded.")
         return
 
+    # Prices move once per visit: fold in the last visit's trades and
+    # re-sort the catalog by this character's prices
+    if pricing_engine is None:
+        pricing_engine = shop_pricing.PricingEngine(all_items)
+    else:
+        pricing_engine.tick()
+    prices = pricing_engine.price_table(current_character)
+    if shop_catalog is None:
+        shop_catalog = inventory_system.build_shop_catalog(all_items, prices)
+    else:
+        inventory_system.reprice_shop_catalog(shop_catalog, prices)
+
+    page = 0
+    item_type = None
+    stat = None
+    affordable_only = False
+
     while True:
+        gold = current_character.get('gold', 0)
+        view = inventory_system.get_shop_page(shop_catalog, page, item_type=item_type, stat=stat,
+                                              max_cost=gold if affordable_only else None)
+        page = view["page"]
+
         print("\n=== SHOP ===")
-        print(f"Gold: {current_character.get('gold', 0)}")
-        print("Available items:")
-        ids = list(all_items.keys())
-        for idx, iid in enumerate(ids, start=1):
+        print(f"Gold: {gold}")
+        print(f"Filters: type={item_type or 'any'}, stat={stat or 'any'}, "
+              f"affordable only={'yes' if affordable_only else 'no'}")
+        print(f"Items (page {page + 1}/{view['pages']}, {view['total']} matching):")
+        for idx, iid in enumerate(view["items"], start=page * inventory_system.SHOP_PAGE_SIZE + 1):
             it = all_items[iid]
-            print(f"{idx}) {it['name']} (id: {iid}) - Cost: {it.get('cost', 0)}")
+            print(f"{idx}) {it['name']} (id: {iid}) - Cost: {prices[iid]}"
+                  f" (sells for {pricing_engine.sell_price(iid)})")
 
         print("\nOptions:")
         print("1) Buy item")
         print("2) Sell item")
         print("3) Back")
-        choice = input("Choose an option (1-3): ").strip()
+        print("4) Next page")
+        print("5) Previous page")
+        print("6) Change filters")
+        choice = input("Choose an option (1-6): ").strip()
 
         if choice == "1":
-            sel = input("Enter item id to buy: ").strip()
-            if sel not in all_items:
-                print("Invalid item id.")
+            try:
+                basket = parse_basket(input("Enter item ids to buy (e.g. health_potion:5, iron_sword): "))
+            except InvalidItemTypeError as e:
+                print(e)
+                continue
+            if not basket:
+                print("Nothing entered.")
                 continue
             try:
-                inventory_system.purchase_item(current_character, sel, all_items[sel])
-                print(f"Purchased {all_items[sel]['name']}.")
+                cost = inventory_system.purchase_items(current_character, basket, all_items,
+                                                      pricing_engine)
+                print(f"Purchased {len(basket)} line(s) for {cost} gold.")
+            except ItemNotFoundError as e:
+                print(f"Invalid item id: {e}")
             except InsufficientResourcesError:
                 print("Not enough gold.")
-            except InventoryFullError:
-                print("Inventory is full.")
+            except InventoryFullError as e:
+                print(f"Not enough room: {e}")
             except Exception as e:
-                print(f"Error purchasing item: {e}")
+                print(f"Error purchasing items: {e}")
 
         elif choice == "2":
-            sel = input("Enter item id to sell: ").strip()
             try:
-                price = inventory_system.sell_item(current_character, sel, all_items.get(sel, {"cost": 0}))
-                print(f"Sold {sel} for {price} gold.")
+                basket = parse_basket(input("Enter item ids to sell (e.g. health_potion:5, iron_sword): "))
+            except InvalidItemTypeError as e:
+                print(e)
+                continue
+            if not basket:
+                print("Nothing entered.")
+                continue
+            try:
+                price = inventory_system.sell_items(current_character, basket, all_items, pricing_engine)
+                print(f"Sold {len(basket)} line(s) for {price} gold.")
             except ItemNotFoundError:
-                print("You don't have that item.")
+                print("You don't have all of those items.")
             except Exception as e:
-                print(f"Error selling item: {e}")
+                print(f"Error selling items: {e}")
 
         elif choice == "3":
             break
+
+        elif choice == "4":
+            page += 1
+
+        elif choice == "5":
+            page -= 1
+
+        elif choice == "6":
+            item_type = input(f"Type ({', '.join(shop_catalog['types'])}; blank for any): ").strip() or None
+            stat = input(f"Stat ({', '.join(shop_catalog['stats'])}; blank for any): ").strip() or None
+            affordable_only = input("Only show items you can afford? (y/n): ").strip().lower() == "y"
+            page = 0
+
         else:
-            print("Invalid input. Choose 1-3.")
+            print("Invalid input. Choose 1-6.")
 
 
     # TODO: Implement shop
@@ -578,6 +689,63 @@ def shop():
     # Handle exceptions from inventory_system
 
 
+def stash_menu():
+    """Move items and gold between the character and the shared stash"""
+    global current_character, stashes
+
+    if not current_character:
+        print("No character loaded.")
+        return
+
+    if stashes is None:
+        stashes = stash_store.StashStore(item_data=all_items)
+        stashes.load()
+    stash = stashes.get_or_create_stash(ACCOUNT_OWNER)
+
+    while True:
+        print("\n=== SHARED STASH ===")
+        inventory_system.display_inventory(stash, all_items)
+        print(f"Stash gold: {stash['gold']} | Your gold: {current_character.get('gold', 0)}")
+        print("\nOptions:")
+        print("1) Deposit items")
+        print("2) Withdraw items")
+        print("3) Deposit gold")
+        print("4) Withdraw gold")
+        print("5) Back")
+        choice = input("Choose an option (1-5): ").strip()
+
+        if choice in ("1", "2"):
+            source, target = (current_character, stash) if choice == "1" else (stash, current_character)
+            try:
+                basket = parse_basket(input("Enter item ids (e.g. health_potion:5, iron_sword): "))
+            except InvalidItemTypeError as e:
+                print(e)
+                continue
+            for item_id, qty in basket:
+                try:
+                    stashes.transfer(source, target, item_id, qty)
+                    print(f"Moved {qty} x {item_id}.")
+                except (ItemNotFoundError, InventoryFullError) as e:
+                    print(f"Could not move {item_id}: {e}")
+
+        elif choice in ("3", "4"):
+            source, target = (current_character, stash) if choice == "3" else (stash, current_character)
+            amount = input("Amount of gold: ").strip()
+            if not amount.isdigit():
+                print("Enter a whole number.")
+                continue
+            try:
+                stashes.transfer_gold(source, target, int(amount))
+                print(f"Moved {amount} gold.")
+            except InsufficientResourcesError:
+                print("Not enough gold.")
+
+        elif choice == "5":
+            break
+        else:
+            print("Invalid input. Choose 1-5.")
+
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -591,6 +759,9 @@ def save_game():
 
     try:
         character_manager.save_character(current_character)
+        # Only stashes changed since the last save are rewritten
+        if stashes is not None:
+            stashes.save()
     except Exception as e:
         print(f"Warning: failed to save game: {e}")
 
@@ -602,11 +773,17 @@ def save_game():
 
 def load_game_data():
     """Load all quest and item data from files"""
-    global all_quests, all_items
+    global all_quests, quest_index, all_items, all_item_sets, shop_catalog, pricing_engine
 
     try:
         all_quests = game_data.load_quests()
+        quest_index = quest_handler.build_quest_index(all_quests)
         all_items = game_data.load_items()
+        all_item_sets = game_data.load_item_sets()
+        inventory_system.index_item_sets(all_items, all_item_sets)
+        inventory_system.compile_item_effects(all_items)
+        pricing_engine = shop_pricing.PricingEngine(all_items)
+        shop_catalog = inventory_system.build_shop_catalog(all_items, pricing_engine.price_table())
         return True  # REQUIRED by autograder
     except MissingDataFileError:
         raise
@@ -671,6 +848,27 @@ def handle_character_death():
     # If quit: set game_running = False
 
 
+def parse_basket(text):
+    """
+    Turn shop input like "health_potion:5, iron_sword" into (item_id, qty) pairs
+
+    Returns: List of pairs; an item without a quantity counts as 1
+    Raises: InvalidItemTypeError if a quantity isn't a positive whole number
+    """
+    basket = []
+    for entry in text.split(","):
+        item_id, colon, qty = entry.strip().partition(":")
+        item_id, qty = item_id.strip(), qty.strip()
+        if not item_id:
+            continue
+        if not colon:
+            qty = "1"
+        if not qty.isdigit() or int(qty) < 1:
+            raise InvalidItemTypeError(f"Invalid quantity for {item_id}: {qty or 'nothing'}")
+        basket.append((item_id, int(qty)))
+    return basket
+
+
 def display_welcome():
     """Display welcome message"""
     print("=" * 50)
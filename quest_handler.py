@@ -9,7 +9,11 @@ AI Usage: [Document any AI assistance used]
 This module handles quest management, dependencies, and completion.
 """
 
+from bisect import bisect_left, bisect_right
+from collections import deque
+
 from custom_exceptions import (
+    InvalidDataFormatError,
     QuestNotFoundError,
     QuestRequirementsNotMetError,
     QuestAlreadyCompletedError,
@@ -17,6 +21,70 @@ from custom_exceptions import (
     InsufficientLevelError
 )
 
+# ============================================================================
+# QUEST STATE
+# ============================================================================
+
+class QuestList:
+    """
+    A character's active or completed quest ids as an ordered set
+
+    Behaves like the plain list it replaces (len, in, iteration, append,
+    remove, comparing equal to a list) but membership, adding and removing
+    are O(1). Iteration keeps the order quests were added, so list(quests)
+    is the same list form that save files use.
+    """
+
+    def __init__(self, quest_ids=()):
+        self.ids = dict.fromkeys(quest_ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, quest_id):
+        return quest_id in self.ids
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __eq__(self, other):
+        if isinstance(other, QuestList):
+            return list(self.ids) == list(other.ids)
+        if isinstance(other, list):
+            return list(self.ids) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"QuestList({list(self.ids)!r})"
+
+    def append(self, quest_id):
+        self.ids[quest_id] = None
+
+    def remove(self, quest_id):
+        """Raises: ValueError if the quest isn't in the list, like list.remove"""
+        try:
+            del self.ids[quest_id]
+        except KeyError:
+            raise ValueError(f"{quest_id} not in quest list")
+
+    def to_list(self):
+        return list(self.ids)
+
+def get_quest_list(character, field):
+    """
+    Get a character's 'active_quests' or 'completed_quests' as a QuestList
+
+    A plain list is converted in place the first time it is used here (one
+    O(n) pass); duplicate ids collapse to one.
+
+    Returns: QuestList object stored in character[field]
+    """
+    quests = character[field]
+    if not isinstance(quests, QuestList):
+        quests = QuestList(quests)
+        character[field] = quests
+    return quests
+
 # ============================================================================
 # QUEST MANAGEMENT
 # ============================================================================
@@ -26,19 +94,24 @@ def accept_quest(character, quest_id, quest_data_dict):
         raise QuestNotFoundError(f"'{quest_id} 'does not exist.")
 
     quest = quest_data_dict[quest_id]
+    completed = get_quest_list(character, "completed_quests")
+    active = get_quest_list(character, "active_quests")
 
-    if quest_id in character["completed_quests"]:
+    if quest_id in completed:
         raise QuestAlreadyCompletedError(f" '{quest_id}' has already been completed.")
-    if quest_id in character["active_quests"]:
+    if quest_id in active:
         raise QuestRequirementsNotMetError(f"'{quest_id}' already active.")
     if character.get("level",1) < quest['required_level']:
-        raise InsufficientLevelError(f'Must be level {quest['required_level']} to accept' "{quest_id}.")
+        raise InsufficientLevelError(f"Must be level {quest['required_level']} to accept {quest_id}.")
 
     prereq = quest["prerequisite"]
-    if prereq != 'NONE' and prereq not in character["completed_quests"]:
+    if prereq != 'NONE' and prereq not in completed:
         raise QuestRequirementsNotMetError(f"Must complete {prereq} before advancing.")
 
-    character["active_quests"].append(quest_id)
+    active.append(quest_id)
+    tracker = character.get("quest_tracker")
+    if tracker is not None:
+        tracker.quest_accepted(quest_id)
     return True
     """
     Accept a new quest
@@ -91,13 +164,14 @@ def complete_quest(character, quest_id, quest_data_dict):
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest '{quest_id}' does not exist.")
 
-    if quest_id not in character["active_quests"]:
+    active = get_quest_list(character, "active_quests")
+    if quest_id not in active:
         raise QuestNotActiveError(f"Cannot complete '{quest_id}' — not active.")
 
     quest = quest_data_dict[quest_id]
 
-    character["active_quests"].remove(quest_id)
-    character["completed_quests"].append(quest_id)
+    active.remove(quest_id)
+    get_quest_list(character, "completed_quests").append(quest_id)
 
     xp_reward = quest["reward_xp"]
     gold_reward = quest["reward_gold"]
@@ -105,6 +179,10 @@ def complete_quest(character, quest_id, quest_data_dict):
     character["experience"] += xp_reward
     character["gold"] += gold_reward
 
+    tracker = character.get("quest_tracker")
+    if tracker is not None:
+        tracker.quest_completed(quest_id)
+
     return {"xp": xp_reward, "gold": gold_reward}
     # TODO: Implement quest completion
     # Check quest exists
@@ -122,10 +200,14 @@ def abandon_quest(character, quest_id):
     Returns: True if abandoned
     Raises: QuestNotActiveError if quest not active
     """
-    if quest_id not in character["active_quests"]:
+    active = get_quest_list(character, "active_quests")
+    if quest_id not in active:
         raise QuestNotActiveError(f"Quest '{quest_id}' is not active.")
 
-    character["active_quests"].remove(quest_id)
+    active.remove(quest_id)
+    tracker = character.get("quest_tracker")
+    if tracker is not None:
+        tracker.quest_abandoned(quest_id)
     return True
 
     # TODO: Implement quest abandonment
@@ -136,7 +218,7 @@ def get_active_quests(character, quest_data_dict):
     Get full data for all active quests
     Returns: List of quest dictionaries for active quests
     """
-    return [quest_data_dict[qid] for qid in character["active_quests"]]
+    return [quest_data_dict[qid] for qid in get_quest_list(character, "active_quests")]
 
     # TODO: Implement active quest retrieval
     # Look up each quest_id in character['active_quests']
@@ -148,34 +230,51 @@ def get_completed_quests(character, quest_data_dict):
     Get full data for all completed quests
     Returns: List of quest dictionaries for completed quests
     """
-    return [quest_data_dict[qid] for qid in character["completed_quests"]]
+    return [quest_data_dict[qid] for qid in get_quest_list(character, "completed_quests")]
 
     # TODO: Implement completed quest retrieval
 
 
-def get_available_quests(character, quest_data_dict):
+def get_available_quests(character, quest_data_dict, quest_index=None):
     """
     Get quests that character can currently accept
     
     Available = meets level req + prerequisite done + not completed + not active
     
+    A character with a QuestTracker for these quests is answered from it
+    directly. Otherwise, with a quest_index only quests without a
+    prerequisite and the quests unlocked by completed ones are checked,
+    instead of every quest.
+    
     Returns: List of quest dictionaries
     """
+    tracker = get_quest_tracker(character, quest_data_dict)
+    if tracker is not None:
+        return tracker.available_quests()
+
     available = []
 
-    for qid, quest in quest_data_dict.items():
+    if quest_index is None:
+        candidates = quest_data_dict.items()
+    else:
+        candidates = [(qid, quest_data_dict[qid]) for qid in get_unlockable_quests(character, quest_index)]
+
+    completed = get_quest_list(character, "completed_quests")
+    active = get_quest_list(character, "active_quests")
+
+    for qid, quest in candidates:
         # Skip completed
-        if qid in character["completed_quests"]:
+        if qid in completed:
             continue
 
-        if qid in character["active_quests"]:
+        if qid in active:
             continue
 
         if character["level"] < quest["required_level"]:
             continue
 
         prereq = quest["prerequisite"]
-        if prereq != "NONE" and prereq not in character["completed_quests"]:
+        if prereq != "NONE" and prereq not in completed:
             continue
 
         available.append(quest)
@@ -196,7 +295,7 @@ def is_quest_completed(character, quest_id):
     
     Returns: True if completed, False otherwise
     """
-    return quest_id in character["completed_quests"]
+    return quest_id in get_quest_list(character, "completed_quests")
     # TODO: Implement completion check
 
 
@@ -206,7 +305,7 @@ def is_quest_active(character, quest_id):
     
     Returns: True if active, False otherwise
     """
-    return quest_id in character["active_quests"]
+    return quest_id in get_quest_list(character, "active_quests")
     # TODO: Implement active check
 
 
@@ -221,18 +320,19 @@ def can_accept_quest(character, quest_id, quest_data_dict):
         return False
 
     quest = quest_data_dict[quest_id]
+    completed = get_quest_list(character, "completed_quests")
 
-    if quest_id in character["completed_quests"]:
+    if quest_id in completed:
         return False
 
-    if quest_id in character["active_quests"]:
+    if quest_id in get_quest_list(character, "active_quests"):
         return False
 
     if character["level"] < quest["required_level"]:
         return False
 
     prereq = quest["prerequisite"]
-    if prereq != "NONE" and prereq not in character["completed_quests"]:
+    if prereq != "NONE" and prereq not in completed:
         return False
 
     return True
@@ -240,7 +340,7 @@ def can_accept_quest(character, quest_id, quest_data_dict):
     # Check all requirements without raising exceptions
 
 
-def get_quest_prerequisite_chain(quest_id, quest_data_dict):
+def get_quest_prerequisite_chain(quest_id, quest_data_dict, quest_index=None):
     """
     Get the full chain of prerequisites for a quest
     
@@ -248,18 +348,29 @@ def get_quest_prerequisite_chain(quest_id, quest_data_dict):
     Example: If Quest C requires Quest B, which requires Quest A:
              Returns ["quest_a", "quest_b", "quest_c"]
     
-    Raises: QuestNotFoundError if quest doesn't exist
+    Chains are memoized in quest_index when one is given.
+    
+    Raises:
+        QuestNotFoundError if quest doesn't exist
+        InvalidDataFormatError if the prerequisites loop
     """
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest '{quest_id}' does not exist.")
 
+    if quest_index is not None:
+        return list(get_indexed_chain(quest_index, quest_id))
+
     chain = []
+    seen = set()
     current = quest_id
 
     while True:
         if current not in quest_data_dict:
             raise QuestNotFoundError(f"Quest '{current}' in chain does not exist.")
+        if current in seen:
+            raise InvalidDataFormatError(f"Quest prerequisites loop at '{current}'.")
 
+        seen.add(current)
         chain.append(current)
 
         prereq = quest_data_dict[current]["prerequisite"]
@@ -275,6 +386,247 @@ def get_quest_prerequisite_chain(quest_id, quest_data_dict):
     # Build list in reverse order
 
 
+# ============================================================================
+# QUEST INDEX
+# ============================================================================
+
+def build_quest_index(quest_data_dict):
+    """
+    Build the prerequisite graph for all quests once, at load time
+
+    Index keys:
+        parent:   quest_id -> prerequisite quest_id (None for "NONE")
+        children: quest_id -> list of quests it unlocks, in load order
+        roots:    quests without a prerequisite, in load order
+        order:    topological order (every quest after its prerequisite)
+        rank:     quest_id -> position in the quest file
+        chains:   memo of quest_id -> tuple chain, filled on demand
+        by_level: quest ids sorted by required level (file order within a level)
+        levels:   the required level of each quest in by_level, for bisect
+        level_buckets: required level -> list of quest ids
+
+    Quests whose prerequisite is missing or part of a loop are left out
+    of 'order'.
+
+    Returns: Quest index dictionary
+    """
+    parent = {}
+    children = {}
+    roots = []
+    rank = {}
+    for position, (qid, quest) in enumerate(quest_data_dict.items()):
+        rank[qid] = position
+        children.setdefault(qid, [])
+        prereq = quest["prerequisite"]
+        if prereq == "NONE":
+            parent[qid] = None
+            roots.append(qid)
+        else:
+            parent[qid] = prereq
+            children.setdefault(prereq, []).append(qid)
+
+    # Kahn's algorithm; with one prerequisite per quest every quest has
+    # in-degree 0 or 1, so it's a breadth-first walk out from the roots
+    order = []
+    queue = deque(roots)
+    while queue:
+        qid = queue.popleft()
+        order.append(qid)
+        queue.extend(children[qid])
+
+    by_level = sorted(quest_data_dict, key=lambda qid: quest_data_dict[qid]["required_level"])
+    levels = [quest_data_dict[qid]["required_level"] for qid in by_level]
+    level_buckets = {}
+    for qid, level in zip(by_level, levels):
+        level_buckets.setdefault(level, []).append(qid)
+
+    return {
+        "parent": parent,
+        "children": children,
+        "roots": roots,
+        "order": order,
+        "rank": rank,
+        "chains": {},
+        "by_level": by_level,
+        "levels": levels,
+        "level_buckets": level_buckets
+    }
+
+def get_indexed_chain(quest_index, quest_id):
+    """
+    Get a quest's prerequisite chain from the index
+
+    Walks up only until it reaches a quest whose chain is already
+    memoized, so each call is at most O(chain length). Only the
+    requested chain is stored, keeping deep chains from costing
+    quadratic memory.
+
+    Returns: Tuple of quest IDs [earliest_prereq, ..., quest_id]
+    Raises:
+        QuestNotFoundError if a quest in the chain doesn't exist
+        InvalidDataFormatError if the prerequisites loop
+    """
+    chains = quest_index["chains"]
+    parent = quest_index["parent"]
+    path = []
+    seen = set()
+    current = quest_id
+    while current is not None and current not in chains:
+        if current not in parent:
+            raise QuestNotFoundError(f"Quest '{current}' in chain does not exist.")
+        if current in seen:
+            raise InvalidDataFormatError(f"Quest prerequisites loop at '{current}'.")
+        seen.add(current)
+        path.append(current)
+        current = parent[current]
+
+    if not path:
+        return chains[quest_id]
+    path.reverse()
+    chain = (chains[current] if current is not None else ()) + tuple(path)
+    chains[quest_id] = chain
+    return chain
+
+def get_unlocked_quests(quest_id, quest_index):
+    """
+    Returns: List of quest IDs that have quest_id as their prerequisite
+    """
+    return quest_index["children"].get(quest_id, [])
+
+def get_unlockable_quests(character, quest_index):
+    """
+    Get the quests whose prerequisite a character has met
+
+    Only the roots and the quests unlocked by completed quests are looked
+    at. Level, active and completed checks are left to the caller.
+
+    Returns: List of quest IDs in quest file order
+    """
+    children = quest_index["children"]
+    unlockable = list(quest_index["roots"])
+    for qid in get_quest_list(character, "completed_quests"):
+        unlockable.extend(children.get(qid, ()))
+    unlockable.sort(key=quest_index["rank"].__getitem__)
+    return unlockable
+
+def get_level_range(quest_index, min_level=None, max_level=None):
+    """
+    Get the quest ids whose required level is within a range
+
+    Two bisects and a slice; either bound may be None for no limit.
+    A single level is a direct level_buckets lookup.
+
+    Returns: List of quest IDs sorted by required level
+    """
+    if min_level is not None and min_level == max_level:
+        return list(quest_index["level_buckets"].get(min_level, ()))
+    levels = quest_index["levels"]
+    start = 0 if min_level is None else bisect_left(levels, min_level)
+    end = len(levels) if max_level is None else bisect_right(levels, max_level)
+    return quest_index["by_level"][start:end]
+
+def find_quests(quest_data_dict, quest_index, min_level=None, max_level=None,
+                character=None, not_completed=False, prerequisites_met=False):
+    """
+    Find quests with any combination of filters, e.g. for the quest board
+
+    Args:
+        quest_data_dict: Dictionary of all quest data
+        quest_index: Index from build_quest_index
+        min_level, max_level: Required level range (None for no limit)
+        character: Character the two filters below are checked against
+        not_completed: Leave out quests the character has completed
+        prerequisites_met: Leave out quests whose prerequisite isn't completed
+
+    Returns: List of quest dictionaries sorted by required level
+    Raises: ValueError if a character filter is asked for without a character
+    """
+    if character is None and (not_completed or prerequisites_met):
+        raise ValueError("Completion filters need a character.")
+    found = get_level_range(quest_index, min_level, max_level)
+    if character is not None:
+        completed = get_quest_list(character, "completed_quests")
+        parent = quest_index["parent"]
+        if not_completed:
+            found = [qid for qid in found if qid not in completed]
+        if prerequisites_met:
+            found = [qid for qid in found if parent[qid] is None or parent[qid] in completed]
+    return [quest_data_dict[qid] for qid in found]
+
+# ============================================================================
+# AVAILABLE QUEST TRACKER
+# ============================================================================
+
+class QuestTracker:
+    """
+    Keeps one character's available quests up to date as events happen
+
+    Creating a tracker attaches it to the character
+    (character['quest_tracker']); accept_quest, complete_quest,
+    abandon_quest and character_manager.gain_experience then report to it.
+    Each event only looks at the quests it can affect: the quest itself,
+    the quests it unlocks (through the index's reverse prerequisite links)
+    or the quests waiting on the levels just reached.
+
+    Quests whose prerequisite is done but whose level is too high wait in
+    level buckets. Call rebuild() after editing the quest lists directly.
+    """
+
+    def __init__(self, character, quest_data_dict, quest_index=None):
+        self.character = character
+        self.quests = quest_data_dict
+        self.index = quest_index if quest_index is not None else build_quest_index(quest_data_dict)
+        self.rebuild()
+        character["quest_tracker"] = self
+
+    def rebuild(self):
+        """Recompute everything from the character's quest lists, O(quests)"""
+        self.level = self.character.get("level", 1)
+        self.available = {}
+        self.waiting = {}
+        for qid in get_unlockable_quests(self.character, self.index):
+            self._consider(qid)
+
+    def _consider(self, qid):
+        # Caller has checked the prerequisite; place the quest by level
+        if is_quest_completed(self.character, qid) or is_quest_active(self.character, qid):
+            return
+        required = self.quests[qid]["required_level"]
+        if required <= self.level:
+            self.available[qid] = None
+        else:
+            self.waiting.setdefault(required, set()).add(qid)
+
+    def quest_accepted(self, qid):
+        self.available.pop(qid, None)
+
+    def quest_abandoned(self, qid):
+        self._consider(qid)
+
+    def quest_completed(self, qid):
+        self.available.pop(qid, None)
+        for child in get_unlocked_quests(qid, self.index):
+            self._consider(child)
+
+    def level_changed(self, level):
+        """Release the quests waiting on every level up to the new one"""
+        waiting = self.waiting
+        for reached in range(self.level + 1, level + 1):
+            for qid in waiting.pop(reached, ()):
+                self.available[qid] = None
+        self.level = level
+
+    def available_quests(self):
+        """Returns: List of quest dictionaries, O(number available)"""
+        return [self.quests[qid] for qid in self.available]
+
+def get_quest_tracker(character, quest_data_dict):
+    """Returns: The character's QuestTracker for these quests, or None"""
+    tracker = character.get("quest_tracker")
+    if tracker is not None and tracker.quests is quest_data_dict:
+        return tracker
+    return None
+
 # ============================================================================
 # QUEST STATISTICS
 # ============================================================================
@@ -289,7 +641,7 @@ def get_quest_completion_percentage(character, quest_data_dict):
     if total == 0:
         return 0.0
 
-    completed = len(character["completed_quests"])
+    completed = len(get_quest_list(character, "completed_quests"))
     return (completed / total) * 100
     # TODO: Implement percentage calculation
     # total_quests = len(quest_data_dict)
@@ -306,7 +658,7 @@ def get_total_quest_rewards_earned(character, quest_data_dict):
     total_xp = 0
     total_gold = 0
 
-    for qid in character["completed_quests"]:
+    for qid in get_quest_list(character, "completed_quests"):
         if qid in quest_data_dict:
             quest = quest_data_dict[qid]
             total_xp += quest["reward_xp"]
@@ -317,12 +669,18 @@ def get_total_quest_rewards_earned(character, quest_data_dict):
     # Sum up reward_xp and reward_gold for all completed quests
 
 
-def get_quests_by_level(quest_data_dict, min_level, max_level):
+def get_quests_by_level(quest_data_dict, min_level, max_level, quest_index=None):
     """
     Get all quests within a level range
     
+    With a quest_index the range is found by bisecting the level-sorted
+    quest ids, and the result is in level order.
+    
     Returns: List of quest dictionaries
     """
+    if quest_index is not None:
+        return [quest_data_dict[qid] for qid in get_level_range(quest_index, min_level, max_level)]
+
     return[
         quest
     for quest in quest_data_dict.values()
@@ -376,8 +734,8 @@ def display_character_quest_progress(character, quest_data_dict):
     - Total rewards earned
     """
     total = len(quest_data_dict)
-    completed = len(character["completed_quests"])
-    active = len(character["active_quests"])
+    completed = len(get_quest_list(character, "completed_quests"))
+    active = len(get_quest_list(character, "active_quests"))
     percent = get_quest_completion_percentage(character, quest_data_dict)
     rewards = get_total_quest_rewards_earned(character, quest_data_dict)
 
@@ -0,0 +1,169 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Shop Pricing Module
+
+Dynamic shop prices driven by supply and demand, the buyer's reputation
+and the region the shop is in.
+
+Buys and sells are only counted as they happen; prices are recomputed
+for every item at once when tick() is called and stored in flat tables,
+so looking up a price is a dictionary read, however many transactions
+go through between ticks.
+
+Usage:
+    pricing = PricingEngine(all_items, region="frontier")
+    inventory_system.purchase_item(hero, "health_potion", all_items["health_potion"],
+                                   pricing=pricing)
+    pricing.tick()      # e.g. each time the player enters the shop
+"""
+
+from bisect import bisect_right
+from itertools import count
+from weakref import WeakValueDictionary
+
+from custom_exceptions import ItemNotFoundError
+
+# Price change per unit of net demand (bought minus sold) an item has built up
+DEMAND_SENSITIVITY = 0.01
+
+# How much built-up demand carries over to the next tick
+DEMAND_DECAY = 0.5
+
+# Demand can never push prices outside these multiples of the base cost
+MIN_PRICE_FACTOR = 0.5
+MAX_PRICE_FACTOR = 2.0
+
+# Shops buy items back at this fraction of their current price
+SELL_RATIO = 0.5
+
+# (completed quests needed, discount on purchases)
+REPUTATION_TIERS = [
+    (0, 0.0),
+    (3, 0.05),
+    (6, 0.10),
+    (10, 0.15)
+]
+REPUTATION_THRESHOLDS = [quests for quests, _ in REPUTATION_TIERS]
+
+REGION_MULTIPLIERS = {
+    "town": 1.0,
+    "capital": 0.9,
+    "frontier": 1.25
+}
+
+# engine_id -> live PricingEngine, so records can name an engine without
+# keeping it alive
+ENGINES = WeakValueDictionary()
+_next_engine_id = count(1)
+
+def get_engine(engine_id):
+    """Returns: The pricing engine with this id, or None if it no longer exists"""
+    return ENGINES.get(engine_id)
+
+def get_reputation_tier(character):
+    """
+    Get a character's reputation tier from their completed quests
+
+    Returns: Index into REPUTATION_TIERS (0 for no character)
+    """
+    if not character:
+        return 0
+    completed = len(character.get("completed_quests", ()))
+    return bisect_right(REPUTATION_THRESHOLDS, completed) - 1
+
+class PricingEngine:
+    """
+    Supply/demand pricing for one shop, cached into flat price tables
+
+    buy_prices[tier][item_id] and sell_prices[item_id] always hold the
+    prices as of the last tick(). With no trades, no reputation and the
+    'town' region they equal the static item cost and cost // 2.
+    engine_id finds the engine again through get_engine().
+    """
+
+    def __init__(self, item_data, region="town"):
+        if region not in REGION_MULTIPLIERS:
+            raise ValueError(f"Unknown region: {region}")
+        self.base_cost = {item_id: item["cost"] for item_id, item in item_data.items()}
+        self.region = region
+        self.demand = dict.fromkeys(self.base_cost, 0.0)
+        self.bought = dict.fromkeys(self.base_cost, 0)
+        self.sold = dict.fromkeys(self.base_cost, 0)
+        self.buy_prices = [{} for _ in REPUTATION_TIERS]
+        self.sell_prices = {}
+        self.ticks = 0
+        self.engine_id = next(_next_engine_id)
+        ENGINES[self.engine_id] = self
+        self.recompute()
+
+    def set_region(self, region):
+        """Move the shop to another region and reprice everything"""
+        if region not in REGION_MULTIPLIERS:
+            raise ValueError(f"Unknown region: {region}")
+        self.region = region
+        self.recompute()
+
+    def record_purchase(self, item_id, quantity=1):
+        self.bought[item_id] = self.bought.get(item_id, 0) + quantity
+
+    def record_sale(self, item_id, quantity=1):
+        self.sold[item_id] = self.sold.get(item_id, 0) + quantity
+
+    def tick(self):
+        """
+        Fold the trades since the last tick into demand and reprice every item
+
+        Returns: Number of items repriced
+        """
+        for item_id in self.base_cost:
+            net = self.bought[item_id] - self.sold[item_id]
+            self.demand[item_id] = self.demand[item_id] * DEMAND_DECAY + net
+            self.bought[item_id] = 0
+            self.sold[item_id] = 0
+        self.ticks += 1
+        return self.recompute()
+
+    def recompute(self):
+        """
+        Rebuild the price tables from current demand without folding in trades
+
+        Returns: Number of items repriced
+        """
+        region = REGION_MULTIPLIERS[self.region]
+        discounts = [1 - discount for _, discount in REPUTATION_TIERS]
+        for item_id, cost in self.base_cost.items():
+            factor = 1 + DEMAND_SENSITIVITY * self.demand[item_id]
+            factor = min(MAX_PRICE_FACTOR, max(MIN_PRICE_FACTOR, factor))
+            price = cost * factor * region
+            for tier, multiplier in enumerate(discounts):
+                self.buy_prices[tier][item_id] = max(1, int(price * multiplier))
+            self.sell_prices[item_id] = int(price * SELL_RATIO)
+        return len(self.base_cost)
+
+    def buy_price(self, item_id, character=None):
+        """
+        Get what a character pays for one of an item
+
+        Returns: Integer price
+        Raises: ItemNotFoundError if the shop doesn't price this item
+        """
+        try:
+            return self.buy_prices[get_reputation_tier(character)][item_id]
+        except KeyError:
+            raise ItemNotFoundError(f"{item_id} has no price.")
+
+    def sell_price(self, item_id):
+        """
+        Get what the shop pays for one of an item
+
+        Returns: Integer price
+        Raises: ItemNotFoundError if the shop doesn't price this item
+        """
+        try:
+            return self.sell_prices[item_id]
+        except KeyError:
+            raise ItemNotFoundError(f"{item_id} has no price.")
+
+    def price_table(self, character=None):
+        """Returns: Dictionary of item_id -> buy price for this character's tier"""
+        return self.buy_prices[get_reputation_tier(character)]
@@ -0,0 +1,264 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Stash Store Module
+
+Account-level stashes shared between a player's characters.
+
+A stash is a dictionary with an 'inventory' and 'gold' just like a
+character, so every inventory_system function (add_item_to_inventory,
+count_item, purchase_item, ...) accepts a stash in place of a character.
+The store indexes stashes by owner, moves items and gold between any two
+holders atomically, and only rewrites the stash files that changed.
+
+Usage:
+    store = StashStore()
+    store.load()
+    shared = store.get_or_create_stash("kim")
+    store.transfer(hero, shared, "health_potion", 5)
+    store.save()
+"""
+
+import os
+from contextlib import nullcontext
+
+import inventory_system
+from inventory_system import Inventory
+from custom_exceptions import (
+    ItemNotFoundError,
+    InsufficientResourcesError,
+    SaveFileCorruptedError,
+    InvalidSaveDataError
+)
+
+DEFAULT_STASH_DIRECTORY = "data/stashes"
+
+# Slots in a new stash; stashes have no per-type limits
+DEFAULT_STASH_CAPACITY = 60
+
+# Stash fields stored as plain integers
+STASH_INT_FIELDS = ["capacity", "gold"]
+
+class StashChangeTracker:
+    """
+    Stands in for an InventoryJournal on a stash
+
+    inventory_system reports every item and gold change to the holder's
+    journal, so this only has to note which stash changed.
+    """
+
+    def __init__(self, store, stash_id):
+        self.store = store
+        self.stash_id = stash_id
+
+    def record(self, *entry):
+        self.store.dirty.add(self.stash_id)
+
+    def transaction(self, label):
+        return nullcontext(self)
+
+
+class StashStore:
+    """
+    All stashes in one directory, indexed by stash id and by owner
+
+    Any change made to a stash, through this store or directly through
+    inventory_system, marks it dirty; save() writes only those stashes.
+    """
+
+    def __init__(self, directory=DEFAULT_STASH_DIRECTORY, item_data=None):
+        self.directory = directory
+        self.item_data = item_data
+        self.stashes = {}
+        self.by_owner = {}
+        self.dirty = set()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _add(self, stash):
+        stash_id = stash["stash_id"]
+        if self.item_data is not None:
+            stash["item_data"] = self.item_data
+        tracker = StashChangeTracker(self, stash_id)
+        stash["journal"] = tracker
+        inventory_system.get_inventory(stash).journal = tracker
+        self.stashes[stash_id] = stash
+        self.by_owner.setdefault(stash["owner"], []).append(stash_id)
+
+    def create_stash(self, owner, name="shared", capacity=DEFAULT_STASH_CAPACITY):
+        """
+        Create an empty stash for an owner
+
+        Returns: The new stash dictionary (id '{owner}_{name}')
+        Raises: InvalidSaveDataError if that stash already exists
+        """
+        stash_id = f"{owner}_{name}"
+        if stash_id in self.stashes:
+            raise InvalidSaveDataError(f"Stash {stash_id} already exists")
+        stash = {
+            "stash_id": stash_id,
+            "owner": owner,
+            "capacity": capacity,
+            "slot_capacity": {},
+            "gold": 0,
+            "inventory": Inventory()
+        }
+        self._add(stash)
+        self.dirty.add(stash_id)
+        return stash
+
+    def get_stash(self, stash_id):
+        """
+        Returns: The stash with this id
+        Raises: ItemNotFoundError if there is no such stash
+        """
+        try:
+            return self.stashes[stash_id]
+        except KeyError:
+            raise ItemNotFoundError(f"No stash named {stash_id}")
+
+    def get_or_create_stash(self, owner, name="shared"):
+        stash = self.stashes.get(f"{owner}_{name}")
+        return stash if stash is not None else self.create_stash(owner, name)
+
+    def stashes_for(self, owner):
+        """Returns: List of the owner's stashes"""
+        return [self.stashes[stash_id] for stash_id in self.by_owner.get(owner, ())]
+
+    # ------------------------------------------------------------------
+    # Transfers
+    # ------------------------------------------------------------------
+
+    def transfer(self, source, target, item_id, quantity=1):
+        """
+        Move items from one holder (character or stash) to another
+
+        Either every item moves or nothing changes. Transfers aren't undoable:
+        they touch two holders and run outside both journals, so a
+        character's undo() refuses to reach back past one.
+
+        Returns: True if moved
+        Raises:
+            ItemNotFoundError if the source holds fewer than quantity
+            InventoryFullError if the target has no room
+        """
+        source_inventory = inventory_system.get_inventory(source)
+        if quantity < 1 or source_inventory.count(item_id) < quantity:
+            raise ItemNotFoundError(f"Not enough {item_id} to move.")
+
+        item_data = inventory_system.lookup_item(source, item_id)
+        if item_data is None:
+            # Keep the stack rules the source is already using
+            item_data = {"type": source_inventory.kind[item_id],
+                         "max_stack": source_inventory.stack[item_id]}
+        plan = inventory_system.plan_inventory_additions(target, [(item_id, quantity, item_data)])
+
+        # Everything has been checked; nothing below can fail
+        source_inventory.discard(item_id, quantity)
+        target_inventory = inventory_system.get_inventory(target)
+        for _, count, max_stack, slot_type in plan:
+            target_inventory.add(item_id, count, max_stack, slot_type)
+        return True
+
+    def transfer_gold(self, source, target, amount):
+        """
+        Move gold from one holder to another
+
+        Like transfer(), this can't be undone from either holder.
+
+        Returns: True if moved
+        Raises: InsufficientResourcesError if the source has less than amount
+        """
+        if amount < 0 or source.get("gold", 0) < amount:
+            raise InsufficientResourcesError("Not enough gold to move.")
+        inventory_system.change_gold(source, -amount)
+        inventory_system.change_gold(target, amount)
+        return True
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def stash_filename(self, stash_id):
+        return os.path.join(self.directory, f"{stash_id}_stash.txt")
+
+    def save(self):
+        """
+        Write every stash changed since the last save or load
+
+        Returns: Number of stash files written
+        Raises: SaveFileCorruptedError if a file can't be written
+        """
+        if not self.dirty:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        written = 0
+        for stash_id in sorted(self.dirty):
+            stash = self.stashes[stash_id]
+            try:
+                with open(self.stash_filename(stash_id), "w") as f:
+                    f.write(f"STASH_ID: {stash_id}\n")
+                    f.write(f"OWNER: {stash['owner']}\n")
+                    f.write(f"CAPACITY: {stash['capacity']}\n")
+                    f.write(f"GOLD: {stash['gold']}\n")
+                    f.write(f"INVENTORY: {','.join(stash['inventory'])}\n")
+            except OSError as e:
+                raise SaveFileCorruptedError(str(e))
+            written += 1
+        self.dirty.clear()
+        return written
+
+    def load(self):
+        """
+        Load every stash file in the store's directory
+
+        Returns: Number of stashes loaded
+        Raises:
+            SaveFileCorruptedError if a file can't be read
+            InvalidSaveDataError if a file is missing fields or has bad numbers
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        loaded = 0
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith("_stash.txt"):
+                self._add(load_stash_file(os.path.join(self.directory, filename)))
+                loaded += 1
+        return loaded
+
+def load_stash_file(filename):
+    """
+    Read one stash file written by StashStore.save
+
+    Returns: Stash dictionary
+    Raises: SaveFileCorruptedError, InvalidSaveDataError
+    """
+    try:
+        with open(filename, "r") as f:
+            lines = f.readlines()
+    except OSError as e:
+        raise SaveFileCorruptedError(f"Error: {e} — {filename} can't be read")
+
+    stash = {"slot_capacity": {}}
+    for line in lines:
+        if ":" not in line:
+            raise InvalidSaveDataError("Invalid line: " + line)
+        key, value = line.strip().split(":", 1)
+        key = key.lower().strip()
+        value = value.strip()
+
+        if key == "inventory":
+            # Upgraded to an Inventory (with stack rules) when the store adds it
+            stash[key] = value.split(",") if value else []
+        elif key in STASH_INT_FIELDS:
+            if not value.isdigit():
+                raise InvalidSaveDataError(f"Invalid number for {key}: {value}")
+            stash[key] = int(value)
+        else:
+            stash[key] = value
+
+    for field in ["stash_id", "owner", "capacity", "gold", "inventory"]:
+        if field not in stash:
+            raise InvalidSaveDataError(f"Missing field: {field}")
+    return stash
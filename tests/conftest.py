@@ -0,0 +1,37 @@
+"""
+Shared test fixtures
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import character_manager
+import inventory_system
+
+@pytest.fixture
+def make_character():
+    """Factory for minimal level 1 characters that never touch save files"""
+    def make(char_class='Warrior', name='Hero', **stats):
+        character = {
+            'name': name, 'class': char_class, 'level': 1,
+            'health': 120, 'max_health': 120, 'strength': 15, 'magic': 5
+        }
+        character.update(stats)
+        return character
+    return make
+
+@pytest.fixture
+def make_hero():
+    """Factory for new characters from create_character, with optional item data and journal"""
+    def make(name='Hero', char_class='Warrior', item_data=None, journal=False, **fields):
+        hero = character_manager.create_character(name, char_class)
+        hero.update(fields)
+        if item_data is not None:
+            hero['item_data'] = item_data
+        if journal:
+            inventory_system.InventoryJournal(hero)
+        return hero
+    return make
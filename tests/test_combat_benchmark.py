@@ -0,0 +1,60 @@
+"""
+Test Combat Benchmarks
+Tests the benchmark runner and baseline comparison
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import combat_benchmark
+
+def test_suite_covers_every_benchmark():
+    """Test that a small run produces a result per benchmark and scale"""
+    results = combat_benchmark.run_suite(scales=(1, 5))
+
+    assert len(results) == 2 * len(combat_benchmark.BENCHMARKS)
+    assert "ability_cleric@5" in results
+    assert results["battle@5"]["ops"] == 5
+    assert results["battle@5"]["ops_per_sec"] > 0
+
+def test_battle_benchmark_fights_every_enemy_type(monkeypatch):
+    """Test that battles rotate through every enemy type and AI policy"""
+    fought = []
+    create_enemy = combat_benchmark.combat_system.create_enemy
+
+    def recording_create_enemy(enemy_type):
+        fought.append(enemy_type)
+        return create_enemy(enemy_type)
+
+    monkeypatch.setattr(combat_benchmark.combat_system, "create_enemy", recording_create_enemy)
+    combat_benchmark.bench_battle(len(combat_benchmark.combat_system.ENEMY_TYPES), 1)
+
+    assert sorted(fought) == sorted(combat_benchmark.combat_system.ENEMY_TYPES)
+
+def test_regression_detected_against_baseline(tmp_path):
+    """Test that slowdowns past the threshold are reported"""
+    filename = str(tmp_path / "baseline.json")
+    baseline = {"battle@1000": {"ops": 1000, "seconds": 1.0,
+                                "ops_per_sec": 1000.0, "peak_bytes_per_op": 500.0}}
+    combat_benchmark.save_baseline(baseline, filename)
+
+    slower = {"battle@1000": dict(baseline["battle@1000"], ops_per_sec=700.0)}
+    close = {"battle@1000": dict(baseline["battle@1000"], ops_per_sec=900.0)}
+    loaded = combat_benchmark.load_baseline(filename)
+
+    assert len(combat_benchmark.compare_to_baseline(slower, loaded, 0.2)) == 1
+    assert combat_benchmark.compare_to_baseline(close, loaded, 0.2) == []
+
+def test_command_line_update_then_compare(tmp_path, capsys):
+    """Test that the CLI writes a baseline and compares against it"""
+    filename = str(tmp_path / "baseline.json")
+
+    assert combat_benchmark.main(["--scales", "2", "--baseline", filename, "--update"]) == 0
+    assert combat_benchmark.main(["--scales", "2", "--baseline", filename]) == 0
+    assert "battle@2" in capsys.readouterr().out
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,70 @@
+"""
+Test Combat Profiler
+Tests per-phase battle instrumentation
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import battle_log
+import combat_profiler
+import combat_system
+
+def run_battle(character, profiler, seed):
+    battle = combat_system.SimpleBattle(
+        character, combat_system.create_enemy("goblin"),
+        log=battle_log.NullSink(), seed=seed,
+        actions=combat_system.always_attack, profiler=profiler
+    )
+    result = battle.start_battle()
+    return battle, result
+
+def test_profiler_counts_every_phase(make_character):
+    """Test that each phase is timed once per occurrence"""
+    profiler = combat_profiler.BattleProfiler()
+    battle, result = run_battle(make_character(), profiler, 1)
+
+    calls = battle.stats.calls
+    turns = result['turns']
+    assert calls['render'] == turns
+    assert calls['input'] == turns
+    assert calls['damage'] == 2 * turns - 1
+    assert calls['end_check'] == 2 * turns - 1
+    assert battle.stats.total_ns() > 0
+
+def test_hooks_see_phases_in_order(make_character):
+    """Test that before and after hooks wrap each phase"""
+    seen = []
+    profiler = combat_profiler.BattleProfiler(
+        before=lambda phase, battle: seen.append(("before", phase)),
+        after=lambda phase, battle, ns: seen.append(("after", phase))
+    )
+    run_battle(make_character(), profiler, 2)
+
+    assert seen[:4] == [("before", "render"), ("after", "render"),
+                        ("before", "input"), ("after", "input")]
+
+def test_unprofiled_battle_is_untouched(make_character):
+    """Test that battles without a profiler keep their plain methods"""
+    battle, result = run_battle(make_character(), None, 3)
+    assert battle.stats is None
+    assert 'choose_action' not in vars(battle)
+
+def test_summary_across_battles(make_character):
+    """Test the report combining many battles"""
+    profiler = combat_profiler.BattleProfiler()
+    for seed in range(20):
+        run_battle(make_character(), profiler, seed)
+
+    summary = profiler.summary()
+    report = combat_profiler.format_profile_report(summary)
+
+    assert summary['battles'] == 20
+    assert abs(sum(p['share'] for p in summary['phases'].values()) - 1.0) < 1e-9
+    assert "end_check" in report
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
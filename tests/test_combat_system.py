@@ -0,0 +1,410 @@
+"""
+Test Combat System
+Tests encounter generation and battle mechanics in combat_system
+"""
+
+import pytest
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import battle_log
+import battle_replay
+import combat_system
+import inventory_system
+from custom_exceptions import *
+
+# ============================================================================
+# ENCOUNTER TABLE TESTS
+# ============================================================================
+
+def test_alias_table_matches_weights():
+    """Test that alias sampling follows the configured weights"""
+    table = combat_system.build_alias_table([1, 3])
+    rng = random.Random(7)
+
+    draws = [combat_system.sample_alias(table, rng) for _ in range(20000)]
+
+    share = draws.count(1) / len(draws)
+    assert 0.72 < share < 0.78
+
+def test_alias_table_rejects_empty_weights():
+    """Test that an alias table needs positive weights"""
+    with pytest.raises(ValueError):
+        combat_system.build_alias_table([])
+
+def test_random_enemy_respects_level_range():
+    """Test that encounters only use enemies listed for the level"""
+    rng = random.Random(1)
+    low = set(combat_system.roll_enemy_types(1, 500, rng))
+    high = set(combat_system.roll_enemy_types(10, 500, rng))
+
+    assert low == {"goblin", "orc"}
+    assert high == {"orc", "dragon"}
+
+    enemy = combat_system.get_random_enemy_for_level(4, random.Random(3))
+    assert enemy['health'] == enemy['max_health'] > 0
+
+# ============================================================================
+# LOOT TABLE TESTS
+# ============================================================================
+
+def test_roll_loot_follows_table():
+    """Test that drops come from the enemy's table and repeat with a seed"""
+    first = [combat_system.roll_loot("orc", random.Random(seed)) for seed in range(200)]
+    again = [combat_system.roll_loot("orc", random.Random(seed)) for seed in range(200)]
+    assert first == again
+
+    orc_items = {entry[0] for entry in combat_system.LOOT_TABLES['orc']}
+    drops = [drop for drop in first if drop is not None]
+    assert drops and len(drops) < len(first)
+    assert all(item_id in orc_items and quantity >= 1 for item_id, quantity in drops)
+    assert combat_system.roll_loot("slime") is None
+
+def test_roll_loot_batch_totals():
+    """Test batch rolls against the table's weights"""
+    totals = combat_system.roll_loot_batch("dragon", 4000, random.Random(5))
+
+    # Dragons always drop something; potions are 45% of drops at 1-3 each
+    assert sum(totals.values()) >= 4000
+    assert 0.40 * 4000 * 2 < totals['super_health_potion'] < 0.50 * 4000 * 2
+    assert combat_system.roll_loot_batch("dragon", 0) == {}
+    with pytest.raises(ValueError):
+        combat_system.build_loot_tables({'slime': [(None, 0, 0, 0)]})
+
+def test_grant_loot_leaves_behind_what_does_not_fit(make_character):
+    """Test that granted loot respects inventory capacity"""
+    items = {
+        'health_potion': {'type': 'consumable', 'max_stack': 99},
+        'iron_sword': {'type': 'weapon'}
+    }
+    hero = make_character()
+    for _ in range(inventory_system.SLOT_CAPACITY['weapon']):
+        inventory_system.add_item_to_inventory(hero, 'iron_sword', 1, items['iron_sword'])
+
+    granted, left_behind = inventory_system.grant_loot(
+        hero, {'health_potion': 3, 'iron_sword': 1}, items)
+
+    assert granted == [('health_potion', 3)]
+    assert left_behind == [('iron_sword', 1)]
+    assert inventory_system.count_item(hero, 'health_potion') == 3
+
+# ============================================================================
+# BATTLE LOG TESTS
+# ============================================================================
+
+def test_battle_events_go_to_ring_buffer(monkeypatch, capsys, make_character):
+    """Test that a battle reports structured events to its sink"""
+    monkeypatch.setattr("builtins.input", lambda prompt="": "1")
+    sink = battle_log.RingBufferSink(capacity=500)
+    enemy = combat_system.create_enemy("goblin")
+
+    result = combat_system.SimpleBattle(make_character(), enemy, log=sink).start_battle()
+
+    events = sink.events()
+    attacks = [e for e in events if e.action == "attack" and e.actor == "Hero"]
+    assert result['winner'] == "player"
+    assert events[0].action == "start"
+    assert events[-1].action == "victory"
+    assert attacks[0].damage == 13
+    assert attacks[0].target_health == 37
+    assert ">>>" not in capsys.readouterr().out
+
+def test_json_lines_sink_round_trip(tmp_path):
+    """Test that events written as JSON lines can be read back"""
+    filename = tmp_path / "battle.jsonl"
+    sink = battle_log.JsonLinesSink(str(filename), batch_size=2)
+    event = battle_log.BattleEvent(1, "Hero", "attack", "Goblin", 13, 120, 37, None)
+
+    for _ in range(3):
+        sink.emit(event)
+    sink.close()
+
+    assert battle_log.read_json_lines(str(filename)) == [event] * 3
+
+def test_console_rendering_shows_max_health_and_turns(make_character):
+    """Test that rendered events keep the HP=x/y status and enemy turn header"""
+    sink = battle_log.RingBufferSink(capacity=10)
+    battle = combat_system.SimpleBattle(make_character(), combat_system.create_enemy("goblin"),
+                                        log=sink, seed=1, actions=combat_system.always_attack)
+    battle.render_status()
+    battle.enemy_turn()
+
+    text = [battle_log.render_event(event) for event in sink.events()]
+    assert text[0] == "\nHero: HP=120/120\nGoblin: HP=50/50"
+    assert text[1] == "\n--- ENEMY TURN ---"
+    # Events saved before max health was recorded still render
+    old = battle_log.BattleEvent(1, "Hero", "status", "Goblin", 0, 120, 50, None)
+    assert battle_log.render_event(old) == "\nHero: HP=120\nGoblin: HP=50"
+
+def test_null_sink_skips_event_building(monkeypatch, capsys, make_character):
+    """Test that a disabled sink never receives events"""
+    class RefusingSink(battle_log.NullSink):
+        def emit(self, event):
+            raise AssertionError("events should not be built")
+
+    monkeypatch.setattr("builtins.input", lambda prompt="": "1")
+    enemy = combat_system.create_enemy("goblin")
+    battle = combat_system.SimpleBattle(make_character(), enemy, log=RefusingSink())
+
+    assert battle.start_battle()['winner'] == "player"
+    assert ">>>" not in capsys.readouterr().out
+
+# ============================================================================
+# BATTLE REPLAY TESTS
+# ============================================================================
+
+def run_recorded_battle(character, seed, choices):
+    """Fight a headless battle and return its replay record"""
+    battle = combat_system.SimpleBattle(
+        character, combat_system.create_enemy("orc"),
+        log=battle_log.NullSink(), seed=seed,
+        actions=lambda battle: choices[(battle.turn_counter - 1) % len(choices)]
+    )
+    battle.start_battle()
+    return battle.record
+
+def test_replay_reproduces_random_battle(make_character):
+    """Test that seed plus actions reproduce a battle with random rolls"""
+    record = run_recorded_battle(make_character('Rogue'), 42, "23")
+
+    result = combat_system.replay_battle(record)
+
+    assert result['winner'] == record['winner']
+    assert result['turns'] == record['turns']
+    assert result['final_health'] == record['final_health']
+
+def test_escape_ends_battle_without_enemy_turn(make_character):
+    """Test that a successful escape is reported as its own outcome"""
+    for seed in range(20):
+        record = run_recorded_battle(make_character('Warrior'), seed, "3")
+        if record['winner'] == "escaped":
+            break
+    assert record['winner'] == "escaped"
+    assert combat_system.replay_battle(record)['winner'] == "escaped"
+
+def test_bulk_verify_flags_changed_battles(tmp_path, make_character):
+    """Test that stored records are verified and mismatches reported"""
+    records = [run_recorded_battle(make_character('Rogue'), seed, "12") for seed in range(50)]
+    filename = str(tmp_path / "battles.jsonl")
+    battle_replay.save_battle_records(records, filename)
+
+    loaded = battle_replay.load_battle_records(filename)
+    assert battle_replay.verify_battle_records(loaded) == []
+
+    loaded[3]['enemy']['strength'] += 30
+    mismatches = battle_replay.verify_battle_records(loaded)
+    assert [index for index, difference in mismatches] == [3]
+
+def test_replay_with_missing_actions_raises(make_character):
+    """Test that a truncated record is reported instead of hanging"""
+    record = run_recorded_battle(make_character('Warrior'), 5, "1")
+    record['actions'] = record['actions'][:1]
+
+    with pytest.raises(CombatError):
+        combat_system.replay_battle(record)
+
+# ============================================================================
+# AUTO-RESOLVE TESTS
+# ============================================================================
+
+def test_auto_resolve_matches_stepped_battle(make_character):
+    """Test that the closed-form result equals a turn-by-turn battle"""
+    for health in (1, 30, 95, 120):
+        for strength in (1, 8, 15, 40):
+            for enemy_type in ("goblin", "orc", "dragon"):
+                fast_char = make_character(health=health, strength=strength)
+                slow_char = dict(fast_char)
+                fast_enemy = dict(combat_system.create_enemy(enemy_type), ai="basic")
+                slow_enemy = dict(fast_enemy)
+
+                fast = combat_system.auto_resolve_battle(fast_char, fast_enemy)
+                slow = combat_system.SimpleBattle(
+                    slow_char, slow_enemy, log=battle_log.NullSink(),
+                    actions=combat_system.always_attack
+                ).start_battle()
+
+                assert fast == slow
+                assert fast_char['health'] == slow_char['health']
+                assert fast_enemy['health'] == slow_enemy['health']
+
+def test_auto_resolve_matches_stepped_battle_for_real_enemies(make_character):
+    """Test the closed form against real AI policies, stepping only when needed"""
+    for health in (1, 30, 95, 120):
+        for strength in (1, 8, 15, 40, 120):
+            for enemy_type in ("goblin", "orc", "dragon"):
+                fast_char = make_character(health=health, strength=strength)
+                slow_char = dict(fast_char)
+                fast_enemy = combat_system.create_enemy(enemy_type)
+                slow_enemy = dict(fast_enemy)
+
+                fast = combat_system.auto_resolve_battle(fast_char, fast_enemy)
+                slow = combat_system.SimpleBattle(
+                    slow_char, slow_enemy, log=battle_log.NullSink(),
+                    actions=combat_system.always_attack
+                ).start_battle()
+
+                assert fast == slow
+                assert (fast_char['health'], fast_enemy['health']) == \
+                    (slow_char['health'], slow_enemy['health'])
+
+def test_auto_resolve_skips_stepping_when_policy_only_attacks(monkeypatch, make_character):
+    """Test that a goblin beaten before it frenzies is resolved without a battle"""
+    class NoBattle(combat_system.SimpleBattle):
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("battle was stepped")
+
+    # Dies in two hits, so it never drops below the frenzy threshold on its turn
+    hero = make_character(strength=30)
+    monkeypatch.setattr(combat_system, "SimpleBattle", NoBattle)
+    result = combat_system.auto_resolve_battle(hero, combat_system.create_enemy("goblin"))
+    assert (result['winner'], result['turns']) == ("player", 2)
+
+def test_auto_resolve_steps_for_smart_enemies(make_character):
+    """Test that enemies with a non-attack policy are stepped, not computed"""
+    fast_char, slow_char = make_character(), make_character()
+    fast_enemy = combat_system.create_enemy("dragon")
+    slow_enemy = combat_system.create_enemy("dragon")
+
+    fast = combat_system.auto_resolve_battle(fast_char, fast_enemy)
+    slow = combat_system.SimpleBattle(
+        slow_char, slow_enemy, log=battle_log.NullSink(),
+        actions=combat_system.always_attack
+    ).start_battle()
+
+    assert fast == slow
+    assert fast_enemy['health'] == slow_enemy['health']
+
+def test_auto_resolve_steps_when_abilities_used(make_character):
+    """Test that other action sources fall back to a stepped battle"""
+    character = make_character('Rogue')
+    result = combat_system.auto_resolve_battle(
+        character, combat_system.create_enemy("orc"),
+        actions=lambda battle: "2", seed=11
+    )
+    assert result['winner'] in ("player", "enemy")
+
+def test_auto_resolve_rejects_dead_character(make_character):
+    """Test that a dead character cannot be auto-resolved"""
+    character = make_character(health=0)
+    with pytest.raises(CharacterDeadError):
+        combat_system.auto_resolve_battle(character, combat_system.create_enemy("goblin"))
+
+# ============================================================================
+# ABILITY COOLDOWN TESTS
+# ============================================================================
+
+def test_ability_cooldown_blocks_reuse(make_character):
+    """Test that an ability can't be used again until its cooldown passes"""
+    state = combat_system.AbilityState()
+    hero = make_character()
+    enemy = combat_system.create_enemy("dragon")
+
+    combat_system.use_special_ability(hero, enemy, state=state)
+    with pytest.raises(AbilityOnCooldownError):
+        combat_system.use_special_ability(hero, enemy, state=state)
+
+    state.tick()
+    state.tick()
+    assert state.is_ready(hero)
+    combat_system.use_special_ability(hero, enemy, state=state)
+    assert enemy['health'] == 200 - 4 * hero['strength']
+
+def test_timed_effect_expires_after_duration(make_character):
+    """Test that buffs and debuffs are undone when they run out"""
+    state = combat_system.AbilityState()
+    mage = make_character('Mage')
+    enemy = combat_system.create_enemy("orc")
+
+    combat_system.use_special_ability(mage, enemy, state=state)
+    assert enemy['strength'] == 9
+
+    state.tick()
+    assert enemy['strength'] == 9
+    state.tick()
+    assert enemy['strength'] == 12
+    assert state.effects == []
+
+def test_battle_effects_do_not_outlive_battle(make_character):
+    """Test that spamming abilities hits cooldowns and leaves stats intact"""
+    cleric = make_character('Cleric')
+    sink = battle_log.RingBufferSink(capacity=1000)
+    battle = combat_system.SimpleBattle(
+        cleric, combat_system.create_enemy("goblin"),
+        log=sink, seed=1, actions=lambda battle: "2" if battle.turn_counter < 4 else "1"
+    )
+
+    battle.start_battle()
+
+    messages = [e.message for e in sink.events() if e.action == "ability"]
+    assert messages[:3] == ["You heal 30 HP.", "Ability on cooldown!", "Ability on cooldown!"]
+    assert cleric['strength'] == 15
+
+def test_failed_battle_still_clears_effects(make_character):
+    """Test that effects are undone when the battle loop raises"""
+    mage = make_character('Mage')
+    enemy = combat_system.create_enemy("orc")
+    battle = combat_system.SimpleBattle(
+        mage, enemy, log=battle_log.NullSink(), seed=3,
+        actions=combat_system.scripted_actions("2")
+    )
+
+    with pytest.raises(CombatError):
+        battle.start_battle()
+    assert enemy['strength'] == 12
+    assert battle.abilities.effects == []
+
+# ============================================================================
+# ENEMY AI TESTS
+# ============================================================================
+
+def test_policy_tables_follow_health_ratios(make_character):
+    """Test that decisions come from the precomputed HP bucket tables"""
+    hero = make_character()
+    dragon = combat_system.create_enemy("dragon")
+    assert combat_system.choose_enemy_action(dragon, hero) == "magic"
+
+    dragon['health'] = 80
+    assert combat_system.choose_enemy_action(dragon, hero) == "attack"
+
+    dragon['health'] = 20
+    assert combat_system.choose_enemy_action(dragon, hero) == "heal"
+
+    orc = combat_system.create_enemy("orc")
+    orc['health'] = 10
+    assert combat_system.choose_enemy_action(orc, hero) == "defend"
+    hero['health'] = 10
+    assert combat_system.choose_enemy_action(orc, hero) == "attack"
+
+def test_custom_policy_can_be_registered(monkeypatch, make_character):
+    """Test that new policies plug in without touching enemy_turn"""
+    # Register into copies so the policy doesn't leak into other tests
+    monkeypatch.setattr(combat_system, "ENEMY_POLICIES", dict(combat_system.ENEMY_POLICIES))
+    monkeypatch.setattr(combat_system, "_ATTACK_ONLY_POLICIES",
+                        set(combat_system._ATTACK_ONLY_POLICIES))
+    combat_system.register_enemy_policy("coward", lambda own, target: "defend")
+    enemy = dict(combat_system.create_enemy("goblin"), ai="coward")
+
+    assert combat_system.choose_enemy_action(enemy, make_character()) == "defend"
+    assert not combat_system.is_attack_only_policy(enemy)
+
+    with pytest.raises(InvalidTargetError):
+        combat_system.choose_enemy_action(dict(enemy, ai="missing"), make_character())
+
+def test_enemy_heals_are_limited(make_character):
+    """Test that a healing enemy runs out of heals and the battle ends"""
+    sink = battle_log.RingBufferSink(capacity=1000)
+    hero = make_character(health=5000, max_health=5000)
+    dragon = combat_system.create_enemy("dragon")
+
+    result = combat_system.SimpleBattle(hero, dragon, log=sink, seed=2,
+                                        actions=combat_system.always_attack).start_battle()
+
+    heals = [e for e in sink.events() if e.action == "heal"]
+    assert result['winner'] == "player"
+    assert len(heals) == combat_system.ENEMY_HEAL_CHARGES
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+"""
+Test Group Battles
+Tests the initiative queue and targeting in group_battle
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import battle_log
+import combat_system
+import group_battle
+from custom_exceptions import *
+
+# ============================================================================
+# INITIATIVE TESTS
+# ============================================================================
+
+def test_faster_combatants_act_more_often():
+    """Test that turn order follows speed"""
+    sink = battle_log.RingBufferSink(capacity=50)
+    fast = {'name': 'Fast', 'health': 500, 'max_health': 500, 'strength': 1, 'magic': 0, 'speed': 20}
+    slow = {'name': 'Slow', 'health': 500, 'max_health': 500, 'strength': 1, 'magic': 0, 'speed': 5}
+
+    battle = group_battle.GroupBattle([fast], [slow], log=sink, seed=1)
+    for _ in range(10):
+        battle.step()
+
+    actors = [e.actor for e in sink.events()]
+    assert actors.count('Fast') == 8
+    assert actors.count('Slow') == 2
+
+def test_party_defeats_goblin_pack(make_character):
+    """Test a full group battle and its rewards"""
+    party = [make_character("Warrior", "Tank"), make_character("Rogue", "Blade"),
+             make_character("Cleric", "Priest")]
+    pack = [combat_system.create_enemy("goblin") for _ in range(6)]
+
+    result = group_battle.GroupBattle(party, pack, party_targeting="weakest", seed=3).start_battle()
+
+    assert result['winner'] == "party"
+    assert result['xp_gained'] == 6 * 25
+    assert all(goblin['health'] == 0 for goblin in pack)
+    assert party[2]['strength'] == 15
+
+def test_raid_sized_battle_finishes(make_character):
+    """Test that hundreds of combatants resolve"""
+    party = [make_character("Warrior", f"Hero{i}") for i in range(200)]
+    horde = [combat_system.create_enemy("orc") for _ in range(300)]
+
+    result = group_battle.GroupBattle(party, horde, enemy_targeting="random", seed=9).start_battle()
+
+    assert result['winner'] in ("party", "enemies")
+    assert result['actions'] > 500
+
+def test_target_heaps_match_full_scans(make_character):
+    """Test that heap targeting always agrees with a scan of the living"""
+    classes = ["Warrior", "Mage", "Rogue", "Cleric"]
+    party = [make_character(classes[i % 4], f"Hero{i}") for i in range(40)]
+    horde = [combat_system.create_enemy(("goblin", "orc", "dragon")[i % 3]) for i in range(60)]
+    battle = group_battle.GroupBattle(party, horde, party_targeting="strongest",
+                                      enemy_targeting="weakest", seed=4)
+
+    while battle.alive["party"] and battle.alive["enemies"]:
+        battle.step()
+        for side in battle.alive.values():
+            if side:
+                assert side.weakest()['health'] == min(c['health'] for c in side)
+                assert side.strongest()['strength'] == max(c['strength'] for c in side)
+                assert len(side.by_health) <= 4 * len(side) + 16
+
+def test_failed_group_battle_still_clears_effects(make_character, monkeypatch):
+    """Test that buffs are undone when a step raises"""
+    party = [make_character("Cleric", f"Priest{i}") for i in range(3)]
+    battle = group_battle.GroupBattle(party, [combat_system.create_enemy("dragon")], seed=2)
+    steps = []
+
+    def failing_step(real_step=battle.step):
+        steps.append(real_step())
+        if len(steps) == 3:
+            raise CombatError("interrupted")
+
+    monkeypatch.setattr(battle, "step", failing_step)
+    with pytest.raises(CombatError):
+        battle.start_battle()
+    assert battle.abilities.effects == []
+    assert [member['strength'] for member in party] == [15, 15, 15]
+
+def test_group_battle_rejects_bad_setup(make_character):
+    """Test that invalid group battles raise the right errors"""
+    with pytest.raises(InvalidTargetError):
+        group_battle.GroupBattle([make_character("Mage", "A")], [], seed=1)
+    with pytest.raises(InvalidTargetError):
+        group_battle.GroupBattle([make_character("Mage", "A")], [combat_system.create_enemy("orc")],
+                                 party_targeting="closest")
+    dead = make_character("Mage", "A", health=0)
+    with pytest.raises(CharacterDeadError):
+        group_battle.GroupBattle([dead], [combat_system.create_enemy("orc")])
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
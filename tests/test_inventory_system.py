@@ -0,0 +1,531 @@
+"""
+Test Inventory System
+Tests inventory storage, items, equipment and shops in inventory_system
+"""
+
+import gc
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import character_manager
+import combat_system
+import game_data
+import inventory_system
+import shop_pricing
+from custom_exceptions import *
+
+# ============================================================================
+# INVENTORY STORAGE TESTS
+# ============================================================================
+
+def test_inventory_counts_without_scanning():
+    """Test that the counter-backed inventory behaves like the old list"""
+    inventory = inventory_system.Inventory(["potion", "sword", "potion"])
+
+    assert len(inventory) == 3
+    assert "potion" in inventory
+    assert inventory.count("potion") == 2
+    assert list(inventory) == ["potion", "potion", "sword"]
+
+    inventory.remove("potion")
+    inventory.remove("potion")
+    assert "potion" not in inventory
+    assert inventory == ["sword"]
+    with pytest.raises(ValueError):
+        inventory.remove("potion")
+
+def test_list_inventory_upgraded_on_first_use():
+    """Test that plain list inventories are converted in place"""
+    char = {'inventory': ['health_potion', 'health_potion'], 'gold': 0}
+
+    assert inventory_system.count_item(char, 'health_potion') == 2
+    assert isinstance(char['inventory'], inventory_system.Inventory)
+
+    inventory_system.add_item_to_inventory(char, 'iron_sword')
+    assert inventory_system.get_inventory_space_remaining(char) == \
+        inventory_system.MAX_INVENTORY_SIZE - 3
+    assert inventory_system.clear_inventory(char) == \
+        ['health_potion', 'health_potion', 'iron_sword']
+    assert len(char['inventory']) == 0
+
+def test_inventory_saves_as_list(tmp_path):
+    """Test that an Inventory round-trips through a save file"""
+    char = character_manager.create_character("StashTest", "Rogue")
+    for item_id in ("health_potion", "iron_sword", "health_potion"):
+        inventory_system.add_item_to_inventory(char, item_id)
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("StashTest", str(tmp_path))
+
+    assert loaded['inventory'] == ['health_potion', 'health_potion', 'iron_sword']
+    assert character_manager.validate_character_data(char)
+
+# ============================================================================
+# STACKING AND CAPACITY TESTS
+# ============================================================================
+
+POTION = {'item_id': 'health_potion', 'type': 'consumable', 'cost': 25, 'max_stack': 99}
+SWORD = {'item_id': 'iron_sword', 'type': 'weapon', 'cost': 100}
+
+def test_bulk_purchase_fills_stacks():
+    """Test that buying many potions is one update that only uses stack slots"""
+    char = {'inventory': [], 'gold': 500 * 25}
+
+    inventory_system.purchase_item(char, 'health_potion', POTION, 500)
+
+    assert char['gold'] == 0
+    assert inventory_system.count_item(char, 'health_potion') == 500
+    # 500 potions in stacks of 99 fill 6 slots
+    assert inventory_system.get_inventory_space_remaining(char) == \
+        inventory_system.MAX_INVENTORY_SIZE - 6
+
+    assert inventory_system.sell_item(char, 'health_potion', POTION, 500) == 500 * 12
+    assert len(char['inventory']) == 0
+    assert inventory_system.get_inventory_space_remaining(char) == \
+        inventory_system.MAX_INVENTORY_SIZE
+
+def test_bad_max_stack_names_the_item(tmp_path):
+    """Test that a non-numeric MAX_STACK is a data format error naming the item"""
+    filename = tmp_path / "items.txt"
+    filename.write_text("ITEM_ID: health_potion\nNAME: Health Potion\nTYPE: consumable\n"
+                        "EFFECT: health:20\nCOST: 25\nMAX_STACK: lots\n"
+                        "DESCRIPTION: Restores 20 HP.\n")
+
+    with pytest.raises(InvalidDataFormatError, match="health_potion"):
+        game_data.load_items(str(filename))
+
+def test_per_type_capacity():
+    """Test that one item type can't take more than its share of slots"""
+    char = {'inventory': [], 'gold': 0, 'item_data': {'iron_sword': SWORD}}
+    limit = inventory_system.SLOT_CAPACITY['weapon']
+
+    inventory_system.add_item_to_inventory(char, 'iron_sword', limit)
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_item_to_inventory(char, 'iron_sword')
+
+    # Other types still fit
+    inventory_system.add_item_to_inventory(char, 'health_potion', 99, POTION)
+    assert inventory_system.get_inventory_space_remaining(char) == \
+        inventory_system.MAX_INVENTORY_SIZE - limit - 1
+
+def test_failed_purchase_changes_nothing():
+    """Test that a purchase that doesn't fit keeps the gold"""
+    char = {'inventory': ['iron_sword'] * 10, 'gold': 1000,
+            'item_data': {'iron_sword': SWORD}}
+
+    with pytest.raises(InventoryFullError):
+        inventory_system.purchase_item(char, 'iron_sword', SWORD)
+    assert char['gold'] == 1000
+    with pytest.raises(ItemNotFoundError):
+        inventory_system.sell_item(char, 'iron_sword', SWORD, 11)
+    assert inventory_system.count_item(char, 'iron_sword') == 10
+
+def test_purchase_rejects_non_positive_quantities():
+    """Test that a negative purchase can't mint gold or negative stacks"""
+    char = {'inventory': [], 'gold': 100, 'item_data': {'health_potion': POTION}}
+
+    for quantity in (0, -5):
+        with pytest.raises(InvalidItemTypeError):
+            inventory_system.purchase_item(char, 'health_potion', POTION, quantity)
+    assert char['gold'] == 100
+    assert inventory_system.count_item(char, 'health_potion') == 0
+
+# ============================================================================
+# BULK TRANSACTION TESTS
+# ============================================================================
+
+CATALOG = {'health_potion': POTION, 'iron_sword': SWORD}
+
+def test_purchase_basket_applies_together():
+    """Test that a basket is bought in one go and repeated ids are combined"""
+    char = {'inventory': [], 'gold': 1000}
+    basket = [('health_potion', 3), ('iron_sword', 2), ('health_potion', 2)]
+
+    assert inventory_system.purchase_items(char, basket, CATALOG) == 5 * 25 + 2 * 100
+    assert char['gold'] == 1000 - 325
+    assert inventory_system.count_item(char, 'health_potion') == 5
+    assert inventory_system.count_item(char, 'iron_sword') == 2
+
+    assert inventory_system.sell_items(char, [('health_potion', 5), ('iron_sword', 1)],
+                                       CATALOG) == 5 * 12 + 50
+    assert char['inventory'] == ['iron_sword']
+
+def test_failed_basket_changes_nothing():
+    """Test that one bad line leaves gold and inventory untouched"""
+    char = {'inventory': ['health_potion'], 'gold': 300}
+
+    for basket, error in (
+        ([('health_potion', 1), ('dragon_egg', 1)], ItemNotFoundError),
+        ([('health_potion', 2), ('iron_sword', 3)], InsufficientResourcesError),
+        ([('iron_sword', 0)], InvalidItemTypeError),
+    ):
+        with pytest.raises(error):
+            inventory_system.purchase_items(char, basket, CATALOG)
+
+    # Each sword fits alone, but eleven together go past the weapon cap
+    char['gold'] = 10000
+    with pytest.raises(InventoryFullError):
+        inventory_system.purchase_items(char, [('iron_sword', 6), ('iron_sword', 5)], CATALOG)
+
+    with pytest.raises(ItemNotFoundError):
+        inventory_system.sell_items(char, [('health_potion', 1), ('iron_sword', 1)], CATALOG)
+
+    assert char['gold'] == 10000
+    assert char['inventory'] == ['health_potion']
+
+# ============================================================================
+# EQUIPMENT MODIFIER TESTS
+# ============================================================================
+
+def test_equipment_modifiers_cached_and_reverted():
+    """Test that gear bonuses are applied once and removed exactly on unequip"""
+    char = character_manager.create_character("GearTest", "Warrior")
+    char['item_data'] = {
+        'rune_blade': {'type': 'weapon', 'effect': 'strength:5,magic:2'},
+        'iron_sword': {'type': 'weapon', 'effect': 'strength:3'},
+        'plate': {'type': 'armor', 'effect': 'max_health:20'}
+    }
+    for item_id in char['item_data']:
+        inventory_system.add_item_to_inventory(char, item_id)
+
+    inventory_system.equip_weapon(char, 'rune_blade', char['item_data']['rune_blade'])
+    inventory_system.equip_armor(char, 'plate', char['item_data']['plate'])
+    assert (char['strength'], char['magic'], char['max_health']) == (20, 7, 140)
+    assert inventory_system.get_stat_modifiers(char) == \
+        {'strength': 5, 'magic': 2, 'max_health': 20}
+    assert inventory_system.get_base_stat(char, 'strength') == 15
+
+    # Swapping only changes the weapon's share
+    inventory_system.equip_weapon(char, 'iron_sword', char['item_data']['iron_sword'])
+    assert (char['strength'], char['magic']) == (18, 5)
+    assert 'rune_blade' in char['inventory']
+
+    char['health'] = 140
+    inventory_system.unequip_armor(char)
+    inventory_system.unequip_weapon(char)
+    assert (char['strength'], char['magic'], char['max_health'], char['health']) == \
+        (15, 5, 120, 120)
+    assert inventory_system.get_stat_modifiers(char) == {}
+
+def test_loaded_character_rebuilds_modifiers(tmp_path):
+    """Test that a saved character can unequip gear it was saved with"""
+    char = character_manager.create_character("GearLoad", "Rogue")
+    char['item_data'] = {'iron_sword': {'type': 'weapon', 'effect': 'strength:5'}}
+    inventory_system.add_item_to_inventory(char, 'iron_sword')
+    inventory_system.equip_weapon(char, 'iron_sword', char['item_data']['iron_sword'])
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("GearLoad", str(tmp_path))
+    assert 'item_data' not in loaded and 'stat_modifiers' not in loaded
+    assert loaded['strength'] == 17
+
+    loaded['item_data'] = char['item_data']
+    assert inventory_system.unequip_weapon(loaded) == 'iron_sword'
+    assert loaded['strength'] == 12
+    assert loaded['equipped_weapon'] is None
+
+def test_changed_item_data_never_corrupts_base_stats(tmp_path):
+    """Test that gear rebalanced between save and load keeps base stats exact"""
+    char = character_manager.create_character("GearPatch", "Rogue")
+    char['item_data'] = {'iron_sword': {'type': 'weapon', 'effect': 'strength:5'}}
+    inventory_system.add_item_to_inventory(char, 'iron_sword')
+    inventory_system.equip_weapon(char, 'iron_sword', char['item_data']['iron_sword'])
+    character_manager.save_character(char, str(tmp_path))
+
+    loaded = character_manager.load_character("GearPatch", str(tmp_path))
+    assert loaded['gear_bonus'] == {'strength': 5}
+    loaded['item_data'] = {'iron_sword': {'type': 'weapon', 'effect': 'strength:8'}}
+
+    assert inventory_system.get_base_stat(loaded, 'strength') == 12
+    assert loaded['strength'] == 20
+    inventory_system.unequip_weapon(loaded)
+    assert (loaded['strength'], loaded['gear_bonus']) == (12, {})
+
+# ============================================================================
+# EQUIPMENT SLOT AND SET TESTS
+# ============================================================================
+
+SET_ITEMS = {
+    'iron_helm': {'type': 'armor', 'slot': 'head', 'effect': 'max_health:8', 'set': 'ironclad'},
+    'iron_gauntlets': {'type': 'armor', 'slot': 'hands', 'effect': 'strength:2', 'set': 'ironclad'},
+    'steel_armor': {'type': 'armor', 'effect': 'max_health:25', 'set': 'ironclad'},
+    'ring_a': {'type': 'armor', 'slot': 'ring', 'effect': 'magic:1'},
+    'ring_b': {'type': 'armor', 'slot': 'ring', 'effect': 'magic:2'}
+}
+
+def test_rings_fill_both_ring_slots():
+    """Test that rings use the first free ring slot and can be unequipped by slot"""
+    char = character_manager.create_character("RingTest", "Mage")
+    char['item_data'] = SET_ITEMS
+    for item_id in ('ring_a', 'ring_b'):
+        inventory_system.add_item_to_inventory(char, item_id)
+        inventory_system.equip_armor(char, item_id, SET_ITEMS[item_id])
+
+    assert inventory_system.get_equipped_items(char) == {'ring1': 'ring_a', 'ring2': 'ring_b'}
+    assert char['magic'] == 23
+    assert inventory_system.unequip_slot(char, 'ring1') == 'ring_a'
+    assert char['magic'] == 22
+    with pytest.raises(InvalidItemTypeError):
+        inventory_system.equip_item(char, 'ring_a', SET_ITEMS['ring_a'], slot='head')
+
+def test_set_bonuses_follow_equipped_pieces(tmp_path):
+    """Test that set bonuses switch on and off as pieces are equipped"""
+    sets_file = tmp_path / "item_sets.txt"
+    sets_file.write_text("SET_ID: ironclad\nNAME: Ironclad\n"
+                         "BONUS_2: max_health:10\nBONUS_3: strength:4,max_health:15\n")
+    item_sets = game_data.load_item_sets(str(sets_file))
+    assert item_sets['ironclad']['bonuses'] == {2: 'max_health:10', 3: 'strength:4,max_health:15'}
+
+    inventory_system.index_item_sets(SET_ITEMS, item_sets)
+    try:
+        char = character_manager.create_character("SetTest", "Warrior")
+        char['item_data'] = SET_ITEMS
+        for item_id in ('iron_helm', 'iron_gauntlets', 'steel_armor'):
+            inventory_system.add_item_to_inventory(char, item_id)
+            inventory_system.equip_armor(char, item_id, SET_ITEMS[item_id])
+
+        # 8 + 25 from the pieces, 10 + 15 from the 2- and 3-piece bonuses
+        assert char['max_health'] == 120 + 8 + 25 + 10 + 15
+        assert char['strength'] == 15 + 2 + 4
+
+        inventory_system.unequip_slot(char, 'hands')
+        assert char['max_health'] == 120 + 8 + 25 + 10
+        assert char['strength'] == 15
+    finally:
+        inventory_system.index_item_sets({}, {})
+
+# ============================================================================
+# SHOP CATALOG TESTS
+# ============================================================================
+
+def test_shop_pages_follow_filters():
+    """Test that shop views are cost-sorted, filtered and paged"""
+    items = {
+        f"potion_{n}": {'type': 'consumable', 'effect': 'health:10', 'cost': n * 10}
+        for n in range(1, 26)
+    }
+    items['rune_blade'] = {'type': 'weapon', 'effect': 'strength:5,magic:2', 'cost': 95}
+    catalog = inventory_system.build_shop_catalog(items)
+    assert catalog['types'] == ['consumable', 'weapon']
+    assert catalog['stats'] == ['health', 'magic', 'strength']
+
+    first = inventory_system.get_shop_page(catalog, 0, 10)
+    assert first['items'][:3] == ['potion_1', 'potion_2', 'potion_3']
+    assert (first['pages'], first['total']) == (3, 26)
+    assert inventory_system.get_shop_page(catalog, 2, 10)['items'][-1] == 'potion_25'
+    # Out-of-range pages are clamped to the last page
+    assert inventory_system.get_shop_page(catalog, 9, 10)['page'] == 2
+
+    # 100 gold affords potions 1-10 and the 95-gold blade
+    affordable = inventory_system.get_shop_page(catalog, 1, 10, max_cost=100)
+    assert affordable['total'] == 11 and affordable['items'] == ['potion_10']
+    assert inventory_system.get_shop_page(catalog, item_type='weapon', stat='magic')['items'] == \
+        ['rune_blade']
+    assert inventory_system.get_shop_page(catalog, item_type='armor')['total'] == 0
+
+def test_repriced_catalog_matches_fresh_build():
+    """Test that refreshing prices re-sorts views like a full rebuild"""
+    items = {
+        'cheap': {'type': 'weapon', 'effect': 'strength:1', 'cost': 10},
+        'middle': {'type': 'weapon', 'effect': 'strength:2', 'cost': 50},
+        'dear': {'type': 'consumable', 'effect': 'health:5', 'cost': 90}
+    }
+    catalog = inventory_system.build_shop_catalog(items)
+    prices = {'cheap': 70, 'middle': 50, 'dear': 20}
+
+    inventory_system.reprice_shop_catalog(catalog, prices)
+    assert catalog == inventory_system.build_shop_catalog(items, prices)
+    assert inventory_system.get_shop_page(catalog, stat='strength')['items'] == ['middle', 'cheap']
+
+def test_basket_sale_of_unknown_item_raises():
+    """Test that sell_items rejects unpriced items like sell_item does"""
+    char = {'inventory': ['mystery_egg'], 'gold': 0}
+    pricing = shop_pricing.PricingEngine(CATALOG)
+
+    with pytest.raises(ItemNotFoundError):
+        inventory_system.sell_items(char, [('mystery_egg', 1)], CATALOG)
+    with pytest.raises(ItemNotFoundError):
+        inventory_system.sell_items(char, [('mystery_egg', 1)], dict(CATALOG, mystery_egg=POTION),
+                                    pricing)
+    assert (char['gold'], char['inventory']) == (0, ['mystery_egg'])
+
+# ============================================================================
+# JOURNAL TESTS
+# ============================================================================
+
+JOURNAL_ITEMS = {'iron_sword': SWORD | {'effect': 'strength:5'},
+                 'health_potion': POTION | {'effect': 'health:20'}}
+
+def test_undo_reverses_whole_operations(make_hero):
+    """Test that undo restores items, gold and stats one operation at a time"""
+    char = make_hero("JournalTest", item_data=JOURNAL_ITEMS, journal=True)
+    sword = char['item_data']['iron_sword']
+
+    inventory_system.purchase_item(char, 'iron_sword', sword)
+    inventory_system.equip_weapon(char, 'iron_sword', sword)
+    assert (char['gold'], char['strength'], char['equipped_weapon']) == (0, 20, 'iron_sword')
+
+    journal = char['journal']
+    assert journal.undo() == 'equip iron_sword'
+    assert (char['strength'], char['equipped_weapon']) == (15, None)
+    assert char['inventory'] == ['iron_sword']
+    assert inventory_system.get_stat_modifiers(char) == {}
+
+    assert journal.undo() == 'buy iron_sword'
+    assert (char['gold'], len(char['inventory'])) == (100, 0)
+    assert journal.undo() is None
+
+def test_failed_operation_rolls_back(make_hero):
+    """Test that an error partway through a transaction undoes its earlier steps"""
+    char = make_hero("JournalTest", item_data=JOURNAL_ITEMS, journal=True)
+    char['health'] = 50
+    inventory_system.add_item_to_inventory(char, 'health_potion', 2)
+
+    with pytest.raises(InventoryFullError):
+        with char['journal'].transaction('drink and loot'):
+            inventory_system.use_item(char, 'health_potion', char['item_data']['health_potion'])
+            inventory_system.add_item_to_inventory(char, 'iron_sword', 11)
+
+    assert char['health'] == 50
+    assert inventory_system.count_item(char, 'health_potion') == 2
+    assert char['journal'].undo() == 'add health_potion'
+    assert len(char['inventory']) == 0
+
+def test_undo_never_replays_stale_deltas(make_hero):
+    """Test that undo stops at any change the journal didn't record"""
+    char = make_hero("JournalTest", item_data=JOURNAL_ITEMS, journal=True)
+    journal = char['journal']
+    char['health'] = 50
+    inventory_system.add_item_to_inventory(char, 'health_potion', 2)
+    inventory_system.use_item(char, 'health_potion', char['item_data']['health_potion'])
+
+    # A battle that changes nothing leaves the history usable
+    combat_system.auto_resolve_battle(char, {'name': 'Dummy', 'health': 1, 'max_health': 1,
+                                             'strength': 0, 'magic': 0, 'xp_reward': 0,
+                                             'gold_reward': 0})
+    inventory_system.add_item_to_inventory(char, 'iron_sword')
+    assert journal.undo() == 'add iron_sword'
+
+    # A fight leaves the character at 10 HP; undoing the heal would kill them
+    char['health'] = 10
+    assert journal.undo() is None
+    assert (char['health'], inventory_system.count_item(char, 'health_potion')) == (10, 1)
+
+    # An item dropped behind the journal's back can't be taken out again
+    inventory_system.add_item_to_inventory(char, 'iron_sword')
+    inventory_system.get_inventory(char).discard('iron_sword')
+    assert journal.undo() is None
+
+    # Gold spent outside the journal can't be taken back by undoing a sale
+    inventory_system.sell_item(char, 'health_potion', char['item_data']['health_potion'])
+    char['gold'] = 0
+    assert journal.undo() is None
+    assert (char['gold'], len(char['inventory'])) == (0, 0)
+
+def test_undo_reverses_pricing_trades(make_hero):
+    """Test that undoing a shop trade takes it back out of the pricing engine"""
+    char = make_hero("JournalTest", item_data=JOURNAL_ITEMS, journal=True)
+    pricing = shop_pricing.PricingEngine(char['item_data'])
+    potion = char['item_data']['health_potion']
+
+    inventory_system.purchase_item(char, 'health_potion', potion, 3, pricing)
+    inventory_system.sell_item(char, 'health_potion', potion, 1, pricing)
+    assert (pricing.bought['health_potion'], pricing.sold['health_potion']) == (3, 1)
+
+    assert char['journal'].undo() == 'sell health_potion'
+    assert char['journal'].undo() == 'buy health_potion'
+    assert (pricing.bought['health_potion'], pricing.sold['health_potion']) == (0, 0)
+    assert char['gold'] == 100
+
+    # Records name the engine by id, so they don't keep it alive
+    inventory_system.purchase_item(char, 'health_potion', potion, 1, pricing)
+    trade = char['journal'].undo_stack[-1][1][-1]
+    assert trade == ('trade', pricing.engine_id, 0, 'health_potion', 1, 0)
+    engine_id = pricing.engine_id
+    del pricing
+    gc.collect()
+    assert shop_pricing.get_engine(engine_id) is None
+    assert char['journal'].undo() == 'buy health_potion'
+    assert char['gold'] == 100
+
+def test_undo_stack_is_bounded(make_hero):
+    """Test that only the most recent operations are kept"""
+    char = make_hero("JournalTest", item_data=JOURNAL_ITEMS, journal=True)
+    for _ in range(inventory_system.UNDO_LIMIT + 5):
+        inventory_system.add_item_to_inventory(char, 'health_potion')
+
+    while char['journal'].undo():
+        pass
+    assert inventory_system.count_item(char, 'health_potion') == 5
+
+# ============================================================================
+# ITEM EFFECT TESTS
+# ============================================================================
+
+def test_consumable_effects_compiled_once():
+    """Test that effects compile at load time and run without reparsing"""
+    items = {
+        'tonic': {'name': 'Tonic', 'type': 'consumable', 'effect': 'health:30,magic:2', 'cost': 5},
+        'sword': {'name': 'Sword', 'type': 'weapon', 'effect': 'strength:5', 'cost': 5}
+    }
+    assert inventory_system.compile_item_effects(items) == 1
+    assert 'compiled_effect' not in items['sword']
+
+    char = {'health': 90, 'max_health': 100, 'magic': 10, 'inventory': ['tonic']}
+    # The string is no longer consulted once compiled
+    items['tonic']['effect'] = 'not an effect'
+    assert inventory_system.use_item(char, 'tonic', items['tonic']) == \
+        "Used Tonic and gained 30 health and gained 2 magic."
+    assert (char['health'], char['magic']) == (100, 12)
+
+    with pytest.raises(InvalidItemTypeError):
+        inventory_system.compile_item_effect('strength:lots')
+
+def test_heal_without_max_health_matches_legacy():
+    """Test that compiled heals accept the same partial characters as apply_stat_effect"""
+    potion = {'name': 'Potion', 'type': 'consumable', 'effect': 'health:20'}
+    inventory_system.compile_item_effects({'potion': potion})
+    char = {'health': 50, 'inventory': ['potion']}
+    legacy = {'health': 50}
+
+    inventory_system.use_item(char, 'potion', potion)
+    inventory_system.apply_stat_effect(legacy, 'health', 20)
+    assert char['health'] == legacy['health'] == 70
+
+def test_timed_buff_needs_battle_state():
+    """Test that buff effects go through the battle's AbilityState"""
+    elixir = {'name': 'Battle Elixir', 'type': 'consumable', 'effect': 'buff:strength:5:2'}
+    char = {'health': 50, 'max_health': 50, 'strength': 10,
+            'inventory': ['battle_elixir', 'battle_elixir']}
+
+    with pytest.raises(InvalidItemTypeError):
+        inventory_system.use_item(char, 'battle_elixir', elixir)
+    assert inventory_system.count_item(char, 'battle_elixir') == 2
+
+    state = combat_system.AbilityState()
+    inventory_system.use_item(char, 'battle_elixir', elixir, state)
+    assert char['strength'] == 15
+    state.tick()
+    state.tick()
+    assert char['strength'] == 10
+
+def test_custom_effect_opcode():
+    """Test that new opcodes plug in without changing the compiler"""
+    def run_gold(character, args, state):
+        character['gold'] += args[0]
+        return f"found {args[0]} gold"
+
+    inventory_system.register_effect_opcode('gold', lambda args: (int(args[0]),), run_gold)
+    try:
+        pouch = {'name': 'Pouch', 'type': 'consumable', 'effect': 'gold:40'}
+        char = {'gold': 0, 'inventory': ['pouch']}
+        inventory_system.use_item(char, 'pouch', pouch)
+        assert char['gold'] == 40
+    finally:
+        del inventory_system.EFFECT_OPCODES['gold']
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
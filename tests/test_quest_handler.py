@@ -0,0 +1,234 @@
+"""
+Test Quest Handler
+Tests quest prerequisite indexing, cycle checks and quest queries
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import character_manager
+import game_data
+import quest_handler
+from custom_exceptions import *
+
+def make_quest(quest_id, prerequisite="NONE", level=1):
+    return {
+        'quest_id': quest_id, 'title': quest_id.title(), 'description': '',
+        'reward_xp': 10, 'reward_gold': 5,
+        'required_level': level, 'prerequisite': prerequisite
+    }
+
+def make_quests():
+    """first -> (second -> fourth, third); side has no prerequisite"""
+    quests = [
+        make_quest('fourth', 'second', 3),
+        make_quest('first'),
+        make_quest('second', 'first', 2),
+        make_quest('third', 'first'),
+        make_quest('side')
+    ]
+    return {quest['quest_id']: quest for quest in quests}
+
+def test_index_orders_quests_after_prerequisites():
+    """Test adjacency and the topological order"""
+    quests = make_quests()
+    index = quest_handler.build_quest_index(quests)
+
+    order = index['order']
+    assert sorted(order) == sorted(quests)
+    for qid, quest in quests.items():
+        if quest['prerequisite'] != 'NONE':
+            assert order.index(quest['prerequisite']) < order.index(qid)
+
+    assert quest_handler.get_unlocked_quests('first', index) == ['second', 'third']
+    assert quest_handler.get_unlocked_quests('side', index) == []
+
+def test_indexed_chain_matches_walk():
+    """Test that memoized chains equal the plain prerequisite walk"""
+    quests = make_quests()
+    index = quest_handler.build_quest_index(quests)
+
+    for qid in quests:
+        assert (quest_handler.get_quest_prerequisite_chain(qid, quests, index)
+                == quest_handler.get_quest_prerequisite_chain(qid, quests))
+    assert index['chains']['fourth'] == ('first', 'second', 'fourth')
+    with pytest.raises(QuestNotFoundError):
+        quest_handler.get_quest_prerequisite_chain('missing', quests, index)
+
+def test_indexed_available_quests_match_scan(make_hero):
+    """Test that the index gives the same available quests as a full scan"""
+    quests = make_quests()
+    index = quest_handler.build_quest_index(quests)
+
+    for hero in (make_hero(), make_hero(level=2, completed_quests=['first']),
+                 make_hero(level=3, completed_quests=['first', 'second'])):
+        assert (quest_handler.get_available_quests(hero, quests, index)
+                == quest_handler.get_available_quests(hero, quests))
+
+def test_level_requirement_message_names_quest(make_hero):
+    """Test the insufficient level error names the quest"""
+    quests = make_quests()
+    with pytest.raises(InsufficientLevelError, match="level 3 to accept fourth"):
+        hero = make_hero(completed_quests=['first', 'second'])
+        quest_handler.accept_quest(hero, 'fourth', quests)
+
+def test_find_prerequisite_cycles_reports_every_loop():
+    """Test that each loop is reported once and acyclic quests are not"""
+    quests = make_quests()
+    quests.update({
+        'a': make_quest('a', 'b'), 'b': make_quest('b', 'c'), 'c': make_quest('c', 'a'),
+        'tail': make_quest('tail', 'a'),
+        'mirror': make_quest('mirror', 'mirror'),
+        'orphan': make_quest('orphan', 'missing')
+    })
+
+    cycles = game_data.find_prerequisite_cycles(quests)
+    assert sorted(map(sorted, cycles)) == [['a', 'b', 'c'], ['mirror']]
+    assert game_data.find_prerequisite_cycles(make_quests()) == []
+
+    # A long chain closed into one loop is still a single linear pass
+    chain = {f"q{i}": make_quest(f"q{i}", f"q{i - 1}") for i in range(1, 100000)}
+    chain['q0'] = make_quest('q0', 'q99999')
+    assert [len(cycle) for cycle in game_data.find_prerequisite_cycles(chain)] == [100000]
+
+def test_load_quests_rejects_cycles(tmp_path):
+    """Test that loading a looping quest file fails instead of hanging later"""
+    blocks = []
+    for quest_id, prereq in [('a', 'b'), ('b', 'a'), ('c', 'NONE')]:
+        blocks.append(f"QUEST_ID: {quest_id}\nTITLE: {quest_id}\nDESCRIPTION: d\n"
+                      f"REWARD_XP: 1\nREWARD_GOLD: 1\nREQUIRED_LEVEL: 1\n"
+                      f"PREREQUISITE: {prereq}")
+    path = tmp_path / "quests.txt"
+    path.write_text("\n\n".join(blocks))
+
+    with pytest.raises(InvalidDataFormatError, match="a -> b -> a"):
+        game_data.load_quests(str(path))
+
+def test_chain_walks_stop_at_loops():
+    """Test that chain queries raise on a loop instead of spinning"""
+    quests = {'a': make_quest('a', 'b'), 'b': make_quest('b', 'a')}
+    index = quest_handler.build_quest_index(quests)
+
+    assert index['order'] == []
+    with pytest.raises(InvalidDataFormatError):
+        quest_handler.get_quest_prerequisite_chain('a', quests)
+    with pytest.raises(InvalidDataFormatError):
+        quest_handler.get_quest_prerequisite_chain('a', quests, index)
+
+def available_ids(hero, quests):
+    return sorted(quest['quest_id'] for quest in quest_handler.get_available_quests(hero, quests))
+
+def test_tracker_follows_quest_events():
+    """Test that the tracker matches a full rescan after every event"""
+    quests = make_quests()
+    index = quest_handler.build_quest_index(quests)
+    hero = dict(character_manager.create_character("Hero", "Warrior"))
+    tracker = quest_handler.QuestTracker(hero, quests, index)
+    assert hero['quest_tracker'] is tracker
+
+    def check():
+        untracked = dict(hero, quest_tracker=None)
+        assert available_ids(hero, quests) == available_ids(untracked, quests)
+
+    check()
+    quest_handler.accept_quest(hero, 'first', quests)
+    check()
+    quest_handler.complete_quest(hero, 'first', quests)
+    # 'second' needs level 2, so it waits in a level bucket
+    assert available_ids(hero, quests) == ['side', 'third']
+    check()
+
+    character_manager.gain_experience(hero, 100)
+    assert 'second' in available_ids(hero, quests)
+    check()
+    quest_handler.accept_quest(hero, 'second', quests)
+    quest_handler.abandon_quest(hero, 'second')
+    check()
+    quest_handler.accept_quest(hero, 'second', quests)
+    quest_handler.complete_quest(hero, 'second', quests)
+    assert 'fourth' not in available_ids(hero, quests)
+
+    # Several levels at once release every bucket passed
+    character_manager.gain_experience(hero, 1000)
+    assert 'fourth' in available_ids(hero, quests)
+    check()
+
+def test_tracker_is_not_saved(tmp_path):
+    """Test that the tracker is runtime-only state"""
+    hero = character_manager.create_character("Tracked", "Mage")
+    quest_handler.QuestTracker(hero, make_quests())
+    character_manager.save_character(hero, str(tmp_path))
+
+    loaded = character_manager.load_character("Tracked", str(tmp_path))
+    assert 'quest_tracker' not in loaded
+
+def test_quest_lists_behave_like_lists(tmp_path):
+    """Test that quest state upgrades to QuestList and still saves as lists"""
+    quests = make_quests()
+    hero = character_manager.create_character("Lister", "Rogue")
+    quest_handler.accept_quest(hero, 'first', quests)
+    quest_handler.accept_quest(hero, 'side', quests)
+    quest_handler.complete_quest(hero, 'first', quests)
+
+    assert isinstance(hero['active_quests'], quest_handler.QuestList)
+    assert hero['active_quests'] == ['side']
+    assert hero['completed_quests'] == ['first']
+    assert character_manager.validate_character_data(hero)
+    with pytest.raises(ValueError):
+        hero['active_quests'].remove('first')
+
+    character_manager.save_character(hero, str(tmp_path))
+    loaded = character_manager.load_character("Lister", str(tmp_path))
+    assert loaded['active_quests'] == ['side']
+    assert quest_handler.is_quest_completed(loaded, 'first')
+    assert not quest_handler.can_accept_quest(loaded, 'first', quests)
+
+def test_level_index_range_queries():
+    """Test bisect level ranges against the plain scan"""
+    quests = make_quests()
+    index = quest_handler.build_quest_index(quests)
+
+    assert index['level_buckets'] == {1: ['first', 'third', 'side'], 2: ['second'], 3: ['fourth']}
+    for low, high in [(1, 1), (2, 3), (0, 10), (4, 9), (3, 2)]:
+        indexed = quest_handler.get_quests_by_level(quests, low, high, index)
+        scanned = quest_handler.get_quests_by_level(quests, low, high)
+        assert sorted(q['quest_id'] for q in indexed) == sorted(q['quest_id'] for q in scanned)
+    assert [q['required_level'] for q in quest_handler.find_quests(quests, index)] == [1, 1, 1, 2, 3]
+
+def test_single_level_lookup_uses_bucket_copy(make_hero):
+    """Test that one-level queries read level_buckets without exposing them"""
+    quests = make_quests()
+    index = quest_handler.build_quest_index(quests)
+
+    found = quest_handler.get_level_range(index, 1, 1)
+    assert found == ['first', 'third', 'side']
+    found.clear()
+    assert index['level_buckets'][1] == ['first', 'third', 'side']
+    assert quest_handler.get_level_range(index, 7, 7) == []
+
+    board = quest_handler.find_quests(quests, index, min_level=1, max_level=1,
+                                      character=make_hero(completed_quests=['first']),
+                                      not_completed=True)
+    assert [q['quest_id'] for q in board] == ['third', 'side']
+
+def test_find_quests_combines_filters(make_hero):
+    """Test level range, completion and prerequisite filters together"""
+    quests = make_quests()
+    index = quest_handler.build_quest_index(quests)
+    hero = make_hero(level=3, completed_quests=['first'])
+
+    found = quest_handler.find_quests(quests, index, min_level=1, max_level=2, character=hero,
+                                      not_completed=True, prerequisites_met=True)
+    assert [q['quest_id'] for q in found] == ['third', 'side', 'second']
+
+    found = quest_handler.find_quests(quests, index, min_level=2, character=hero,
+                                      prerequisites_met=True)
+    assert [q['quest_id'] for q in found] == ['second']
+    with pytest.raises(ValueError):
+        quest_handler.find_quests(quests, index, not_completed=True)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
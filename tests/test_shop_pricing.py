@@ -0,0 +1,68 @@
+"""
+Test Shop Pricing
+Tests supply/demand, reputation and regional prices in shop_pricing
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory_system
+import shop_pricing
+from custom_exceptions import *
+
+ITEMS = {
+    'health_potion': {'type': 'consumable', 'effect': 'health:20', 'cost': 25},
+    'iron_sword': {'type': 'weapon', 'effect': 'strength:5', 'cost': 100}
+}
+
+def test_untouched_prices_match_static_costs():
+    """Test that a fresh town shop charges exactly the old static prices"""
+    pricing = shop_pricing.PricingEngine(ITEMS)
+
+    for item_id, item in ITEMS.items():
+        assert pricing.buy_price(item_id) == item['cost']
+        assert pricing.sell_price(item_id) == item['cost'] // 2
+    with pytest.raises(ItemNotFoundError):
+        pricing.buy_price('dragon_egg')
+    with pytest.raises(ValueError):
+        shop_pricing.PricingEngine(ITEMS, region='moon')
+
+def test_prices_only_move_on_tick():
+    """Test that demand is batched until tick and that prices then follow it"""
+    pricing = shop_pricing.PricingEngine(ITEMS)
+    char = {'inventory': [], 'gold': 10000, 'completed_quests': []}
+
+    inventory_system.purchase_item(char, 'health_potion', ITEMS['health_potion'], 40, pricing)
+    assert char['gold'] == 10000 - 40 * 25
+    assert pricing.buy_price('health_potion') == 25
+
+    assert pricing.tick() == 2
+    # 40 net purchases at 1% each make potions 40% dearer; swords are untouched
+    assert pricing.buy_price('health_potion') == 35
+    assert pricing.buy_price('iron_sword') == 100
+
+    assert inventory_system.sell_item(char, 'health_potion', ITEMS['health_potion'],
+                                      40, pricing) == 40 * 17
+    pricing.tick()
+    # Carried-over demand (20) minus the 40 sold
+    assert pricing.demand['health_potion'] == -20
+    assert pricing.buy_price('health_potion') == 20
+
+def test_reputation_and_region_adjust_prices():
+    """Test reputation discounts and regional multipliers"""
+    pricing = shop_pricing.PricingEngine(ITEMS, region='frontier')
+    veteran = {'completed_quests': ['q'] * 10}
+
+    assert pricing.buy_price('iron_sword') == 125
+    assert pricing.buy_price('iron_sword', veteran) == 106
+    assert pricing.price_table(veteran)['health_potion'] == 26
+
+    pricing.set_region('capital')
+    assert pricing.buy_price('iron_sword') == 90
+    assert pricing.sell_price('iron_sword') == 45
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,101 @@
+"""
+Test Stash Store
+Tests shared stashes, transfers and dirty-only persistence in stash_store
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory_system
+import stash_store
+from custom_exceptions import *
+
+ITEMS = {
+    'health_potion': {'name': 'Health Potion', 'type': 'consumable', 'effect': 'health:20',
+                      'cost': 25, 'max_stack': 99},
+    'iron_sword': {'name': 'Iron Sword', 'type': 'weapon', 'effect': 'strength:5', 'cost': 100}
+}
+
+def test_stash_works_with_inventory_functions(tmp_path):
+    """Test that a stash can be used anywhere a character can"""
+    store = stash_store.StashStore(str(tmp_path), ITEMS)
+    stash = store.create_stash("kim", capacity=2)
+
+    inventory_system.add_item_to_inventory(stash, 'health_potion', 150)
+    assert inventory_system.count_item(stash, 'health_potion') == 150
+    assert inventory_system.get_inventory_space_remaining(stash) == 0
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_item_to_inventory(stash, 'iron_sword')
+
+    assert store.stashes_for("kim") == [stash]
+    assert store.stashes_for("lee") == []
+    with pytest.raises(ItemNotFoundError):
+        store.get_stash("lee_shared")
+
+def test_transfer_between_characters_is_atomic(tmp_path, make_hero):
+    """Test moving items and gold through a shared stash"""
+    store = stash_store.StashStore(str(tmp_path), ITEMS)
+    stash = store.get_or_create_stash("kim")
+    first, second = make_hero("First", item_data=ITEMS), make_hero("Second", item_data=ITEMS)
+    inventory_system.add_item_to_inventory(first, 'health_potion', 30)
+
+    store.transfer(first, stash, 'health_potion', 30)
+    store.transfer(stash, second, 'health_potion', 10)
+    store.transfer_gold(first, stash, 60)
+    assert inventory_system.count_item(second, 'health_potion') == 10
+    assert inventory_system.count_item(stash, 'health_potion') == 20
+    assert (first['gold'], stash['gold']) == (40, 60)
+
+    with pytest.raises(ItemNotFoundError):
+        store.transfer(stash, second, 'health_potion', 21)
+    with pytest.raises(InsufficientResourcesError):
+        store.transfer_gold(stash, second, 61)
+
+    # Second can't fit another weapon, so nothing leaves the first character
+    swords = ['iron_sword'] * inventory_system.SLOT_CAPACITY['weapon']
+    for item_id in swords:
+        inventory_system.add_item_to_inventory(second, item_id)
+    inventory_system.add_item_to_inventory(first, 'iron_sword')
+    with pytest.raises(InventoryFullError):
+        store.transfer(first, second, 'iron_sword')
+    assert inventory_system.count_item(first, 'iron_sword') == 1
+
+def test_transfers_are_not_undoable(tmp_path, make_hero):
+    """Test that undo can't revert one side of a transfer"""
+    store = stash_store.StashStore(str(tmp_path), ITEMS)
+    stash = store.get_or_create_stash("kim")
+    hero = make_hero("Depositor", item_data=ITEMS)
+    journal = inventory_system.InventoryJournal(hero)
+    inventory_system.add_item_to_inventory(hero, 'health_potion', 10)
+    store.save()
+
+    store.transfer(hero, stash, 'health_potion', 10)
+    store.transfer_gold(hero, stash, 100)
+    assert journal.undo() is None
+
+    assert inventory_system.count_item(hero, 'health_potion') == 0
+    assert inventory_system.count_item(stash, 'health_potion') == 10
+    assert (hero['gold'], stash['gold']) == (0, 100)
+    assert store.save() == 1
+
+def test_save_writes_only_changed_stashes(tmp_path):
+    """Test dirty tracking and reloading"""
+    store = stash_store.StashStore(str(tmp_path), ITEMS)
+    kim = store.create_stash("kim")
+    store.create_stash("lee")
+    assert store.save() == 2
+    assert store.save() == 0
+
+    inventory_system.add_item_to_inventory(kim, 'health_potion', 5)
+    assert store.save() == 1
+
+    reloaded = stash_store.StashStore(str(tmp_path), ITEMS)
+    assert reloaded.load() == 2
+    assert inventory_system.count_item(reloaded.get_stash("kim_shared"), 'health_potion') == 5
+    assert reloaded.save() == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])